@@ -0,0 +1,160 @@
+"""
+Benchmark de cargas concurrentes: OpenMeteoService.load_weather en un pool de
+hilos (lo que da un worker síncrono con --threads) frente a aload_weather
+(la vista async bajo ASGI) contra el servidor Open-Meteo falso de los tests,
+con `--latency` segundos por respuesta.
+
+Cada carga es una ciudad distinta y un día; al acabar se borran sus datos.
+Con --asgi además se lanza uvicorn con config.asgi y se hacen N POST a
+/api/load/ a la vez (necesita `pip install uvicorn`). Necesita la base de
+datos configurada en config.settings:
+
+    python benchmarks/bench_async_load.py [--loads 50 200] [--threads 8] [--latency 0.5] [--asgi]
+"""
+from pathlib import Path
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "weather" / "tests"))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+os.environ.setdefault("WEATHER_LOAD_ASYNC", "false")
+django.setup()
+
+import httpx  # noqa: E402
+from django.conf import settings  # noqa: E402
+from django.db import connection  # noqa: E402
+from weather.models import DailyWeatherSummary, GeocodedCity, Location, WeatherRecord  # noqa: E402
+from services import geocoding_cache, http_client  # noqa: E402
+from services.open_meteo import OpenMeteoService  # noqa: E402
+from fake_open_meteo import FakeOpenMeteo  # noqa: E402
+
+PREFIX = "Bench Load"
+DAY = "2024-07-01"
+
+
+def cities(loads, run):
+    return [f"{PREFIX} {run} {i:04d}" for i in range(loads)]
+
+
+def cleanup():
+    WeatherRecord.objects.filter(location__name__startswith=PREFIX).delete()
+    DailyWeatherSummary.objects.filter(city__startswith=PREFIX).delete()
+    Location.objects.filter(name__startswith=PREFIX).delete()
+    GeocodedCity.objects.filter(key__startswith=PREFIX.lower()).delete()
+    geocoding_cache.clear()
+
+
+def app_threads():
+    """Hilos vivos sin contar los del servidor falso (uno por conexión)"""
+    return sum(1 for thread in threading.enumerate() if "process_request_thread" not in thread.name)
+
+
+def peak_threads(fn):
+    """Ejecuta fn() y devuelve (segundos, resultado, hilos vivos como máximo)"""
+    peak, done = [app_threads()], threading.Event()
+
+    def watch():
+        while not done.wait(0.01):
+            peak[0] = max(peak[0], app_threads())
+
+    watcher = threading.Thread(target=watch, daemon=True)
+    watcher.start()
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    done.set()
+    watcher.join()
+    return elapsed, result, peak[0] - 1  # Sin el propio watcher
+
+
+def run_threads(names, threads):
+    def load(city):
+        try:
+            return OpenMeteoService.load_weather(city, DAY, DAY)["inserted"]
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        return sum(pool.map(load, names))
+
+
+def run_async(names):
+    async def load_all():
+        counts = await asyncio.gather(*(OpenMeteoService.aload_weather(city, DAY, DAY) for city in names))
+        return sum(c["inserted"] for c in counts)
+
+    return asyncio.run(load_all())
+
+
+def run_asgi(names):
+    import uvicorn
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config("config.asgi:application", port=port, log_level="warning", lifespan="off"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    async def post_all():
+        limits = httpx.Limits(max_connections=len(names))
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=120) as client:
+            responses = await asyncio.gather(*(
+                client.post("/api/load/", json={"city": city, "start_date": DAY, "end_date": DAY}) for city in names
+            ))
+        return sum(r.json().get("inserted", 0) for r in responses)
+
+    try:
+        return peak_threads(lambda: asyncio.run(post_all()))
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--loads", type=int, nargs="+", default=[50, 200])
+    parser.add_argument("--threads", type=int, default=8, help="Hilos del camino síncrono")
+    parser.add_argument("--latency", type=float, default=0.5, help="Segundos por respuesta del servidor falso")
+    parser.add_argument("--asgi", action="store_true", help="Medir también /api/load/ bajo uvicorn")
+    args = parser.parse_args()
+
+    fake = FakeOpenMeteo().start()
+    fake.latency = args.latency
+    settings.OPEN_METEO_GEOCODING_URL = fake.geocoding_url
+    settings.OPEN_METEO_ARCHIVE_URL = fake.archive_url
+    os.environ["OPEN_METEO_GEOCODING_URL"], os.environ["OPEN_METEO_ARCHIVE_URL"] = fake.geocoding_url, fake.archive_url
+    http_client.reset()
+
+    print(f"{'loads':>6} {'path':>16} {'time (s)':>9} {'loads/s':>8} {'threads':>8}")
+    try:
+        for loads in args.loads:
+            paths = {
+                f"threads ({args.threads})": lambda names: peak_threads(lambda: run_threads(names, args.threads)),
+                "async": lambda names: peak_threads(lambda: run_async(names)),
+            }
+            if args.asgi:
+                paths["asgi /api/load/"] = run_asgi
+            for run, (name, measure) in enumerate(paths.items()):
+                cleanup()
+                elapsed, inserted, threads = measure(cities(loads, run))
+                assert inserted == loads * 24, f"{name}: {inserted} hours stored"
+                print(f"{loads:>6} {name:>16} {elapsed:>9.2f} {loads / elapsed:>8.1f} {threads:>8}")
+    finally:
+        cleanup()
+        fake.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark de la exportación de /api/records/ (services.export) frente a
+serializar el queryset entero con WeatherRecordSerializer.
+
+Inserta N horas sintéticas de una ciudad dentro de una transacción que se
+deshace al terminar y mide tiempo y memoria pico (tracemalloc) de producir
+la respuesta completa en cada formato. En streaming la memoria pico no
+depende de N. Necesita la base de datos configurada en config.settings:
+
+    python benchmarks/bench_export.py [--rows 100000 500000] [--chunk-size 5000]
+"""
+from pathlib import Path
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import django
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+from django.db import transaction  # noqa: E402
+from weather.models import WeatherRecord  # noqa: E402
+from weather.serializers import WeatherRecordSerializer  # noqa: E402
+from services import export  # noqa: E402
+from services.bulk_load import copy_weather_series  # noqa: E402
+from bench_frames import CITY, hourly  # noqa: E402
+
+
+def serializer(qs, chunk_size):
+    return len(json.dumps(WeatherRecordSerializer(qs.order_by("location_id", "datetime"), many=True).data))
+
+
+def streamed(output):
+    def run(qs, chunk_size):
+        return sum(len(chunk) for chunk in export.ENCODERS[output](export.blocks(qs, chunk_size)))
+    return run
+
+
+def measure(fn, qs, chunk_size):
+    started = time.perf_counter()
+    fn(qs, chunk_size)
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    fn(qs, chunk_size)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 500_000])
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    paths = {"serializer": serializer, **{output: streamed(output) for output in export.ENCODERS}}
+    if export.pa is None:
+        del paths["arrow"]
+
+    print(f"{'rows':>8} {'path':>10} {'time (s)':>9} {'peak (MiB)':>11}")
+    for rows in args.rows:
+        with transaction.atomic():
+            copy_weather_series([(CITY, 40.4, -3.7, hourly(rows))])
+            qs = WeatherRecord.objects.filter(location__name=CITY)
+            for name, fn in paths.items():
+                elapsed, peak = measure(fn, qs, args.chunk_size)
+                print(f"{rows:>8} {name:>10} {elapsed:>9.3f} {peak:>11.1f}")
+            transaction.set_rollback(True)
+
+
+if __name__ == "__main__":
+    main()
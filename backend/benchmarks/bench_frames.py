@@ -0,0 +1,83 @@
+"""
+Benchmark de services.frames.records_frame frente a pd.DataFrame(list(qs.values(...))).
+
+Inserta N horas sintéticas de una ciudad dentro de una transacción que se
+deshace al terminar, y mide tiempo y memoria pico (tracemalloc) de construir
+el DataFrame (datetime, temperature, precipitation) por cada camino.
+Necesita la base de datos configurada en config.settings:
+
+    python benchmarks/bench_frames.py [--rows 100000 500000] [--repeat 3]
+"""
+from pathlib import Path
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import django
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+from django.db import transaction  # noqa: E402
+from weather.models import WeatherRecord  # noqa: E402
+from services.bulk_load import copy_weather_series  # noqa: E402
+from services.frames import records_frame  # noqa: E402
+
+CITY = "Benchmark City"
+FIELDS = ("datetime", "temperature", "precipitation")
+
+
+def values_frame(qs):
+    df = pd.DataFrame(list(qs.values(*FIELDS)))
+    df["datetime"] = pd.to_datetime(df["datetime"])
+    return df
+
+
+def measure(fn, qs, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(qs)
+        timings.append(time.perf_counter() - started)
+    tracemalloc.start()
+    fn(qs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(timings), peak / 2**20
+
+
+def hourly(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    times = np.datetime64("2000-01-01T00:00") + np.arange(rows) * np.timedelta64(1, "h")
+    return {
+        "time": times.astype(str).tolist(),
+        "temperature_2m": rng.normal(15, 8, rows).round(1).tolist(),
+        "precipitation": np.clip(rng.normal(0, 1, rows), 0, None).round(1).tolist(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 500_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'values (s)':>11} {'values (MiB)':>13} {'frame (s)':>10} {'frame (MiB)':>12}")
+    for rows in args.rows:
+        with transaction.atomic():
+            copy_weather_series([(CITY, 40.4, -3.7, hourly(rows))])
+            qs = WeatherRecord.objects.filter(location__name=CITY).order_by("datetime")
+            assert values_frame(qs).equals(records_frame(qs, *FIELDS).astype({"datetime": "datetime64[us, UTC]"}))
+            values_time, values_peak = measure(values_frame, qs, args.repeat)
+            frame_time, frame_peak = measure(lambda q: records_frame(q, *FIELDS), qs, args.repeat)
+            transaction.set_rollback(True)
+        print(f"{rows:>8} {values_time:>11.3f} {values_peak:>13.1f} {frame_time:>10.3f} {frame_peak:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark de services.stats.global_stats (backend "pandas" de /api/global-stats/).
+
+Compara la agregación en una sola pasada con el bucle por ciudad anterior
+para 10, 100 y 1.000 ciudades con 30 días de datos horarios cada una.
+No necesita base de datos:
+
+    python benchmarks/bench_global_stats.py [--days 30] [--repeat 3]
+"""
+from pathlib import Path
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from services.stats import global_stats  # noqa: E402
+
+
+def loop_global_stats(df):
+    """Implementación anterior (un groupby y dos copias por ciudad), como referencia"""
+    df['datetime'] = pd.to_datetime(df['datetime'])
+    stats = {}
+    for city, group in df.groupby('city'):
+        temp = group[['datetime', 'temperature']].copy()
+        max_row = temp.loc[temp['temperature'].idxmax()]
+        min_row = temp.loc[temp['temperature'].idxmin()]
+        prec = group[['datetime', 'precipitation']].copy()
+        max_prec_row = prec.loc[prec['precipitation'].idxmax()]
+        stats[city] = {
+            "start_date": str(group['datetime'].min().date()),
+            "end_date": str(group['datetime'].max().date()),
+            "temperature_average": round(temp['temperature'].mean(), 2),
+            "precipitation_total": round(prec['precipitation'].sum(), 2),
+            "days_with_precipitation": int((prec.groupby(prec['datetime'].dt.date)['precipitation'].sum() > 0).sum()),
+            "precipitation_max": {"date": str(max_prec_row['datetime'].date()), "value": round(max_prec_row['precipitation'], 2)},
+            "temperature_max": {"date": str(max_row['datetime'].date()), "value": round(max_row['temperature'], 2)},
+            "temperature_min": {"date": str(min_row['datetime'].date()), "value": round(min_row['temperature'], 2)},
+        }
+    return stats
+
+
+def same(a, b):
+    """Mismo resultado salvo el último decimal de las medias (orden de suma distinto)"""
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(same(a[k], b[k]) for k in a)
+    if isinstance(a, float):
+        return abs(a - b) <= 0.011
+    return a == b
+
+
+def synthetic(cities, days, seed=0):
+    rng = np.random.default_rng(seed)
+    hours = days * 24
+    times = pd.date_range("2024-01-01", periods=hours, freq="h", tz="UTC")
+    return pd.DataFrame({
+        "city": np.repeat([f"City {i:04d}" for i in range(cities)], hours),
+        "datetime": np.tile(times, cities),
+        "temperature": rng.normal(15, 8, cities * hours).round(1),
+        "precipitation": np.clip(rng.normal(0, 1, cities * hours), 0, None).round(1),
+    })
+
+
+def best_of(fn, df, repeat):
+    timings = []
+    for _ in range(repeat):
+        data = df.copy()
+        started = time.perf_counter()
+        fn(data)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'cities':>7} {'rows':>10} {'loop (s)':>10} {'grouped (s)':>12} {'speedup':>8}")
+    for cities in (10, 100, 1000):
+        df = synthetic(cities, args.days)
+        assert same(global_stats(df.copy()), loop_global_stats(df.copy()))
+        loop = best_of(loop_global_stats, df, args.repeat)
+        grouped = best_of(global_stats, df, args.repeat)
+        print(f"{cities:>7} {len(df):>10} {loop:>10.3f} {grouped:>12.3f} {loop / grouped:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Prueba de carga de los endpoints de estadísticas: peticiones por segundo y
+latencia p50/p99 con `--concurrency` clientes durante `--duration` segundos.
+
+Sin --url arranca cada perfil en un puerto libre y lo mide:
+
+- dev: manage.py runserver con config.settings (DEBUG=True, una conexión
+  nueva a PostgreSQL por petición);
+- prod: gunicorn -c gunicorn.conf.py con config.settings_production (DEBUG=False,
+  pool de conexiones, workers de uvicorn).
+
+Cada petición pide un rango de días al azar dentro de --start-date/--end-date,
+así que casi ninguna sale de la caché de respuestas (--cached repite siempre
+el rango completo). Necesita datos de la ciudad, p. ej.:
+
+    python manage.py seed_synthetic --cities 10 --years 1 --end-year 2024
+    python benchmarks/bench_serving.py [--profiles dev prod] [--concurrency 16] [--duration 15]
+    python benchmarks/bench_serving.py --url http://localhost:8000   # un servidor ya arrancado
+"""
+from datetime import date, timedelta
+from pathlib import Path
+import argparse
+import asyncio
+import os
+import random
+import secrets
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+import numpy as np
+
+BACKEND = Path(__file__).resolve().parent.parent
+ENDPOINTS = ["/api/temperature/", "/api/precipitation/", "/api/global-stats/"]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(profile, port):
+    env = dict(os.environ)
+    if profile == "dev":
+        env["DJANGO_SETTINGS_MODULE"] = "config.settings"
+        command = [sys.executable, "manage.py", "runserver", "--noreload", f"127.0.0.1:{port}"]
+    else:
+        env.update(
+            DJANGO_SETTINGS_MODULE="config.settings_production",
+            DJANGO_SECRET_KEY=env.get("DJANGO_SECRET_KEY") or secrets.token_urlsafe(50),
+            DJANGO_ALLOWED_HOSTS="127.0.0.1",
+            GUNICORN_BIND=f"127.0.0.1:{port}",
+        )
+        command = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py"]
+    process = subprocess.Popen(command, cwd=BACKEND, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"{profile}: server exited with code {process.returncode}")
+        try:
+            if httpx.get(f"{url}/api/health/", timeout=1).status_code == 200:
+                return process, url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise SystemExit(f"{profile}: server did not start in 30 s")
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def make_params(args, rng):
+    """Parámetros de una petición: ciudad y rango de 1 a 90 días (o el completo con --cached)"""
+    first, last = date.fromisoformat(args.start_date), date.fromisoformat(args.end_date)
+    if args.cached:
+        start, end = first, last
+    else:
+        start = first + timedelta(days=rng.randrange((last - first).days + 1))
+        end = min(last, start + timedelta(days=rng.randrange(90)))
+    return {"city": args.city, "start_date": start.isoformat(), "end_date": end.isoformat()}
+
+
+async def run_load(url, args):
+    """Devuelve {endpoint: (latencias en s, errores)} y los segundos medidos"""
+    results = {endpoint: ([], [0]) for endpoint in ENDPOINTS}
+    limits = httpx.Limits(max_connections=args.concurrency)
+
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        async def user(index, deadline, record):
+            rng = random.Random(index)
+            turn = index
+            while time.monotonic() < deadline:
+                endpoint = ENDPOINTS[turn % len(ENDPOINTS)]
+                turn += 1
+                started = time.perf_counter()
+                try:
+                    response = await client.get(endpoint, params=make_params(args, rng))
+                    ok = response.status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                if record:
+                    latencies, errors = results[endpoint]
+                    latencies.append(time.perf_counter() - started)
+                    errors[0] += not ok
+
+        # Calentamiento: conexiones abiertas, pools llenos y código importado
+        await asyncio.gather(*(user(i, time.monotonic() + args.warmup, False) for i in range(args.concurrency)))
+        started = time.monotonic()
+        await asyncio.gather(*(user(i, started + args.duration, True) for i in range(args.concurrency)))
+        elapsed = time.monotonic() - started
+    return {endpoint: (latencies, errors[0]) for endpoint, (latencies, errors) in results.items()}, elapsed
+
+
+def report(name, results, elapsed):
+    rows = list(results.items())
+    rows.append(("all", (
+        [latency for latencies, _ in results.values() for latency in latencies],
+        sum(errors for _, errors in results.values()),
+    )))
+    for endpoint, (latencies, errors) in rows:
+        if not latencies:
+            continue
+        p50, p99 = np.percentile(np.array(latencies) * 1000, [50, 99])
+        print(f"{name:>8} {endpoint:>20} {len(latencies):>8} {errors:>7} {len(latencies) / elapsed:>8.1f} {p50:>8.1f} {p99:>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Medir este servidor en vez de arrancar los perfiles")
+    parser.add_argument("--profiles", nargs="+", choices=["dev", "prod"], default=["dev", "prod"])
+    parser.add_argument("--city", default="Synthetic 001")
+    parser.add_argument("--start-date", default="2024-01-01")
+    parser.add_argument("--end-date", default="2024-12-31")
+    parser.add_argument("--cached", action="store_true", help="Pedir siempre el rango completo (sale de la caché)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Clientes simultáneos")
+    parser.add_argument("--duration", type=float, default=15, help="Segundos medidos por perfil")
+    parser.add_argument("--warmup", type=float, default=3, help="Segundos sin medir antes de cada perfil")
+    args = parser.parse_args()
+
+    targets = [(args.url, args.url)] if args.url else [(profile, None) for profile in args.profiles]
+    print(f"{'profile':>8} {'endpoint':>20} {'requests':>8} {'errors':>7} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, url in targets:
+        process = None
+        if url is None:
+            process, url = start_server(name, free_port())
+        try:
+            check = httpx.get(f"{url}{ENDPOINTS[0]}", params=make_params(args, random.Random(0)), timeout=60)
+            if check.status_code != 200:
+                raise SystemExit(f"{name}: {ENDPOINTS[0]} returned {check.status_code}; is there data for {args.city}?")
+            results, elapsed = asyncio.run(run_load(url, args))
+            report(name if process else "url", results, elapsed)
+        finally:
+            if process:
+                stop_server(process)
+
+
+if __name__ == "__main__":
+    main()
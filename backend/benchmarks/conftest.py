@@ -0,0 +1,121 @@
+"""
+Suite de benchmarks (pytest-benchmark) sobre datos sintéticos.
+
+Cada tamaño de `--bench-sizes` ("ciudadesxaños") se siembra una vez en la
+base de datos de test con services.synthetic y los benchmarks que usan
+`dataset` se ejecutan contra él. La ingesta usa el servidor Open-Meteo falso
+de los tests, así que nada sale a la red:
+
+    pytest benchmarks [--bench-sizes 1x1 10x1 10x5]
+    pytest benchmarks --benchmark-autosave                  # guarda en .benchmarks/
+    pytest benchmarks --benchmark-compare --benchmark-compare-fail=mean:10%
+
+Quedan fuera de `pytest` a secas (testpaths = weather en pytest.ini).
+"""
+from datetime import date
+from pathlib import Path
+import sys
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "weather" / "tests"))
+from fake_open_meteo import FakeOpenMeteo  # noqa: E402
+from services import geocoding_cache, http_client  # noqa: E402
+from services.synthetic import seed_cities  # noqa: E402
+from weather.models import DailyWeatherSummary, Location, WeatherRecord  # noqa: E402
+
+END_YEAR = 2024
+
+
+class Dataset:
+    """Un tamaño sembrado: `cities` ciudades con `years` años horarios cada una"""
+
+    def __init__(self, cities, years):
+        self.cities = cities
+        self.years = years
+        self.city = "Synthetic 001"
+        self.start_date = f"{END_YEAR - years + 1}-01-01"
+        self.end_date = f"{END_YEAR}-12-31"
+
+    @property
+    def days(self):
+        return (date.fromisoformat(self.end_date) - date.fromisoformat(self.start_date)).days + 1
+
+    @property
+    def hours(self):
+        """Horas por ciudad"""
+        return self.days * 24
+
+    def __str__(self):
+        return f"{self.cities}x{self.years}"
+
+
+def parse_size(value):
+    cities, _, years = value.partition("x")
+    return Dataset(int(cities), int(years))
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--bench-sizes",
+        nargs="+",
+        default=["1x1", "10x1"],
+        help='Synthetic data sizes as "<cities>x<years>" (default: 1x1 10x1)',
+    )
+
+
+def pytest_generate_tests(metafunc):
+    sizes = [parse_size(value) for value in metafunc.config.getoption("bench_sizes")]
+    if "dataset" in metafunc.fixturenames:
+        # scope="session": pytest agrupa los benchmarks por tamaño y siembra cada uno una vez
+        metafunc.parametrize("dataset", sizes, ids=str, indirect=True, scope="session")
+    if "load_size" in metafunc.fixturenames:
+        metafunc.parametrize("load_size", sizes, ids=str)
+
+
+def _truncate():
+    tables = ", ".join(model._meta.db_table for model in (WeatherRecord, DailyWeatherSummary, Location))
+    with connection.cursor() as cursor:
+        cursor.execute(f"TRUNCATE {tables} RESTART IDENTITY CASCADE")
+
+
+@pytest.fixture(scope="session")
+def dataset(request, django_db_setup, django_db_blocker):
+    """Siembra el tamaño pedido fuera de la transacción de cada benchmark y lo borra al acabar"""
+    size = request.param
+    with django_db_blocker.unblock():
+        _truncate()
+        seed_cities(size.cities, size.years, end_year=END_YEAR)
+        yield size
+        _truncate()
+
+
+@pytest.fixture
+def fresh_cache():
+    """Vacía la caché de respuestas; pasarlo como setup de benchmark.pedantic"""
+    cache.clear()
+    yield cache.clear
+    cache.clear()
+
+
+@pytest.fixture(scope="session")
+def open_meteo_server():
+    """Servidor Open-Meteo falso para toda la sesión"""
+    server = FakeOpenMeteo().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def offline(open_meteo_server, settings):
+    """Los servicios apuntan al servidor falso durante el benchmark"""
+    settings.OPEN_METEO_GEOCODING_URL = open_meteo_server.geocoding_url
+    settings.OPEN_METEO_ARCHIVE_URL = open_meteo_server.archive_url
+    settings.WEATHER_LOAD_ASYNC = False
+    http_client.reset()
+    geocoding_cache.clear()
+    yield open_meteo_server
+    http_client.reset()
+    geocoding_cache.clear()
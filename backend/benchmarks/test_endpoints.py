@@ -0,0 +1,74 @@
+"""
+Cada endpoint de principio a fin (URL, vista, base de datos y JSON) con la
+caché de respuestas vacía en cada ronda, salvo en test_cached_response.
+"""
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+pytestmark = pytest.mark.django_db
+
+ROUNDS = 5
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+def get(api_client, name, params):
+    response = api_client.get(reverse(name), params)
+    assert response.status_code == 200, response.content[:200]
+    return response
+
+
+@pytest.mark.parametrize("backend", ["pandas", "database", "rollup"])
+@pytest.mark.parametrize("name", ["temperature_stats", "precipitation_stats", "global_stats"])
+def test_stats_endpoint(benchmark, dataset, api_client, fresh_cache, settings, name, backend):
+    settings.WEATHER_STATS_BACKEND = backend
+    params = {} if name == "global_stats" else {"city": dataset.city}
+    benchmark.pedantic(get, args=(api_client, name, params), setup=fresh_cache, rounds=ROUNDS)
+
+
+@pytest.mark.parametrize("resolution", ["auto", "day"])
+def test_series(benchmark, dataset, api_client, fresh_cache, resolution):
+    params = {"city": dataset.city, "resolution": resolution}
+    benchmark.pedantic(get, args=(api_client, "series", params), setup=fresh_cache, rounds=ROUNDS)
+
+
+@pytest.mark.parametrize("output", ["json", "ndjson", "csv"])
+def test_records_export(benchmark, dataset, api_client, output):
+    def export():
+        response = get(api_client, "export_records", {"city": dataset.city, "format": output})
+        return b"".join(response.streaming_content) if response.streaming else response.content
+
+    benchmark.pedantic(export, rounds=ROUNDS)
+
+
+def city_names(dataset):
+    return [f"Synthetic {index:03d}" for index in range(1, dataset.cities + 1)]
+
+
+@pytest.mark.parametrize("backend", ["database", "rollup"])
+def test_compare(benchmark, dataset, api_client, fresh_cache, settings, backend):
+    settings.WEATHER_STATS_BACKEND = backend
+    params = {"cities": ",".join(city_names(dataset))}
+    benchmark.pedantic(get, args=(api_client, "compare", params), setup=fresh_cache, rounds=ROUNDS)
+
+
+@pytest.mark.parametrize("backend", ["database", "rollup"])
+def test_compare_per_city(benchmark, dataset, api_client, fresh_cache, settings, backend):
+    """Lo que /api/compare/ sustituye: temperatura y precipitación ciudad a ciudad"""
+    settings.WEATHER_STATS_BACKEND = backend
+
+    def per_city():
+        for city in city_names(dataset):
+            get(api_client, "temperature_stats", {"city": city})
+            get(api_client, "precipitation_stats", {"city": city})
+
+    benchmark.pedantic(per_city, setup=fresh_cache, rounds=ROUNDS)
+
+
+def test_cached_response(benchmark, dataset, api_client):
+    get(api_client, "temperature_stats", {"city": dataset.city})
+    benchmark(get, api_client, "temperature_stats", {"city": dataset.city})
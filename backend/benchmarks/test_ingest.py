@@ -0,0 +1,68 @@
+"""
+Ingesta: store_weather_data con la respuesta ya descargada (primera carga y
+recarga sin cambios) y las cargas de /api/load/ y /api/load/batch/ contra el
+servidor Open-Meteo falso. Cada ronda parte de la base de datos vacía.
+"""
+import numpy as np
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+from weather.models import DailyWeatherSummary, Location, WeatherRecord
+from services.open_meteo import OpenMeteoService
+from services.synthetic import synthetic_hourly
+
+pytestmark = pytest.mark.django_db
+
+ROUNDS = 3
+
+
+def clear_database():
+    WeatherRecord.objects.all().delete()
+    DailyWeatherSummary.objects.all().delete()
+    Location.objects.all().delete()
+
+
+def payload(size):
+    return {"hourly": synthetic_hourly(40.4, size.start_date, size.end_date, np.random.default_rng(0))}
+
+
+def test_store_weather_data(benchmark, load_size):
+    weather_json = payload(load_size)
+    counts = benchmark.pedantic(
+        OpenMeteoService.store_weather_data, args=("Ingest 001", 40.4, -3.7, weather_json),
+        setup=clear_database, rounds=ROUNDS,
+    )
+    assert counts["inserted"] == load_size.hours
+
+
+def test_store_weather_data_unchanged(benchmark, load_size):
+    weather_json = payload(load_size)
+    OpenMeteoService.store_weather_data("Ingest 001", 40.4, -3.7, weather_json)
+    counts = benchmark.pedantic(
+        OpenMeteoService.store_weather_data, args=("Ingest 001", 40.4, -3.7, weather_json), rounds=ROUNDS,
+    )
+    assert counts["inserted"] == counts["updated"] == 0
+
+
+def test_load_endpoint(benchmark, load_size, offline):
+    def load():
+        response = APIClient().post(reverse("load_weather"), {
+            "city": "Ingest 001", "start_date": load_size.start_date, "end_date": load_size.end_date,
+        }, format="json")
+        assert response.status_code == 200, response.content[:200]
+
+    benchmark.pedantic(load, setup=clear_database, rounds=ROUNDS)
+
+
+def test_load_batch_endpoint(benchmark, load_size, offline):
+    items = [
+        {"city": f"Ingest {i:03d}", "start_date": load_size.start_date, "end_date": load_size.end_date}
+        for i in range(1, load_size.cities + 1)
+    ]
+
+    def load():
+        response = APIClient().post(reverse("load_weather_batch"), items, format="json")
+        assert response.status_code == 200, response.content[:200]
+        assert {item["status"] for item in response.json()["results"]} == {"success"}
+
+    benchmark.pedantic(load, setup=clear_database, rounds=ROUNDS)
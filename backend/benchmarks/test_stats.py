@@ -0,0 +1,84 @@
+"""
+Funciones de estadísticas de cada backend sobre una ciudad (temperatura y
+precipitación) o todas (global). En "pandas" se mide solo el cálculo, con el
+DataFrame ya leído; la lectura se mide aparte (frame, y cold_frame con todo
+el dataset en el tier frío). "cold" mide lectura y cálculo juntos.
+"""
+from datetime import date, timedelta
+import pytest
+from weather.models import DailyWeatherSummary, Location, WeatherRecord
+from weather.queries import filter_records, filter_summaries
+from services import cold_tier, rollup, stats, stats_db
+from services.frames import records_frame
+
+pytestmark = pytest.mark.django_db
+
+
+def records(dataset, city=True):
+    return filter_records(WeatherRecord.objects.all(), dataset.city if city else None)
+
+
+def summaries(dataset, city=True):
+    return filter_summaries(DailyWeatherSummary.objects.all(), dataset.city if city else None)
+
+
+@pytest.fixture
+def cold(dataset, settings, tmp_path):
+    """Todo el dataset compactado en un tier frío temporal"""
+    settings.WEATHER_COLD_TIER_DIR = str(tmp_path)
+    cold_tier.compact(before=date.fromisoformat(dataset.end_date) + timedelta(days=1))
+
+
+def test_frame(benchmark, dataset):
+    df = benchmark(records_frame, records(dataset), "datetime", "temperature", "precipitation")
+    assert len(df) == dataset.hours
+
+
+def test_cold_frame(benchmark, dataset, cold):
+    df = benchmark(cold_tier.records_frame, records(dataset), "datetime", "temperature", "precipitation", city=dataset.city)
+    assert len(df) == dataset.hours
+
+
+@pytest.mark.parametrize("backend", ["pandas", "database", "rollup"])
+def test_temperature_stats(benchmark, dataset, backend):
+    if backend == "pandas":
+        df = records_frame(records(dataset), "datetime", "temperature")
+        result = benchmark(stats.temperature_stats, df, threshold_high=30, threshold_low=0)
+    elif backend == "database":
+        result = benchmark(stats_db.temperature_stats, records(dataset), threshold_high=30, threshold_low=0)
+    else:
+        result = benchmark(rollup.temperature_stats, summaries(dataset), threshold_high=30, threshold_low=0)
+    assert len(result["average_by_day"]) == dataset.days
+
+
+@pytest.mark.parametrize("backend", ["pandas", "database", "rollup"])
+def test_precipitation_stats(benchmark, dataset, backend):
+    if backend == "pandas":
+        df = records_frame(records(dataset), "datetime", "precipitation")
+        result = benchmark(stats.precipitation_stats, df)
+    elif backend == "database":
+        result = benchmark(stats_db.precipitation_stats, records(dataset))
+    else:
+        result = benchmark(rollup.precipitation_stats, summaries(dataset))
+    assert result["total"] > 0
+
+
+def global_from_cold(dataset, names):
+    df = cold_tier.records_frame(records(dataset, city=False), "location", "datetime", "temperature", "precipitation")
+    df["city"] = df.pop("location").map(names)
+    return stats.global_stats(df)
+
+
+@pytest.mark.parametrize("backend", ["pandas", "rollup", "cold"])
+def test_global_stats(benchmark, dataset, backend, request):
+    if backend == "cold":
+        request.getfixturevalue("cold")
+        names = dict(Location.objects.values_list("location_id", "name"))
+        result = benchmark(global_from_cold, dataset, names)
+    elif backend == "pandas":
+        df = records_frame(records(dataset, city=False), "location", "datetime", "temperature", "precipitation")
+        df["city"] = df.pop("location").map(dict(Location.objects.values_list("location_id", "name")))
+        result = benchmark(stats.global_stats, df)
+    else:
+        result = benchmark(rollup.global_stats, summaries(dataset, city=False))
+    assert len(result) == dataset.cities
@@ -0,0 +1,148 @@
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
+from pathlib import Path
+import atexit
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import weakref
+
+# ----------------------------
+# Logging sin bloquear las peticiones
+# ----------------------------
+# settings.LOGGING manda todo al QueueListenerHandler: el hilo que registra
+# un mensaje solo lo encola y un hilo aparte (QueueListener) lo escribe en
+# consola y en el fichero del día. Python 3.12 permite configurar un
+# QueueHandler así en dictConfig, pero no 3.11.
+#
+# Un proceso hijo creado con fork (los workers de run_ingest_worker) no
+# hereda el hilo del listener: cada handler arranca uno nuevo en el hijo.
+
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+_queue_handlers = weakref.WeakSet()
+
+
+def _restart_listeners():
+    for handler in list(_queue_handlers):
+        handler.restart_listener()
+
+
+os.register_at_fork(after_in_child=_restart_listeners)
+
+
+class QueueListenerHandler(QueueHandler):
+    """QueueHandler con su propio QueueListener hacia `handlers` (referencias
+    "cfg://handlers.<nombre>" a otros handlers de LOGGING, cuyos nombres deben
+    ir antes que el de este en orden alfabético)"""
+
+    def __init__(self, handlers, respect_handler_level=True):
+        # Por índice: así dictConfig resuelve las referencias cfg://
+        targets = [handlers[i] for i in range(len(handlers))]
+        for target in targets:
+            if not isinstance(target, logging.Handler):
+                # dictConfig crea los handlers por orden de nombre
+                raise ValueError(f"Queue target not configured yet: {target}. Its name must sort before the queue handler's")
+        super().__init__(queue.SimpleQueue())
+        self.listener = QueueListener(self.queue, *targets, respect_handler_level=respect_handler_level)
+        self.listener.start()
+        _queue_handlers.add(self)
+        atexit.register(self.close)
+
+    def restart_listener(self):
+        """Cola y listener nuevos (tras un fork el hilo del listener no existe en el hijo)"""
+        if self.listener._thread is None:
+            return  # Cerrado
+        self.queue = queue.SimpleQueue()
+        self.listener = QueueListener(
+            self.queue, *self.listener.handlers, respect_handler_level=self.listener.respect_handler_level
+        )
+        self.listener.start()
+
+    def close(self):
+        # Escribe lo que quede en la cola antes de cerrar
+        if self.listener._thread is not None:
+            self.listener.stop()
+        _queue_handlers.discard(self)
+        super().close()
+
+
+class DailyFileHandler(TimedRotatingFileHandler):
+    """weather.log con los mensajes del día (UTC). A medianoche pasa a
+    weatherDD-MM-YYYY.log y se borran los de hace más de `backup_days` días"""
+
+    ROTATED = re.compile(r"^weather(\d{2})-(\d{2})-(\d{4})\.log$")
+
+    def __init__(self, directory, backup_days=30):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        super().__init__(
+            self.directory / "weather.log", when="midnight", utc=True,
+            backupCount=backup_days, encoding="utf-8", delay=True,
+        )
+        self.namer = self._rotated_name
+
+    def _rotated_name(self, default_name):
+        # default_name = ".../weather.log.YYYY-MM-DD"
+        day = datetime.strptime(default_name.rsplit(".", 1)[-1], "%Y-%m-%d")
+        return str(self.directory / f"weather{day:%d-%m-%Y}.log")
+
+    def getFilesToDelete(self):
+        days = []
+        for path in self.directory.iterdir():
+            match = self.ROTATED.match(path.name)
+            if match:
+                day, month, year = match.groups()
+                days.append((f"{year}{month}{day}", str(path)))
+        days.sort()
+        return [path for _, path in days[:max(0, len(days) - self.backupCount)]]
+
+
+class JsonFormatter(logging.Formatter):
+    """Una línea JSON por mensaje, con los campos de `extra` y la traza si hay excepción"""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in _RECORD_FIELDS)
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """Deja pasar 1 de cada `every` mensajes por debajo de `level` de los
+    loggers indicados (y sus hijos), contando por plantilla de mensaje: el
+    primero de cada plantilla siempre se escribe. Los que pasan llevan
+    `sample_every` para saber cuántos representan."""
+
+    def __init__(self, every=1, loggers=(), level="WARNING"):
+        super().__init__()
+        self.every = every
+        self.loggers = tuple(loggers)
+        self.level = logging.getLevelName(level) if isinstance(level, str) else level
+        self._seen = {}
+        self._lock = threading.Lock()
+
+    def _sampled(self, name):
+        return any(name == prefix or name.startswith(prefix + ".") for prefix in self.loggers)
+
+    def filter(self, record):
+        if self.every <= 1 or record.levelno >= self.level or not self._sampled(record.name):
+            return True
+        key = (record.name, record.msg)
+        with self._lock:
+            if len(self._seen) > 10000:  # Mensajes formateados antes de llamar al logger (f-strings)
+                self._seen.clear()
+            seen = self._seen.get(key, 0)
+            self._seen[key] = seen + 1
+        if seen % self.every:
+            return False
+        record.sample_every = self.every
+        return True
@@ -43,6 +43,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "weather.middleware.MetricsMiddleware",  # Primero: mide la petición entera
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -128,3 +129,159 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/6.0/howto/static-files/
 
 STATIC_URL = "static/"
+
+
+# Weather stats
+# Motor de estadísticas: "rollup" (resumen diario), "database" (agregación
+# en PostgreSQL sobre los datos horarios) o "pandas"
+
+WEATHER_STATS_BACKEND = os.environ.get("WEATHER_STATS_BACKEND", "rollup")
+
+# Tier frío (services.cold_tier): directorio de los ficheros Arrow con los
+# meses cerrados de cada ciudad (`manage.py compact_cold_tier`). El backend
+# "pandas" lee de ahí los meses compactados y de PostgreSQL solo el resto.
+# Vacío: desactivado.
+WEATHER_COLD_TIER_DIR = os.environ.get("WEATHER_COLD_TIER_DIR", "")
+
+# Umbrales de horas calurosas / frías del resumen diario.
+# Si se cambian hay que ejecutar `manage.py rebuild_daily_summaries`.
+WEATHER_THRESHOLD_HIGH = 30
+WEATHER_THRESHOLD_LOW = 0
+
+# Ingesta: tamaño de las ventanas pedidas al archive API (días), ventanas
+# descargadas a la vez, reintentos por ventana y tamaño de los bloques
+# enviados a PostgreSQL con COPY (horas)
+WEATHER_FETCH_WINDOW_DAYS = 365
+WEATHER_FETCH_WORKERS = 4
+WEATHER_FETCH_WINDOW_RETRIES = 2
+WEATHER_COPY_CHUNK_SIZE = 5000
+
+# Carga por lotes (/api/load/batch/): ciudades por petición, peticiones
+# simultáneas a Open-Meteo y coordenadas por petición al archive API
+WEATHER_BATCH_MAX_ITEMS = 500
+WEATHER_BATCH_WORKERS = 8
+WEATHER_BATCH_COORDS_PER_REQUEST = 50
+
+# Open-Meteo: endpoints, timeouts (segundos), pool de conexiones,
+# reintentos en 429/5xx y circuit breaker
+OPEN_METEO_GEOCODING_URL = os.environ.get("OPEN_METEO_GEOCODING_URL", "https://geocoding-api.open-meteo.com/v1/search")
+OPEN_METEO_ARCHIVE_URL = os.environ.get("OPEN_METEO_ARCHIVE_URL", "https://archive-api.open-meteo.com/v1/archive")
+OPEN_METEO_CONNECT_TIMEOUT = 3.05
+OPEN_METEO_READ_TIMEOUT = 30
+OPEN_METEO_POOL_SIZE = 10
+OPEN_METEO_RETRIES = 3
+OPEN_METEO_BACKOFF_FACTOR = 0.5
+# Espera máxima (segundos) antes de un reintento; si Retry-After pide más se
+# falla sin esperar, para no dejar un worker colgado
+OPEN_METEO_BACKOFF_MAX = 10
+OPEN_METEO_BREAKER_THRESHOLD = 5
+OPEN_METEO_BREAKER_RESET = 30
+# Peticiones async simultáneas a Open-Meteo (vistas ASGI), por proceso
+OPEN_METEO_ASYNC_MAX_CONNECTIONS = 100
+
+# Caché de geocoding: entradas en memoria por proceso y TTL (segundos) de
+# los resultados encontrados / no encontrados
+GEOCODING_CACHE_SIZE = 1024
+GEOCODING_CACHE_TTL = 30 * 24 * 3600
+GEOCODING_NEGATIVE_TTL = 3600
+
+# Cola de cargas: con WEATHER_LOAD_ASYNC /api/load/ encola un LoadJob y
+# responde 202; los procesa `manage.py run_ingest_worker`. Intentos por
+# trabajo, espera base entre intentos (se duplica en cada uno) y segundos
+# sin actividad tras los que un trabajo en curso se da por abandonado
+WEATHER_LOAD_ASYNC = os.environ.get("WEATHER_LOAD_ASYNC", "true").lower() == "true"
+WEATHER_JOB_MAX_ATTEMPTS = 3
+WEATHER_JOB_RETRY_DELAY = 30
+WEATHER_JOB_STALE_AFTER = 600
+# Cada cuántos segundos renueva su trabajo un worker mientras lo ejecuta
+# (tiene que ser bastante menor que WEATHER_JOB_STALE_AFTER)
+WEATHER_JOB_HEARTBEAT = 60
+WEATHER_INGEST_WORKER_PROCESSES = 2
+WEATHER_INGEST_POLL_INTERVAL = 1.0
+
+# Caché de Django. Por defecto en memoria de cada proceso; con REDIS_URL
+# (redis://host:6379/0) se comparte entre procesos. Las invalidaciones de la
+# caché de estadísticas van por la base de datos y no dependen de esto
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "open-meteo",
+    },
+}
+if os.environ.get("REDIS_URL"):
+    CACHES["default"] = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.environ["REDIS_URL"],
+    }
+
+# Caché de respuestas de /api/temperature/, /api/precipitation/ y
+# /api/global-stats/: alias de CACHES y vida de las entradas (segundos)
+WEATHER_STATS_CACHE = "default"
+WEATHER_STATS_CACHE_TTL = 300
+
+# Exportación de datos horarios (/api/records/): filas leídas del cursor de
+# servidor y escritas en la respuesta por bloque, y tamaño por defecto /
+# máximo de las páginas de format=json
+WEATHER_EXPORT_CHUNK_SIZE = 5000
+WEATHER_EXPORT_PAGE_SIZE = 1000
+WEATHER_EXPORT_MAX_PAGE_SIZE = 10000
+
+# /api/series/: puntos que elige como mucho resolution=auto y límite para
+# una resolución pedida explícitamente
+WEATHER_SERIES_MAX_POINTS = 1000
+WEATHER_SERIES_POINT_LIMIT = 10000
+
+# /api/compare/: ciudades como mucho por petición
+WEATHER_COMPARE_MAX_CITIES = 20
+
+# Métricas: histogramas por proceso en /metrics (formato Prometheus) y
+# tiempos por fase de cada petición en la cabecera Server-Timing
+WEATHER_METRICS_ENABLED = os.environ.get("WEATHER_METRICS_ENABLED", "true").lower() == "true"
+WEATHER_SERVER_TIMING = os.environ.get("WEATHER_SERVER_TIMING", "true").lower() == "true"
+
+# Logs: los mensajes se encolan y un hilo aparte (config.logs) los escribe en
+# consola (desde WARNING) y en logs/weather.log, que rota a medianoche (UTC) a
+# weatherDD-MM-YYYY.log y guarda WEATHER_LOG_BACKUP_DAYS días. Con
+# WEATHER_LOG_JSON una línea JSON por mensaje. Los mensajes de cada petición
+# de estadísticas se muestrean: de WEATHER_LOG_SAMPLED_LOGGERS, por debajo de
+# WARNING, se escribe 1 de cada WEATHER_LOG_SAMPLE_EVERY (1 = todos)
+WEATHER_LOG_DIR = os.environ.get("WEATHER_LOG_DIR", BASE_DIR / "logs")
+WEATHER_LOG_BACKUP_DAYS = int(os.environ.get("WEATHER_LOG_BACKUP_DAYS", 30))
+WEATHER_LOG_JSON = os.environ.get("WEATHER_LOG_JSON", "false").lower() == "true"
+WEATHER_LOG_SAMPLE_EVERY = int(os.environ.get("WEATHER_LOG_SAMPLE_EVERY", 1))
+WEATHER_LOG_SAMPLED_LOGGERS = ["services.stats", "services.stats_db", "services.rollup", "services.stats_cache"]
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "text": {"format": "%(asctime)s - %(levelname)s - %(name)s - %(message)s"},
+        "json": {"()": "config.logs.JsonFormatter"},
+    },
+    "filters": {
+        "sampling": {
+            "()": "config.logs.SamplingFilter",
+            "every": WEATHER_LOG_SAMPLE_EVERY,
+            "loggers": WEATHER_LOG_SAMPLED_LOGGERS,
+        },
+    },
+    "handlers": {
+        "console": {
+            "class": "logging.StreamHandler",
+            "level": "WARNING",
+            "formatter": "json" if WEATHER_LOG_JSON else "text",
+        },
+        "file": {
+            "()": "config.logs.DailyFileHandler",
+            "directory": WEATHER_LOG_DIR,
+            "backup_days": WEATHER_LOG_BACKUP_DAYS,
+            "formatter": "json" if WEATHER_LOG_JSON else "text",
+        },
+        "queue": {
+            "()": "config.logs.QueueListenerHandler",
+            "handlers": ["cfg://handlers.console", "cfg://handlers.file"],
+            "filters": ["sampling"],
+        },
+    },
+    "root": {"handlers": ["queue"], "level": "INFO"},
+}
@@ -0,0 +1,59 @@
+"""
+Settings de producción. Se eligen con la variable de entorno
+DJANGO_SETTINGS_MODULE=config.settings_production (docker-compose.prod.yml);
+sin ella manage.py, wsgi.py y asgi.py siguen usando config.settings.
+
+Parten de config.settings y cambian lo que solo sirve en desarrollo:
+DEBUG (con DEBUG Django guarda en memoria cada consulta SQL), la clave
+secreta, los hosts permitidos y las conexiones a PostgreSQL.
+"""
+from django.core.exceptions import ImproperlyConfigured
+import copy
+import os
+
+from config.settings import *  # noqa: F401,F403
+from config.settings import DATABASES
+
+DEBUG = False
+
+SECRET_KEY = os.environ.get("DJANGO_SECRET_KEY", "")
+if not SECRET_KEY:
+    raise ImproperlyConfigured("DJANGO_SECRET_KEY must be set with config.settings_production")
+
+ALLOWED_HOSTS = [host.strip() for host in os.environ.get("DJANGO_ALLOWED_HOSTS", "localhost").split(",") if host.strip()]
+
+if os.environ.get("CORS_ALLOWED_ORIGINS"):
+    CORS_ALLOWED_ORIGINS = [origin.strip() for origin in os.environ["CORS_ALLOWED_ORIGINS"].split(",") if origin.strip()]
+
+# ----------------------------
+# Conexiones a PostgreSQL
+# ----------------------------
+# Por defecto cada proceso tiene un pool de psycopg 3 (OPTIONS["pool"]): una
+# petición toma una conexión ya abierta y la devuelve al cerrarla, en vez de
+# abrir una nueva (~3-4 ms y un proceso de PostgreSQL cada vez). Con
+# WEATHER_DB_POOL=false (p. ej. detrás de PgBouncer) se usan conexiones
+# persistentes por hilo durante WEATHER_DB_CONN_MAX_AGE segundos. En los dos
+# casos CONN_HEALTH_CHECKS comprueba la conexión antes de reutilizarla.
+#
+# Conexiones totales = procesos (WEB_CONCURRENCY) × WEATHER_DB_POOL_MAX_SIZE:
+# deben quedar por debajo de max_connections de PostgreSQL (100 por defecto).
+WEATHER_DB_POOL = os.environ.get("WEATHER_DB_POOL", "true").lower() == "true"
+WEATHER_DB_POOL_MIN_SIZE = int(os.environ.get("WEATHER_DB_POOL_MIN_SIZE", 2))
+WEATHER_DB_POOL_MAX_SIZE = int(os.environ.get("WEATHER_DB_POOL_MAX_SIZE", 10))
+WEATHER_DB_POOL_TIMEOUT = float(os.environ.get("WEATHER_DB_POOL_TIMEOUT", 10))  # Espera máxima por una conexión libre
+WEATHER_DB_CONN_MAX_AGE = int(os.environ.get("WEATHER_DB_CONN_MAX_AGE", 600))
+
+DATABASES = copy.deepcopy(DATABASES)  # Sin tocar el de config.settings
+
+DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+if WEATHER_DB_POOL:
+    DATABASES["default"]["CONN_MAX_AGE"] = 0  # Django no admite el pool con conexiones persistentes
+    DATABASES["default"].setdefault("OPTIONS", {})["pool"] = {
+        "min_size": WEATHER_DB_POOL_MIN_SIZE,
+        "max_size": WEATHER_DB_POOL_MAX_SIZE,
+        "timeout": WEATHER_DB_POOL_TIMEOUT,
+        "max_idle": 300,  # Cierra las conexiones de sobra tras 5 minutos sin uso
+        "max_lifetime": 3600,  # Y renueva todas cada hora
+    }
+else:
+    DATABASES["default"]["CONN_MAX_AGE"] = WEATHER_DB_CONN_MAX_AGE
@@ -17,8 +17,10 @@ Including another URLconf
 
 from django.contrib import admin
 from django.urls import path, include
+from weather.views.metrics import prometheus_metrics
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("weather.urls")),
+    path("metrics", prometheus_metrics, name="metrics"),
 ]
@@ -0,0 +1,33 @@
+"""
+Configuración de gunicorn para producción (docker-compose.prod.yml):
+
+    DJANGO_SETTINGS_MODULE=config.settings_production gunicorn -c gunicorn.conf.py
+
+Por defecto, workers de uvicorn sobre config.asgi: /api/load/ es una vista
+async, así que un proceso por CPU atiende muchas peticiones que esperan a
+Open-Meteo. Con GUNICORN_WORKER_CLASS=gthread se sirve config.wsgi con
+2 × CPU + 1 procesos de GUNICORN_THREADS hilos. WEB_CONCURRENCY fija el
+número de procesos en los dos casos.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "uvicorn_worker.UvicornWorker")
+
+asgi = "uvicorn" in worker_class.lower()
+cpus = multiprocessing.cpu_count()
+wsgi_app = "config.asgi:application" if asgi else "config.wsgi:application"
+workers = int(os.environ.get("WEB_CONCURRENCY") or (cpus if asgi else 2 * cpus + 1))
+threads = int(os.environ.get("GUNICORN_THREADS") or (1 if asgi else 4))
+
+# Cada proceso crea su propio pool de conexiones la primera vez que lo usa:
+# sin preload_app el maestro nunca abre conexiones que hereden los hijos
+preload_app = False
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 120))  # Cargas síncronas largas (WEATHER_LOAD_ASYNC=false)
+graceful_timeout = 30
+keepalive = 5
+# Reinicia cada proceso tras unas miles de peticiones para acotar la memoria
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 5000))
+max_requests_jitter = max_requests // 10
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG") or None
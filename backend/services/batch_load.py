@@ -0,0 +1,162 @@
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextvars import copy_context
+from datetime import date
+from services import geocoding_cache, locations
+from services.bulk_load import COPY_CHUNK_SIZE, copy_weather_series
+from services.open_meteo import OpenMeteoService, split_date_range
+import logging
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------
+# Carga de varias ciudades a la vez
+# ----------------------------
+# 1) Geocoding: primero la caché; los fallos se consultan en paralelo
+# 2) Huecos por ciudad y ventanas de fechas
+# 3) Las ciudades que piden la misma ventana comparten petición al archive
+#    API (latitude/longitude con varias coordenadas), en paralelo
+# 4) Todo lo descargado se escribe en una sola pasada (un COPY + merge);
+#    las Location se guardan antes, con país e id de geocoding
+#
+# Solo el hilo principal usa la base de datos; los hilos hacen HTTP (con el
+# contexto de la petición, copy_context, para las métricas).
+
+
+def _validate(items):
+    """Devuelve una entrada de resultado por item; las inválidas ya llevan su error"""
+    results = []
+    seen = set()
+    for item in items:
+        result = {"city": None, "start_date": None, "end_date": None, "status": "pending"}
+        results.append(result)
+        if not isinstance(item, dict):
+            result.update(status="error", error="Each item must be an object with city, start_date and end_date")
+            continue
+
+        city = item.get("city")
+        result.update(city=city, start_date=item.get("start_date"), end_date=item.get("end_date"))
+        try:
+            start = date.fromisoformat(item.get("start_date") or "")
+            end = date.fromisoformat(item.get("end_date") or "")
+        except (TypeError, ValueError):
+            result.update(status="error", error="start_date and end_date must be YYYY-MM-DD dates")
+            continue
+
+        if not isinstance(city, str) or not city.strip():
+            result.update(status="error", error="city is required")
+        elif start > end:
+            result.update(status="error", error="start_date must be before end_date")
+        elif geocoding_cache.cache_key(city, "en") in seen:
+            result.update(status="error", error="Duplicate city in batch")
+        else:
+            seen.add(geocoding_cache.cache_key(city, "en"))
+    return results
+
+
+def _geocode(results, workers):
+    """Coordenadas de cada ciudad pendiente: caché primero y API en paralelo para el resto"""
+    coords = {}
+    missing = []
+    for i, result in enumerate(results):
+        if result["status"] != "pending":
+            continue
+        found, value = geocoding_cache.lookup(result["city"], "en")
+        if found:
+            coords[i] = value
+        else:
+            missing.append(i)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(copy_context().run, OpenMeteoService.geocode, results[i]["city"]): i for i in missing}
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                coords[i] = future.result()
+            except Exception as e:
+                results[i].update(status="error", error=f"Geocoding failed: {e}")
+                continue
+            geocoding_cache.store(results[i]["city"], "en", coords[i])
+
+    for i, value in coords.items():
+        if value is None:
+            results[i].update(status="error", error=f"City not found: {results[i]['city']}")
+    return coords
+
+
+def load_batch(items, workers=4, coords_per_request=50, window_days=None, window_retries=0,
+               chunk_size=COPY_CHUNK_SIZE):
+    """Carga varias ciudades ({city, start_date, end_date}) y devuelve un resultado por item"""
+    results = _validate(items)
+    coords = _geocode(results, workers)
+    locations.upsert_locations([
+        {**coords[i], "name": result["city"]}
+        for i, result in enumerate(results) if result["status"] == "pending"
+    ])
+
+    # Ventanas pendientes agrupadas: misma ventana -> una petición con varias coordenadas
+    groups = defaultdict(list)
+    for i, result in enumerate(results):
+        if result["status"] != "pending":
+            continue
+        gaps = OpenMeteoService.missing_date_ranges(result["city"], result["start_date"], result["end_date"])
+        requested_days = (date.fromisoformat(result["end_date"]) - date.fromisoformat(result["start_date"])).days + 1
+        gap_days = sum((date.fromisoformat(end) - date.fromisoformat(start)).days + 1 for start, end in gaps)
+        result.update(inserted=0, updated=0, skipped=(requested_days - gap_days) * 24, failed_windows=[])
+        for gap in gaps:
+            for window in split_date_range(*gap, window_days):
+                groups[window].append(i)
+
+    requests_to_send = [
+        (window, indexes[start:start + coords_per_request])
+        for window, indexes in groups.items()
+        for start in range(0, len(indexes), coords_per_request)
+    ]
+
+    payloads = defaultdict(list)  # item -> [(window, hourly)]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(
+                copy_context().run,
+                OpenMeteoService.fetch_window_multi,
+                [(coords[i]["latitude"], coords[i]["longitude"]) for i in indexes],
+                window,
+                window_retries,
+            ): (window, indexes)
+            for window, indexes in requests_to_send
+        }
+        for future in as_completed(futures):
+            window, indexes = futures[future]
+            try:
+                responses = future.result()
+            except Exception as e:
+                logger.error("Failed window %s - %s for %d cities: %s", window[0], window[1], len(indexes), e)
+                for i in indexes:
+                    results[i]["failed_windows"].append(list(window))
+                continue
+            for i, response in zip(indexes, responses):
+                payloads[i].append((window, response.get("hourly", {})))
+
+    # Una sola escritura para todas las ciudades, cada una con sus ventanas en orden
+    series = []
+    for i, windows in payloads.items():
+        windows.sort(key=lambda w: w[0])
+        hourly = {
+            key: [value for _, window_hourly in windows for value in window_hourly.get(key, [])]
+            for key in ("time", "temperature_2m", "precipitation")
+        }
+        series.append((results[i]["city"], coords[i]["latitude"], coords[i]["longitude"], hourly))
+
+    stored = copy_weather_series(series, chunk_size) if series else {}
+
+    for i, result in enumerate(results):
+        if result["status"] != "pending":
+            continue
+        for key, value in stored.get(result["city"], {}).items():
+            result[key] += value
+        result["status"] = "partial" if result["failed_windows"] else "success"
+        if not result["failed_windows"]:
+            del result["failed_windows"]
+
+    logger.info("Batch load finished for %d cities", len(results))
+    return results
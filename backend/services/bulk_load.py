@@ -0,0 +1,135 @@
+from django.db import connection, transaction
+from weather.models import WeatherRecord
+from services.rollup import update_daily_summaries
+from services import cold_tier, metrics, stats_cache
+from services.partitions import ensure_partitions
+from services.locations import upsert_locations
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+COPY_CHUNK_SIZE = 5000
+
+# ----------------------------
+# Carga masiva con COPY
+# ----------------------------
+# Los arrays `hourly` del archive API (de una o varias ciudades) se copian
+# por bloques a una tabla temporal (COPY FROM STDIN) y se fusionan con un
+# único INSERT ... ON CONFLICT, que solo reescribe las horas que cambian.
+# Las tablas particionadas no dejan leer xmax en RETURNING, así que las
+# horas que ya existían se sacan de la foto previa (CTE existing).
+# Ciudad y coordenadas van a Location (upsert_locations) y cada hora solo
+# lleva su location_id.
+
+MERGE_SQL = """
+    WITH existing AS (
+        SELECT t.location_id, t.datetime
+        FROM {table} t
+        JOIN weather_staging s ON t.location_id = s.location_id AND t.datetime = s.datetime AT TIME ZONE 'UTC'
+    ), merged AS (
+        INSERT INTO {table} (location_id, datetime, temperature, precipitation)
+        SELECT s.location_id, s.datetime AT TIME ZONE 'UTC', s.temperature, s.precipitation
+        FROM weather_staging s
+        ON CONFLICT (location_id, datetime) DO UPDATE SET
+            temperature = EXCLUDED.temperature,
+            precipitation = EXCLUDED.precipitation
+        WHERE ({table}.temperature, {table}.precipitation)
+            IS DISTINCT FROM (EXCLUDED.temperature, EXCLUDED.precipitation)
+        RETURNING location_id, datetime
+    )
+    SELECT m.location_id, count(*) FILTER (WHERE e.location_id IS NULL), count(*) FILTER (WHERE e.location_id IS NOT NULL)
+    FROM merged m
+    LEFT JOIN existing e ON e.location_id = m.location_id AND e.datetime = m.datetime
+    GROUP BY m.location_id
+"""
+
+
+def hourly_times(times):
+    """Convierte las horas ISO del archive API en un array datetime64[s] (UTC).
+
+    El archive API devuelve una rejilla horaria regular, así que se genera a
+    partir de la primera hora y solo se parsea la lista si no cuadra.
+    """
+    if not times:
+        return np.array([], dtype="datetime64[s]")
+    grid = np.datetime64(times[0], "s") + np.arange(len(times)) * np.timedelta64(3600, "s")
+    if grid[-1] == np.datetime64(times[-1], "s"):
+        return grid
+    return np.array(times, dtype="datetime64[s]")
+
+
+def copy_weather_data(city_name, latitude, longitude, hourly, chunk_size=COPY_CHUNK_SIZE):
+    """Guarda los arrays horarios de city_name y devuelve horas insertadas, actualizadas y omitidas"""
+    return copy_weather_series([(city_name, latitude, longitude, hourly)], chunk_size)[city_name]
+
+
+def copy_weather_series(series, chunk_size=COPY_CHUNK_SIZE):
+    """Guarda varias series (city, latitude, longitude, hourly) en una sola pasada
+    (un COPY y un merge) y devuelve {city: {"inserted", "updated", "skipped"}}.
+    Las coordenadas se guardan en la Location de cada ciudad.
+
+    Cada ciudad debe aparecer una sola vez y sin horas repetidas.
+    """
+    counts = {}
+    ranges = {}
+
+    # Particiones mensuales de lo que se va a escribir, antes de la carga
+    for _, _, _, hourly in series:
+        if hourly.get("time"):
+            ensure_partitions(hourly["time"][0], hourly["time"][-1])
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        location_ids = upsert_locations([
+            {"name": city_name, "latitude": latitude, "longitude": longitude}
+            for city_name, latitude, longitude, _ in series
+        ])
+        cities = {location_id: city_name for city_name, location_id in location_ids.items()}
+
+        cursor.execute(
+            "CREATE TEMP TABLE weather_staging "
+            "(location_id integer, datetime timestamp, temperature double precision, precipitation double precision) "
+            "ON COMMIT DROP"
+        )
+        with cursor.copy("COPY weather_staging (location_id, datetime, temperature, precipitation) FROM STDIN") as copy:
+            for city_name, _, _, hourly in series:
+                location_id = location_ids[city_name]
+                times = hourly_times(hourly.get("time", []))
+                temperatures = np.asarray(hourly.get("temperature_2m", []), dtype="float64")
+                precipitations = np.asarray(hourly.get("precipitation", []), dtype="float64")
+                counts[city_name] = {"inserted": 0, "updated": 0, "skipped": len(times)}
+
+                # Horas sin dato (null en el JSON) no se guardan
+                valid = ~(np.isnan(temperatures) | np.isnan(precipitations))
+                times, temperatures, precipitations = times[valid], temperatures[valid], precipitations[valid]
+                if not len(times):
+                    continue
+                ranges[city_name] = times[[0, -1]].astype("datetime64[us]").tolist()
+
+                for start in range(0, len(times), chunk_size):
+                    end = start + chunk_size
+                    rows = zip(
+                        times[start:end].astype(str),
+                        temperatures[start:end].tolist(),
+                        precipitations[start:end].tolist(),
+                    )
+                    for time_str, temperature, precipitation in rows:
+                        copy.write_row((location_id, time_str, temperature, precipitation))
+
+        metrics.add_rows(sum(city_counts["skipped"] for city_counts in counts.values()))
+        cursor.execute(MERGE_SQL.format(table=WeatherRecord._meta.db_table))
+        for location_id, inserted, updated in cursor.fetchall():
+            counts[cities[location_id]].update(inserted=inserted, updated=updated)
+        cursor.execute("DROP TABLE weather_staging")
+
+        for city_name, (first, last) in ranges.items():
+            if counts[city_name]["inserted"] or counts[city_name]["updated"]:
+                update_daily_summaries(city_name, first, last)
+
+    for city_name, city_counts in counts.items():
+        city_counts["skipped"] -= city_counts["inserted"] + city_counts["updated"]
+        # Tras el commit: las respuestas cacheadas (y los meses compactados que se han tocado) ya no valen
+        if city_counts["inserted"] or city_counts["updated"]:
+            stats_cache.invalidate(city_name)
+            cold_tier.invalidate(city_name, ranges[city_name][0])
+    return counts
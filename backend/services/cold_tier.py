@@ -0,0 +1,358 @@
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from functools import reduce
+from operator import or_
+from pathlib import Path
+from django.conf import settings
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from weather.models import DailyWeatherSummary, Location, WeatherRecord
+from weather.queries import as_date, day_start
+from services import frames, metrics
+from services.partitions import month_of, next_month
+import fcntl
+import hashlib
+import json
+import math
+import os
+import numpy as np
+import pandas as pd
+import logging
+
+try:
+    import pyarrow as pa
+except ImportError:  # Sin pyarrow no hay tier frío: todo se lee de PostgreSQL
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = "manifest.json"
+COLUMNS = ["datetime", "temperature", "precipitation"]
+FIELDS = {"location", *COLUMNS}  # Lo que records_frame puede sacar de los ficheros
+
+# ----------------------------
+# Tier frío de los datos horarios
+# ----------------------------
+# Los meses ya cerrados no cambian, así que `compact` los copia por ciudad a
+# un fichero Arrow IPC sin comprimir (<dir>/<location_id>.arrow, ordenado por
+# datetime). Se leen con memory map: solo se cargan de disco las páginas de
+# las columnas y el rango pedidos, sin decodificar nada (Parquet obligaría a
+# descomprimir y copiar). manifest.json guarda para cada ciudad hasta qué mes
+# (`end`, excluido) cubre su fichero: records_frame lee de ahí lo anterior y
+# pide a PostgreSQL solo las horas posteriores. Si una carga escribe en un
+# mes compactado, `end` de la ciudad baja a ese mes (invalidate).
+
+
+def enabled():
+    return pa is not None and bool(settings.WEATHER_COLD_TIER_DIR)
+
+
+def _directory():
+    return Path(settings.WEATHER_COLD_TIER_DIR)
+
+
+def _schema():
+    return pa.schema([
+        ("datetime", pa.timestamp("ns", tz="UTC")),
+        ("temperature", pa.float64()),
+        ("precipitation", pa.float64()),
+    ])
+
+
+def _ns(moment):
+    """Instante (datetime aware o date en UTC) como entero en nanosegundos"""
+    if not isinstance(moment, datetime):
+        moment = datetime.combine(moment, datetime.min.time(), dt_timezone.utc)
+    return int(moment.timestamp()) * 10**9
+
+
+def _utc(month):
+    return datetime.combine(month, datetime.min.time(), dt_timezone.utc)
+
+
+# ---- Manifest y ficheros ----
+
+_manifest_cache = [None, {}]  # [(mtime, tamaño), ciudades]
+_tables = {}  # ruta -> (mtime, tabla)
+
+
+def _read_manifest():
+    path = _directory() / MANIFEST
+    try:
+        return json.loads(path.read_text())["cities"]
+    except FileNotFoundError:
+        return {}
+
+
+def _write_manifest(cities):
+    path = _directory() / MANIFEST
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"version": 1, "cities": cities}, indent=2, sort_keys=True))
+    os.replace(tmp, path)
+
+
+def manifest():
+    """{ciudad: {"location_id", "file", "start", "end", "rows", "sha256"}} de lo compactado"""
+    if not enabled():
+        return {}
+    try:
+        stat = (_directory() / MANIFEST).stat()
+    except FileNotFoundError:
+        return {}
+    key = (stat.st_mtime_ns, stat.st_size)
+    if _manifest_cache[0] != key:
+        _manifest_cache[:] = [key, _read_manifest()]
+    return _manifest_cache[1]
+
+
+@contextmanager
+def _locked():
+    """Un solo proceso cambia el manifest a la vez (compactar, invalidar)"""
+    _directory().mkdir(parents=True, exist_ok=True)
+    with open(_directory() / ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _table(entry):
+    """Tabla del fichero de una ciudad sobre un memory map (se reutiliza mientras no cambie)"""
+    path = _directory() / entry["file"]
+    mtime = path.stat().st_mtime_ns
+    cached = _tables.get(path)
+    if cached is None or cached[0] != mtime:
+        # Los buffers de la tabla apuntan al mapa: no se copia nada al leer
+        table = pa.ipc.open_file(pa.memory_map(str(path))).read_all()
+        cached = _tables[path] = (mtime, table)
+    return cached[1]
+
+
+def _column(table, name):
+    """Columna como array de numpy sin copia (los ficheros no tienen nulos)"""
+    column = table.column(name)
+    array = column.chunk(0) if column.num_chunks == 1 else pa.concat_arrays(column.chunks)
+    values = array.to_numpy(zero_copy_only=True)
+    return values.view("int64") if name == "datetime" else values
+
+
+def _cold_frame(entry, fields, start=None, end=None):
+    """Horas del fichero de una ciudad entre start y end (ns, end excluido) y
+    anteriores a su `end` del manifest, con las columnas fields"""
+    table = _table(entry)
+    times = _column(table, "datetime")
+    end = min(end if end is not None else math.inf, _ns(date.fromisoformat(entry["end"])))
+    first = 0 if start is None else int(np.searchsorted(times, start, "left"))
+    last = int(np.searchsorted(times, end, "left"))
+
+    columns = {}
+    for name in fields:
+        if name == "location":
+            columns[name] = np.full(max(last - first, 0), entry["location_id"], dtype="int64")
+        elif name == "datetime":
+            columns[name] = pd.to_datetime(times[first:last], unit="ns", utc=True)
+        else:
+            columns[name] = _column(table, name)[first:last]
+    return pd.DataFrame(columns)
+
+
+# ---- Lectura ----
+
+def records_frame(qs, *fields, city=None, start_date=None, end_date=None):
+    """services.frames.records_frame de un queryset filtrado con
+    filter_records(qs, city, start_date, end_date), pero los meses que están
+    en el tier frío se leen de sus ficheros y a PostgreSQL solo se piden las
+    horas posteriores. Las filas de cada ciudad siguen en orden de datetime."""
+    cities = manifest()
+    entries = [cities[city]] if city in cities else [] if city else list(cities.values())
+    if not entries or not set(fields) <= FIELDS:
+        return frames.records_frame(qs, *fields)
+
+    start = _ns(day_start(start_date)) if start_date else None
+    end = _ns(day_start(as_date(end_date) + timedelta(days=1))) if end_date else None
+    with metrics.phase("cold"):
+        cold = [_cold_frame(entry, fields, start, end) for entry in entries]
+        metrics.add_rows(sum(len(df) for df in cold))
+
+    # Lo que no está en los ficheros: por ciudad, desde su `end`
+    by_end = {}
+    for entry in entries:
+        by_end.setdefault(entry["end"], []).append(entry["location_id"])
+    compacted = reduce(or_, (
+        Q(location_id__in=ids, datetime__lt=_utc(date.fromisoformat(end)))
+        for end, ids in by_end.items()
+    ))
+    hot = frames.records_frame(qs.exclude(compacted), *fields)
+
+    parts = [df for df in (*cold, hot) if len(df)]
+    if not parts:
+        return hot
+    return pd.concat(parts, ignore_index=True)
+
+
+# ---- Escritura ----
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_table(path, df):
+    table = pa.Table.from_pandas(df[COLUMNS], schema=_schema(), preserve_index=False).combine_chunks()
+    tmp = path.with_suffix(".tmp")
+    with pa.OSFile(str(tmp), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table, max_chunksize=len(table) or None)  # Un solo bloque: columnas contiguas
+    os.replace(tmp, path)  # Quien tenga el fichero anterior mapeado sigue leyéndolo
+
+
+def compact(city=None, before=None):
+    """Compacta en el tier frío las horas de los meses anteriores a `before`
+    (date; por defecto el mes actual) de una ciudad o de todas. Lo ya
+    compactado se conserva aunque sus particiones se hayan borrado.
+    Devuelve {ciudad: horas añadidas}."""
+    if pa is None:
+        raise RuntimeError("The cold tier requires pyarrow")
+    if not settings.WEATHER_COLD_TIER_DIR:
+        raise RuntimeError("WEATHER_COLD_TIER_DIR is not set")
+    until = month_of(before or timezone.now())
+
+    locations = Location.objects.order_by("name")
+    if city:
+        locations = locations.filter(name=city)
+
+    added = {}
+    for location in locations:
+        with _locked():
+            cities = _read_manifest()
+            entry = cities.get(location.name)
+            if entry and entry["location_id"] != location.location_id:
+                entry = None  # Ciudad borrada y vuelta a crear
+            start = date.fromisoformat(entry["end"]) if entry else None
+            if start and start >= until:
+                added[location.name] = 0
+                continue
+
+            qs = WeatherRecord.objects.filter(location=location, datetime__lt=_utc(until))
+            if start:
+                qs = qs.filter(datetime__gte=_utc(start))
+            new = frames.records_frame(qs, *COLUMNS)
+            if not len(new):
+                added[location.name] = 0
+                continue
+
+            df = pd.concat([_cold_frame(entry, COLUMNS), new], ignore_index=True) if entry else new
+            path = _directory() / f"{location.location_id}.arrow"
+            _write_table(path, df)
+
+            # Hasta el mes siguiente al último dato: lo que se cargue después de
+            # ese mes no queda tapado por el fichero
+            last = df["datetime"].iloc[-1].to_pydatetime()
+            cities[location.name] = {
+                "location_id": location.location_id,
+                "file": path.name,
+                "start": month_of(df["datetime"].iloc[0].to_pydatetime()).isoformat(),
+                "end": min(until, next_month(month_of(last))).isoformat(),
+                "rows": len(df),
+                "sha256": _sha256(path),
+            }
+            _write_manifest(cities)
+        added[location.name] = len(new)
+        logger.info("Compacted %d hours of %s into the cold tier (until %s)", len(new), location.name, cities[location.name]["end"])
+    return added
+
+
+def invalidate(city, first):
+    """Se han escrito en PostgreSQL horas de city desde `first` (datetime): si
+    caen en meses compactados, el fichero deja de cubrirlos"""
+    entry = manifest().get(city)
+    if entry is None or month_of(first) >= date.fromisoformat(entry["end"]):
+        return
+    with _locked():
+        cities = _read_manifest()
+        entry = cities.get(city)
+        if entry is None:
+            return
+        end = month_of(first)
+        if end <= date.fromisoformat(entry["start"]):
+            del cities[city]
+        else:
+            entry["end"] = min(end, date.fromisoformat(entry["end"])).isoformat()
+        _write_manifest(cities)
+    logger.warning("Cold tier of %s cut at %s: hours were written into compacted months", city, end)
+
+
+# ---- Verificación ----
+
+def _db_months(entry, city):
+    """{mes: (horas, suma de temperatura, suma de precipitación)} en PostgreSQL.
+    Los meses sin datos horarios (particiones borradas) salen del resumen diario."""
+    start, end = date.fromisoformat(entry["start"]), date.fromisoformat(entry["end"])
+    hourly = (
+        WeatherRecord.objects.filter(location_id=entry["location_id"], datetime__gte=_utc(start), datetime__lt=_utc(end))
+        .annotate(month=TruncMonth("datetime", tzinfo=dt_timezone.utc)).values("month")
+        .annotate(count=Count("record_id"), temperature=Sum("temperature"), precipitation=Sum("precipitation"))
+        .order_by()
+    )
+    months = {row["month"].date(): (row["count"], row["temperature"], row["precipitation"]) for row in hourly}
+    daily = (
+        DailyWeatherSummary.objects.filter(city=city, date__gte=start, date__lt=end)
+        .annotate(month=TruncMonth("date")).values("month")
+        .annotate(count=Sum("count"), temperature=Sum("temperature_sum"), precipitation=Sum("precipitation_sum"))
+        .order_by()
+    )
+    for row in daily:
+        months.setdefault(row["month"], (row["count"], row["temperature"], row["precipitation"]))
+    return months
+
+
+def verify(city=None):
+    """Comprueba los ficheros del tier frío: suma SHA-256 y filas del manifest,
+    horas ordenadas y sin repetir, y por mes el número de horas y las sumas
+    de temperatura y precipitación frente a PostgreSQL.
+    Devuelve {ciudad: [problemas]} (lista vacía si está bien)."""
+    cities = _read_manifest() if enabled() else {}
+    if city:
+        cities = {city: cities[city]} if city in cities else {}
+
+    problems = {}
+    for name, entry in sorted(cities.items()):
+        found = problems[name] = []
+        path = _directory() / entry["file"]
+        if not path.exists():
+            found.append(f"{entry['file']} is missing")
+            continue
+        if _sha256(path) != entry["sha256"]:
+            found.append(f"{entry['file']} checksum does not match the manifest")
+            continue
+        table = _table(entry)
+        if table.schema != _schema():
+            found.append(f"{entry['file']} has an unexpected schema")
+            continue
+        if len(table) != entry["rows"]:
+            found.append(f"{entry['file']} has {len(table)} rows, the manifest says {entry['rows']}")
+        times = _column(table, "datetime")
+        if len(times) > 1 and not (np.diff(times) > 0).all():
+            found.append(f"{entry['file']} hours are not sorted or repeated")
+
+        df = _cold_frame(entry, COLUMNS)
+        df["month"] = df["datetime"].dt.tz_convert(None).to_numpy().astype("datetime64[M]").astype("datetime64[D]").astype(object)
+        cold = df.groupby("month").agg(count=("temperature", "size"), temperature=("temperature", "sum"),
+                                       precipitation=("precipitation", "sum"))
+        database = _db_months(entry, name)
+        for month, (count, temperature, precipitation) in cold.iterrows():
+            expected = database.get(month)
+            if expected is None:
+                found.append(f"{month:%Y-%m}: not found in the database")
+            elif expected[0] != count:
+                found.append(f"{month:%Y-%m}: {count} hours in the cold tier, {expected[0]} in the database")
+            elif not all(math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-6)
+                         for a, b in zip(expected[1:], (temperature, precipitation))):
+                found.append(f"{month:%Y-%m}: values differ from the database")
+        for month in sorted(set(database) - set(cold.index)):
+            found.append(f"{month:%Y-%m}: {database[month][0]} hours in the database are missing from the cold tier")
+    return problems
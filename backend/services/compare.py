@@ -0,0 +1,172 @@
+from django.conf import settings
+from django.contrib.postgres.fields import ArrayField
+from django.db.models import Count, F, FloatField, Func, Max, Min, Sum
+from django.db.models.functions import Cast, Extract, TruncDate
+from weather.models import DailyWeatherSummary, WeatherRecord
+from weather.queries import filter_records, filter_summaries
+from services import metrics, rollup
+import math
+import numpy as np
+import pandas as pd
+import logging
+
+logger = logging.getLogger(__name__)
+
+VARIABLES = ("temperature", "precipitation")
+DAY_FIELDS = [
+    "count",
+    "temperature_sum",
+    "temperature_min",
+    "temperature_min_at",
+    "temperature_max",
+    "temperature_max_at",
+    "precipitation_sum",
+    "precipitation_max",
+]
+
+# ----------------------------
+# Comparación de varias ciudades
+# ----------------------------
+# Una consulta agrupada trae una fila por ciudad y día del resumen diario (y
+# otra, solo si hace falta, agrega en PostgreSQL los datos horarios de las
+# ciudades que el resumen no cubre, como en las vistas de estadísticas); las
+# series diarias y los totales de todas las ciudades salen de una pasada con numpy:
+# cada serie es una matriz ciudades × días alineada con `cities` y `dates`
+# (null los días sin datos de una ciudad).
+
+
+def _extreme(aggregate, field):
+    """max / min de ARRAY[valor, ±epoch]: PostgreSQL compara los arrays por
+    orden, así que da el valor extremo del grupo y, en empate, su hora más
+    antigua, sin ordenar las horas de cada día"""
+    epoch = Cast(Extract("datetime", "epoch"), FloatField())
+    pair = Func(
+        Cast(field, FloatField()), epoch * -1 if aggregate is Max else epoch,
+        template="ARRAY[%(expressions)s]", output_field=ArrayField(FloatField()),
+    )
+    return aggregate(pair)
+
+
+def _hourly_rows(records):
+    """Lo mismo que el resumen diario, agregando los datos horarios por ciudad y día"""
+    rows = list(
+        records.order_by()
+        .annotate(date=TruncDate("datetime"))
+        .values("date", city=F("location__name"))
+        .annotate(
+            count=Count("record_id"),
+            temperature_sum=Sum("temperature"),
+            temperature_max_pair=_extreme(Max, "temperature"),
+            temperature_min_pair=_extreme(Min, "temperature"),
+            precipitation_sum=Sum("precipitation"),
+            precipitation_max=Max("precipitation"),
+        )
+    )
+    df = pd.DataFrame.from_records(rows, columns=[
+        "city", "date", "count", "temperature_sum", "temperature_max_pair", "temperature_min_pair",
+        "precipitation_sum", "precipitation_max",
+    ])
+    for kind, sign in (("max", -1), ("min", 1)):
+        pairs = np.array(df.pop(f"temperature_{kind}_pair").tolist(), dtype="float64").reshape(-1, 2)
+        df[f"temperature_{kind}"] = pairs[:, 0]
+        df[f"temperature_{kind}_at"] = pd.to_datetime(sign * pairs[:, 1], unit="s", utc=True)
+    return df
+
+
+def daily_frame(cities, start_date=None, end_date=None):
+    """Una fila por ciudad y día (city, date y DAY_FIELDS) de las ciudades dadas.
+
+    Con el backend rollup cada ciudad sale del resumen diario si este tiene
+    todas sus horas (rollup.uncovered_cities); si no, de los datos horarios.
+    """
+    hourly = list(cities)
+    frames = []
+    if settings.WEATHER_STATS_BACKEND == "rollup":
+        uncovered = rollup.uncovered_cities(cities)
+        hourly = [city for city in cities if city in uncovered]
+        covered = [city for city in cities if city not in uncovered]
+        summaries = filter_summaries(DailyWeatherSummary.objects.filter(city__in=covered), None, start_date, end_date)
+        rows = list(summaries.order_by().values("city", "date", *DAY_FIELDS))
+        if rows:
+            frames.append(pd.DataFrame.from_records(rows))
+    # Sin resumen diario (u otro backend) se agrega sobre los datos horarios
+    if hourly or not frames:
+        records = WeatherRecord.objects.filter(location__name__in=hourly)
+        frames.append(_hourly_rows(filter_records(records, None, start_date, end_date)))
+    return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+
+def _rounded(values, decimals):
+    """Lista (o lista de listas) de los valores redondeados, con None en lugar de NaN"""
+    if values.ndim == 2:
+        return [_rounded(row, decimals) for row in values]
+    return [None if math.isnan(value) else round(value, decimals) for value in values.tolist()]
+
+
+@metrics.timed("aggregate")
+def compare(cities, variables=VARIABLES, start_date=None, end_date=None, decimals=2):
+    """Series diarias y estadísticas de varias ciudades, alineadas.
+
+    Devuelve {"cities": [...con datos, en el orden pedido], "missing": [...sin
+    datos], "dates": [...]} y una clave por variable con arrays en el orden de
+    cities: las mismas estadísticas que /api/temperature/ y /api/precipitation/,
+    y su serie diaria como una fila por ciudad.
+    """
+    df = daily_frame(cities, start_date, end_date)
+    present = set(df["city"])
+    found = [city for city in cities if city in present]
+    result = {"cities": found, "missing": [city for city in cities if city not in present], "dates": []}
+    if not found:
+        return result
+
+    # Orden por fecha: en empates gana el día más antiguo, como en el resto de endpoints
+    df = df.sort_values("date", kind="stable", ignore_index=True)
+    city_codes = pd.Categorical(df["city"], categories=found).codes
+    day_codes, days = pd.factorize(df["date"], sort=True)
+    result["dates"] = [str(day) for day in days]
+    counts = df["count"].to_numpy(dtype="float64")
+    hours = np.bincount(city_codes, weights=counts, minlength=len(found))
+    by_city = df.groupby(city_codes, sort=True)
+
+    def per_city(column):
+        return np.bincount(city_codes, weights=df[column].to_numpy(dtype="float64"), minlength=len(found))
+
+    def per_day(values):
+        matrix = np.full((len(found), len(days)), np.nan)
+        matrix[city_codes, day_codes] = values
+        return matrix
+
+    if "temperature" in variables:
+        daily_sum = df["temperature_sum"].to_numpy(dtype="float64")
+        max_rows = df.loc[by_city["temperature_max"].idxmax()]
+        min_rows = df.loc[by_city["temperature_min"].idxmin()]
+        result["temperature"] = {
+            "average": _rounded(per_city("temperature_sum") / hours, decimals),
+            "average_by_day": _rounded(per_day(daily_sum / counts), decimals),
+            "max": [
+                {"value": round(value, decimals), "date_time": at.isoformat()}
+                for value, at in zip(max_rows["temperature_max"].tolist(), max_rows["temperature_max_at"])
+            ],
+            "min": [
+                {"value": round(value, decimals), "date_time": at.isoformat()}
+                for value, at in zip(min_rows["temperature_min"].tolist(), min_rows["temperature_min_at"])
+            ],
+        }
+
+    if "precipitation" in variables:
+        daily_sum = df["precipitation_sum"].to_numpy(dtype="float64")
+        total = per_city("precipitation_sum")
+        max_rows = df.loc[by_city["precipitation_max"].idxmax()]
+        result["precipitation"] = {
+            "total": _rounded(total, decimals),
+            "total_by_day": _rounded(per_day(daily_sum), decimals),
+            "days_with_precipitation": np.bincount(city_codes, weights=daily_sum > 0, minlength=len(found)).astype(int).tolist(),
+            "max": [
+                {"value": round(value, decimals), "date": str(day)}
+                for value, day in zip(max_rows["precipitation_max"].tolist(), max_rows["date"])
+            ],
+            "average": _rounded(total / hours, max(decimals, 2)),
+        }
+
+    logger.info("Calculated comparison of %d cities", len(found))
+    return result
@@ -0,0 +1,140 @@
+from asgiref.sync import sync_to_async
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from django.db.models import Q
+from weather.models import Location
+import csv
+import io
+import json
+import logging
+
+try:
+    import pyarrow as pa
+except ImportError:  # Solo hace falta para format=arrow
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ["city", "datetime", "temperature", "precipitation"]
+CONTENT_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# ----------------------------
+# Exportación de los datos horarios
+# ----------------------------
+# Las filas se leen en el orden del índice único (location_id, datetime)
+# con un cursor de servidor (.iterator) y se codifican por bloques de
+# chunk_size filas: en memoria solo hay un bloque, se exporte lo que se
+# exporte. El mismo orden sirve de clave para paginar (keyset) sin OFFSET.
+
+
+def _ordered(qs):
+    return qs.order_by("location_id", "datetime").values_list("location_id", "datetime", "temperature", "precipitation")
+
+
+def _names():
+    return dict(Location.objects.values_list("location_id", "name"))
+
+
+def blocks(qs, chunk_size):
+    """Bloques de hasta chunk_size filas (city, datetime, temperature, precipitation)"""
+    names = _names()
+    rows = _ordered(qs).iterator(chunk_size=chunk_size)
+    while block := list(islice(rows, chunk_size)):
+        yield [(names[location_id], *values) for location_id, *values in block]
+
+
+async def aiter_chunks(chunks):
+    """Versión async de un generador de bloques codificados, para servirlo bajo
+    ASGI: cada bloque se produce en el hilo de sync_to_async de la petición
+    (el del cursor de servidor) y se envía antes de leer el siguiente"""
+    done = object()
+    step = sync_to_async(next)
+    try:
+        while (chunk := await step(chunks, done)) is not done:
+            yield chunk
+    finally:
+        await sync_to_async(chunks.close)()
+
+
+def _as_dict(row):
+    city, moment, temperature, precipitation = row
+    return {"city": city, "datetime": moment.isoformat(), "temperature": temperature, "precipitation": precipitation}
+
+
+def ndjson_chunks(blocks):
+    for block in blocks:
+        yield "".join(json.dumps(_as_dict(row)) + "\n" for row in block)
+
+
+def csv_chunks(blocks):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+    for block in blocks:
+        writer.writerows((city, moment.isoformat(), t, p) for city, moment, t, p in block)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()  # Solo la cabecera (sin filas)
+
+
+def arrow_chunks(blocks):
+    """Stream IPC de Arrow: un RecordBatch por bloque"""
+    schema = pa.schema([
+        ("city", pa.string()),
+        ("datetime", pa.timestamp("us", tz="UTC")),
+        ("temperature", pa.float64()),
+        ("precipitation", pa.float64()),
+    ])
+    sink = io.BytesIO()
+
+    def drain():
+        data = sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+        return data
+
+    with pa.ipc.new_stream(sink, schema) as writer:
+        for block in blocks:
+            writer.write_batch(pa.record_batch(
+                [pa.array(column, type=field.type) for column, field in zip(zip(*block), schema)],
+                schema=schema,
+            ))
+            yield drain()
+    yield drain()  # Fin del stream
+
+
+ENCODERS = {"ndjson": ndjson_chunks, "csv": csv_chunks, "arrow": arrow_chunks}
+
+
+def encode_cursor(location_id, moment):
+    """Clave de la última fila de una página: location_id y datetime en microsegundos"""
+    return f"{location_id}:{(moment - EPOCH) // timedelta(microseconds=1)}"
+
+
+def decode_cursor(value):
+    """Inverso de encode_cursor. Lanza ValueError si el cursor no es válido"""
+    location_id, micros = value.split(":")
+    return int(location_id), EPOCH + timedelta(microseconds=int(micros))
+
+
+def page(qs, after=None, limit=1000):
+    """Una página de filas (dicts) tras el cursor `after` y el cursor de la
+    siguiente (None si no hay más)"""
+    if after:
+        location_id, moment = decode_cursor(after)
+        qs = qs.filter(Q(location_id__gt=location_id) | Q(location_id=location_id, datetime__gt=moment))
+    rows = list(_ordered(qs)[:limit + 1])
+    more = len(rows) > limit
+    rows = rows[:limit]
+
+    names = _names()
+    results = [_as_dict((names[location_id], *values)) for location_id, *values in rows]
+    next_cursor = encode_cursor(rows[-1][0], rows[-1][1]) if more else None
+    return results, next_cursor
@@ -0,0 +1,156 @@
+from collections import Counter, OrderedDict
+from django.conf import settings
+from django.utils import timezone
+from weather.models import GeocodedCity
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------
+# Caché de geocoding en dos niveles
+# ----------------------------
+# 1) LRU en memoria del proceso con TTL por entrada
+# 2) Tabla GeocodedCity, compartida entre procesos y reinicios
+# Las ciudades no encontradas también se guardan, con un TTL más corto.
+
+NOT_FOUND = None
+
+
+class TTLCache:
+    """LRU acotada a maxsize entradas; cada entrada caduca a los `ttl` segundos"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Devuelve (True, valor) si la clave está vigente, (False, None) si no"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return False, None
+            value, expires = entry
+            if expires <= time.monotonic():
+                del self._data[key]
+                return False, None
+            self._data.move_to_end(key)
+            return True, value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_memory = TTLCache(settings.GEOCODING_CACHE_SIZE)
+_counters = Counter()
+_counters_lock = threading.Lock()
+
+
+def _count(name):
+    with _counters_lock:
+        _counters[name] += 1
+
+
+def stats():
+    """Contadores de aciertos y fallos desde el arranque del proceso"""
+    with _counters_lock:
+        counters = {name: _counters[name] for name in ("memory_hits", "db_hits", "negative_hits", "misses")}
+    lookups = sum(counters[name] for name in ("memory_hits", "db_hits", "misses"))
+    counters["hit_ratio"] = round(1 - counters["misses"] / lookups, 4) if lookups else None
+    return counters
+
+
+def clear():
+    """Vacía la caché en memoria y los contadores (la tabla se conserva)"""
+    _memory.clear()
+    with _counters_lock:
+        _counters.clear()
+
+
+def cache_key(city_name, language):
+    """Nombre normalizado (minúsculas, espacios colapsados) + idioma"""
+    return f"{' '.join(city_name.casefold().split())}|{language}"
+
+
+def _ttl(value):
+    return settings.GEOCODING_CACHE_TTL if value is not NOT_FOUND else settings.GEOCODING_NEGATIVE_TTL
+
+
+def _from_row(row):
+    if not row.found:
+        return NOT_FOUND
+    return {
+        "name": row.name,
+        "latitude": row.latitude,
+        "longitude": row.longitude,
+        "country": row.country,
+        "geocoding_id": row.geocoding_id,
+    }
+
+
+def lookup(city_name, language):
+    """Busca en memoria y después en la tabla. Devuelve (True, valor) si hay
+    entrada vigente (valor None = ciudad no encontrada) o (False, None)."""
+    key = cache_key(city_name, language)
+
+    found, value = _memory.get(key)
+    if found:
+        _count("memory_hits")
+        if value is NOT_FOUND:
+            _count("negative_hits")
+        return True, value
+
+    row = GeocodedCity.objects.filter(key=key).first()
+    if row is not None:
+        value = _from_row(row)
+        age = (timezone.now() - row.fetched_at).total_seconds()
+        if age < _ttl(value):
+            _count("db_hits")
+            if value is NOT_FOUND:
+                _count("negative_hits")
+            _memory.set(key, value, _ttl(value) - age)
+            return True, value
+
+    _count("misses")
+    return False, None
+
+
+def store(city_name, language, value):
+    """Guarda un resultado del geocoding API (None = no encontrada) en ambos niveles"""
+    key = cache_key(city_name, language)
+    GeocodedCity.objects.update_or_create(
+        key=key,
+        defaults={
+            "found": value is not NOT_FOUND,
+            "name": value["name"] if value else "",
+            "latitude": value["latitude"] if value else None,
+            "longitude": value["longitude"] if value else None,
+            "country": value.get("country") if value else None,
+            "geocoding_id": value.get("geocoding_id") if value else None,
+            "fetched_at": timezone.now(),
+        },
+    )
+    _memory.set(key, value, _ttl(value))
+
+
+def cached_geocode(city_name, language, fetch):
+    """Resultado de geocoding para city_name (None si no existe).
+
+    `fetch(city_name, language)` solo se llama si ningún nivel tiene una
+    entrada vigente; su resultado se guarda en ambos niveles.
+    """
+    found, value = lookup(city_name, language)
+    if not found:
+        value = fetch(city_name, language)
+        store(city_name, language, value)
+    return value
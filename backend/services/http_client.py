@@ -0,0 +1,257 @@
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlsplit
+from urllib3.exceptions import InvalidHeader, MaxRetryError, ReadTimeoutError, ResponseError
+from urllib3.util.retry import Retry
+from services import metrics
+from contextlib import asynccontextmanager
+import asyncio
+import contextvars
+import httpx
+import requests
+import threading
+import time
+import weakref
+import logging
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------
+# Cliente HTTP compartido para Open-Meteo
+# ----------------------------
+# Una sola requests.Session por proceso (pool de conexiones con keep-alive),
+# timeouts de conexión/lectura, reintentos con backoff exponencial en 429/5xx
+# (respetando Retry-After hasta OPEN_METEO_BACKOFF_MAX; si pide esperar más
+# se devuelve el error sin esperar) y un circuit breaker por host.
+#
+# Para el código async (vistas ASGI) `aget` hace lo mismo con httpx. El
+# AsyncClient dura lo que el bloque `async with async_client()` (una carga o
+# una petición): fuera de ASGI cada petición async tiene su propio event loop,
+# y un cliente que sobreviviera a su loop dejaría su pool de conexiones sin
+# cerrar. Un semáforo por loop limita las peticiones simultáneas del proceso.
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_lock = threading.Lock()
+_session = None
+_breakers = {}
+_async_client = contextvars.ContextVar("open_meteo_async_client", default=None)
+_async_slots = weakref.WeakKeyDictionary()  # event loop -> asyncio.Semaphore
+
+
+class CircuitOpenError(requests.RequestException):
+    """El upstream ha fallado demasiadas veces seguidas; no se le envían peticiones"""
+
+
+class CircuitBreaker:
+    """Circuit breaker simple: closed -> open tras `failure_threshold` fallos seguidos,
+    half-open pasados `reset_timeout` segundos (se deja pasar una petición de prueba)."""
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def before_request(self):
+        with self._lock:
+            state = self.state
+            if state == "open":
+                raise CircuitOpenError("Open-Meteo circuit is open, request not sent")
+            if state == "half-open":
+                # Solo una petición de prueba; el resto espera otro periodo
+                self.opened_at = time.monotonic()
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    logger.warning("Circuit opened after %d consecutive failures", self.failures)
+                self.opened_at = time.monotonic()
+
+
+class CappedRetry(Retry):
+    """Retry que no duerme un Retry-After mayor que backoff_max: deja de
+    reintentar y devuelve la respuesta de error"""
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and self.respect_retry_after_header:
+            try:
+                too_long = self.parse_retry_after(retry_after) > self.backoff_max
+            except InvalidHeader:
+                too_long = False
+            if too_long:
+                logger.warning("Retry-After %s exceeds %ss, not retrying %s", retry_after, self.backoff_max, url)
+                raise MaxRetryError(_pool, url, ResponseError(f"Retry-After {retry_after} too long"))
+        return super().increment(method, url, response, error, _pool, _stacktrace)
+
+
+def get_session():
+    """Devuelve la requests.Session compartida (se crea en el primer uso)"""
+    global _session
+    with _lock:
+        if _session is None:
+            retry = CappedRetry(
+                total=settings.OPEN_METEO_RETRIES,
+                backoff_factor=settings.OPEN_METEO_BACKOFF_FACTOR,
+                backoff_max=settings.OPEN_METEO_BACKOFF_MAX,
+                status_forcelist=RETRY_STATUSES,
+                allowed_methods=["GET"],
+                respect_retry_after_header=True,
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(
+                pool_connections=2,  # geocoding + archive
+                pool_maxsize=settings.OPEN_METEO_POOL_SIZE,
+                max_retries=retry,
+            )
+            _session = requests.Session()
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+def get_breaker(url):
+    """Circuit breaker del host de url"""
+    host = urlsplit(url).netloc
+    with _lock:
+        if host not in _breakers:
+            _breakers[host] = CircuitBreaker(
+                settings.OPEN_METEO_BREAKER_THRESHOLD,
+                settings.OPEN_METEO_BREAKER_RESET,
+            )
+        return _breakers[host]
+
+
+@asynccontextmanager
+async def async_client():
+    """httpx.AsyncClient para las llamadas a aget() dentro del bloque, que
+    comparten sus conexiones; se cierra al salir. Anidado, reutiliza el de fuera."""
+    client = _async_client.get()
+    if client is not None:
+        yield client
+        return
+    async with httpx.AsyncClient(
+        timeout=httpx.Timeout(settings.OPEN_METEO_READ_TIMEOUT, connect=settings.OPEN_METEO_CONNECT_TIMEOUT),
+        limits=httpx.Limits(max_connections=settings.OPEN_METEO_ASYNC_MAX_CONNECTIONS),
+    ) as client:
+        token = _async_client.set(client)
+        try:
+            yield client
+        finally:
+            _async_client.reset(token)
+
+
+def _connection_slots():
+    """Semáforo del event loop en curso: OPEN_METEO_ASYNC_MAX_CONNECTIONS peticiones a la vez"""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        slots = _async_slots.get(loop)
+        if slots is None:
+            slots = _async_slots[loop] = asyncio.Semaphore(settings.OPEN_METEO_ASYNC_MAX_CONNECTIONS)
+        return slots
+
+
+def reset():
+    """Cierra la sesión y olvida el estado de los breakers (p. ej. al cambiar settings en tests)"""
+    global _session
+    with _lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+        _breakers.clear()
+        _async_slots.clear()
+
+
+def get(url, params=None):
+    """GET con pool, timeouts, reintentos y circuit breaker; lanza HTTPError si el estado final es de error"""
+    breaker = get_breaker(url)
+    breaker.before_request()
+
+    started = time.perf_counter()
+    try:
+        response = get_session().get(
+            url,
+            params=params,
+            timeout=(settings.OPEN_METEO_CONNECT_TIMEOUT, settings.OPEN_METEO_READ_TIMEOUT),
+        )
+    except requests.RequestException as exc:
+        metrics.observe_upstream(url, "error", time.perf_counter() - started)
+        breaker.record_failure()
+        # Con Retry configurado, requests convierte los read timeouts agotados en ConnectionError
+        reason = getattr(exc.args[0], "reason", None) if exc.args else None
+        if isinstance(reason, ReadTimeoutError):
+            raise requests.ReadTimeout(exc, request=exc.request) from exc
+        raise
+
+    metrics.observe_upstream(url, response.status_code, time.perf_counter() - started)
+    if response.status_code in RETRY_STATUSES:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+    response.raise_for_status()
+    return response
+
+
+def _retry_delay(response, attempt):
+    """Espera antes del reintento `attempt` (0, 1...): Retry-After si lo hay, si no backoff
+    exponencial, como mucho OPEN_METEO_BACKOFF_MAX. None si Retry-After pide esperar más."""
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after and retry_after.isdigit():
+        if float(retry_after) > settings.OPEN_METEO_BACKOFF_MAX:
+            logger.warning("Retry-After %s exceeds %ss, not retrying %s", retry_after, settings.OPEN_METEO_BACKOFF_MAX, response.url)
+            return None
+        return float(retry_after)
+    return min(settings.OPEN_METEO_BACKOFF_FACTOR * 2 ** attempt, settings.OPEN_METEO_BACKOFF_MAX)
+
+
+async def aget(url, params=None):
+    """Versión async de get(): mismos reintentos en 429/5xx y errores de red,
+    Retry-After y circuit breaker. Lanza httpx.HTTPError si falla."""
+    breaker = get_breaker(url)
+    breaker.before_request()
+
+    started = time.perf_counter()
+    async with async_client() as client:
+        for attempt in range(settings.OPEN_METEO_RETRIES + 1):
+            last_attempt = attempt == settings.OPEN_METEO_RETRIES
+            try:
+                async with _connection_slots():
+                    response = await client.get(url, params=params)
+            except httpx.TransportError:
+                if not last_attempt:
+                    await asyncio.sleep(_retry_delay(None, attempt))
+                    continue
+                metrics.observe_upstream(url, "error", time.perf_counter() - started)
+                breaker.record_failure()
+                raise
+            if response.status_code not in RETRY_STATUSES or last_attempt:
+                break
+            delay = _retry_delay(response, attempt)
+            if delay is None:
+                break
+            await asyncio.sleep(delay)
+
+    metrics.observe_upstream(url, response.status_code, time.perf_counter() - started)
+    if response.status_code in RETRY_STATUSES:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+    response.raise_for_status()
+    return response
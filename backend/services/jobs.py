@@ -0,0 +1,188 @@
+from contextlib import contextmanager
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from weather.models import LoadJob
+from services.http_client import RETRY_STATUSES
+from services.open_meteo import OpenMeteoService, PartialLoadError
+import requests
+import threading
+import time
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------
+# Cola de cargas en base de datos
+# ----------------------------
+# /api/load/ solo encola un LoadJob; los procesos de `run_ingest_worker`
+# los reclaman con SELECT ... FOR UPDATE SKIP LOCKED, así que varios
+# workers pueden consumir la misma tabla sin pisarse.
+#
+# Mientras se ejecuta, el worker renueva updated_at cada
+# WEATHER_JOB_HEARTBEAT segundos; un trabajo running sin renovar en
+# WEATHER_JOB_STALE_AFTER se da por abandonado y se vuelve a reclamar. Cada
+# reclamación lleva un token (lease) nuevo y las actualizaciones solo se
+# aplican con el token vigente: si un worker lento pierde su trabajo, su
+# resultado se descarta.
+#
+# Solo se reintentan los fallos que pueden pasar solos (red, 5xx / 429 de
+# Open-Meteo, ventanas sin cargar); una ciudad inexistente o un 4xx fallan
+# en el primer intento.
+
+
+def job_key(city, start_date, end_date):
+    """Clave de deduplicación: ciudad normalizada + rango"""
+    return f"{' '.join(city.casefold().split())}|{start_date}|{end_date}"
+
+
+def submit_load_job(city, start_date, end_date):
+    """Encola una carga. Si ya hay una idéntica en cola o en curso devuelve esa.
+    Devuelve (job, creado)."""
+    key = job_key(city, start_date, end_date)
+    existing = LoadJob.objects.filter(dedup_key=key, state__in=LoadJob.IN_FLIGHT).first()
+    if existing:
+        return existing, False
+
+    try:
+        with transaction.atomic():
+            job = LoadJob.objects.create(city=city, start_date=start_date, end_date=end_date, dedup_key=key)
+    except IntegrityError:
+        # Otra petición la ha encolado a la vez
+        return LoadJob.objects.get(dedup_key=key, state__in=LoadJob.IN_FLIGHT), False
+
+    logger.info("Queued load job %s for %s (%s - %s)", job.job_id, city, start_date, end_date)
+    return job, True
+
+
+def claim_next_job():
+    """Marca como running el siguiente trabajo disponible y lo devuelve (o None).
+
+    También se reclaman los running sin actividad desde hace
+    WEATHER_JOB_STALE_AFTER segundos (su worker ha muerto).
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.WEATHER_JOB_STALE_AFTER)
+    with transaction.atomic():
+        job = (
+            LoadJob.objects.select_for_update(skip_locked=True)
+            .filter(Q(state=LoadJob.QUEUED, run_after__lte=now) | Q(state=LoadJob.RUNNING, updated_at__lt=stale))
+            .order_by("created_at")
+            .first()
+        )
+        if job is None:
+            return None
+        job.state = LoadJob.RUNNING
+        job.attempts += 1
+        job.lease = uuid.uuid4()
+        job.started_at = now
+        job.save()
+    return job
+
+
+def _update(job, **fields):
+    """Actualiza el trabajo si sigue siendo de este worker; devuelve False si lo ha reclamado otro"""
+    return LoadJob.objects.filter(pk=job.pk, state=LoadJob.RUNNING, lease=job.lease).update(
+        updated_at=timezone.now(), **fields
+    ) == 1
+
+
+@contextmanager
+def _heartbeat(job):
+    """Renueva updated_at del trabajo en un hilo mientras dura el bloque"""
+    stop = threading.Event()
+
+    def beat():
+        try:
+            while not stop.wait(settings.WEATHER_JOB_HEARTBEAT):
+                if not _update(job):
+                    logger.warning("Load job %s was reclaimed by another worker", job.job_id)
+                    return
+        except Exception:
+            logger.exception("Heartbeat of load job %s failed", job.job_id)
+        finally:
+            connection.close()  # Conexión propia del hilo
+
+    thread = threading.Thread(target=beat, name=f"load-job-{job.job_id}-heartbeat", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def _retryable(exc):
+    """True si el error de una carga puede no repetirse en otro intento"""
+    if isinstance(exc, PartialLoadError):
+        return True
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        return exc.response.status_code in RETRY_STATUSES
+    # Conexión, timeouts y circuit breaker abierto
+    return isinstance(exc, requests.RequestException)
+
+
+def run_job(job):
+    """Ejecuta un trabajo ya reclamado y deja su estado final (o lo reencola si quedan intentos)"""
+    logger.info("Running load job %s (attempt %s)", job.job_id, job.attempts)
+
+    def on_progress(done, total):
+        _update(job, progress=int(100 * done / total))
+
+    try:
+        with _heartbeat(job):
+            counts = OpenMeteoService.load_weather(
+                job.city,
+                job.start_date.isoformat(),
+                job.end_date.isoformat(),
+                window_days=settings.WEATHER_FETCH_WINDOW_DAYS,
+                chunk_size=settings.WEATHER_COPY_CHUNK_SIZE,
+                workers=settings.WEATHER_FETCH_WORKERS,
+                window_retries=settings.WEATHER_FETCH_WINDOW_RETRIES,
+                on_progress=on_progress,
+            )
+    except Exception as e:
+        logger.error("Load job %s failed: %s", job.job_id, e)
+        result = e.counts if isinstance(e, PartialLoadError) else None
+        if _retryable(e) and job.attempts < settings.WEATHER_JOB_MAX_ATTEMPTS:
+            # Lo ya guardado se conserva: el reintento solo pide lo que falta
+            delay = settings.WEATHER_JOB_RETRY_DELAY * 2 ** (job.attempts - 1)
+            _update(job, state=LoadJob.QUEUED, error=str(e), result=result,
+                    run_after=timezone.now() + timedelta(seconds=delay))
+        else:
+            _update(job, state=LoadJob.FAILED, error=str(e), result=result, finished_at=timezone.now())
+        return False
+
+    if not _update(job, state=LoadJob.SUCCEEDED, progress=100, error="", result=counts, finished_at=timezone.now()):
+        logger.warning("Load job %s was reclaimed by another worker, result discarded", job.job_id)
+        return False
+    logger.info("Load job %s finished: %s", job.job_id, counts)
+    return True
+
+
+def run_pending_jobs():
+    """Procesa trabajos hasta que no quede ninguno disponible; devuelve cuántos"""
+    processed = 0
+    while (job := claim_next_job()) is not None:
+        run_job(job)
+        processed += 1
+    return processed
+
+
+def run_worker(poll_interval, stop_event=None):
+    """Bucle de un worker: reclama y ejecuta trabajos, esperando poll_interval si no hay"""
+    while stop_event is None or not stop_event.is_set():
+        try:
+            job = claim_next_job()
+            if job is None:
+                time.sleep(poll_interval)
+                continue
+            run_job(job)
+        except Exception:
+            # Un error de base de datos no debe parar el worker: se descarta la conexión y se reintenta
+            logger.exception("Ingest worker iteration failed, retrying in %ss", poll_interval)
+            close_old_connections()
+            time.sleep(poll_interval)
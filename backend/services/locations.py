@@ -0,0 +1,53 @@
+from weather.models import Location
+import logging
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------
+# Dimensión de ciudades
+# ----------------------------
+# Cada ciudad (el nombre con el que se pide en ?city= y /api/load/) es una
+# fila de Location con sus coordenadas y, si se conocen, país e id del
+# geocoding API. Las horas de WeatherRecord solo guardan su location_id.
+
+GEOCODING_FIELDS = ["country", "geocoding_id"]
+
+
+def upsert_locations(locations):
+    """Crea o actualiza Location a partir de dicts {name, latitude, longitude[, country, geocoding_id]}.
+
+    Las coordenadas se actualizan siempre; país e id de geocoding solo si el
+    dict los trae. Devuelve {name: location_id}.
+    """
+    with_geocoding = [loc for loc in locations if "geocoding_id" in loc]
+    coordinates_only = [loc for loc in locations if "geocoding_id" not in loc]
+    ids = {}
+
+    for group, update_fields in (
+        (with_geocoding, ["latitude", "longitude", *GEOCODING_FIELDS]),
+        (coordinates_only, ["latitude", "longitude"]),
+    ):
+        if not group:
+            continue
+        created = Location.objects.bulk_create(
+            [
+                Location(
+                    name=loc["name"],
+                    latitude=loc["latitude"],
+                    longitude=loc["longitude"],
+                    country=loc.get("country") or "",
+                    geocoding_id=loc.get("geocoding_id"),
+                )
+                for loc in group
+            ],
+            update_conflicts=True,
+            unique_fields=["name"],
+            update_fields=update_fields,
+        )
+        ids.update({location.name: location.location_id for location in created})
+    return ids
+
+
+def save_geocoded(city_name, coords):
+    """Guarda la Location de city_name con lo que devuelve el geocoding API; devuelve su id"""
+    return upsert_locations([{**coords, "name": city_name}])[city_name]
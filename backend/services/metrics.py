@@ -0,0 +1,246 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from functools import wraps
+from urllib.parse import urlsplit
+import bisect
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------
+# Métricas de rendimiento
+# ----------------------------
+# Histogramas en memoria del proceso, expuestos en /metrics con el formato
+# de texto de Prometheus, y tiempos por fase de cada petición, que el
+# middleware (weather.middleware.MetricsMiddleware) devuelve en la cabecera
+# Server-Timing. Las fases se miden con `phase(nombre)` en vistas y
+# servicios; fuera de una petición (o con WEATHER_METRICS_ENABLED = False,
+# que no instala el middleware) solo cuestan leer una ContextVar vacía.
+
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+ROW_BUCKETS = (10, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value):
+    return repr(float(value)) if value != float("inf") else "+Inf"
+
+
+class Histogram:
+    """Histograma con etiquetas (acumulado como los de Prometheus), seguro entre hilos"""
+
+    def __init__(self, name, documentation, labels, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # valores de etiquetas -> [cuentas por bucket, suma, total]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[label]) for label in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = [(key, list(counts), total, count) for key, (counts, total, count) in sorted(self._series.items())]
+        for key, counts, total, count in series:
+            labels = [f'{label}="{_escape(value)}"' for label, value in zip(self.labels, key)]
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, float("inf")), counts):
+                cumulative += bucket_count
+                bucket_labels = ",".join([*labels, f'le="{_number(bound)}"'])
+                lines.append(f"{self.name}_bucket{{{bucket_labels}}} {cumulative}")
+            suffix = f"{{{','.join(labels)}}}" if labels else ""
+            lines.append(f"{self.name}_sum{suffix} {_number(total)}")
+            lines.append(f"{self.name}_count{suffix} {count}")
+        return "\n".join(lines)
+
+
+REQUEST_SECONDS = Histogram(
+    "weather_http_request_duration_seconds", "Time to build the response of each request",
+    ["endpoint", "method", "status"], DURATION_BUCKETS,
+)
+PHASE_SECONDS = Histogram(
+    "weather_request_phase_seconds", "Time per request spent in each phase (db, frame, aggregate, encode, upstream...)",
+    ["endpoint", "phase"], DURATION_BUCKETS,
+)
+DB_QUERIES = Histogram(
+    "weather_db_queries_per_request", "Database queries run by each request",
+    ["endpoint"], QUERY_BUCKETS,
+)
+ROWS = Histogram(
+    "weather_rows_processed", "Hourly rows read or written by each request",
+    ["endpoint"], ROW_BUCKETS,
+)
+UPSTREAM_SECONDS = Histogram(
+    "weather_upstream_request_duration_seconds", "Latency of the requests sent to Open-Meteo",
+    ["host", "path", "status"], DURATION_BUCKETS,
+)
+HISTOGRAMS = [REQUEST_SECONDS, PHASE_SECONDS, DB_QUERIES, ROWS, UPSTREAM_SECONDS]
+
+
+class RequestMetrics:
+    """Lo medido durante una petición. Los hilos de descarga también escriben aquí"""
+
+    def __init__(self):
+        self.phases = {}
+        self.db_queries = 0
+        self.rows = 0
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds):
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def add_query(self, seconds):
+        with self._lock:
+            self.db_queries += 1
+            self.phases["db"] = self.phases.get("db", 0.0) + seconds
+
+    def add_rows(self, rows):
+        with self._lock:
+            self.rows += rows
+
+    def server_timing(self, total):
+        entries = []
+        for name, seconds in self.phases.items():
+            entry = f"{name};dur={seconds * 1000:.1f}"
+            if name == "db":
+                entry += f';desc="{self.db_queries} queries"'
+            entries.append(entry)
+        if self.rows:
+            entries.append(f'rows;desc="{self.rows}"')
+        entries.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(entries)
+
+
+_current = ContextVar("weather_request_metrics", default=None)
+
+
+def start_request():
+    current = RequestMetrics()
+    return current, _current.set(current)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def record_request(current, endpoint, method, status, seconds):
+    """Vuelca lo medido en una petición a los histogramas"""
+    REQUEST_SECONDS.observe(seconds, endpoint=endpoint, method=method, status=status)
+    for name, phase_seconds in current.phases.items():
+        PHASE_SECONDS.observe(phase_seconds, endpoint=endpoint, phase=name)
+    DB_QUERIES.observe(current.db_queries, endpoint=endpoint)
+    if current.rows:
+        ROWS.observe(current.rows, endpoint=endpoint)
+
+
+@contextmanager
+def phase(name):
+    """Suma la duración del bloque a la fase `name` de la petición en curso"""
+    current = _current.get()
+    if current is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        current.add(name, time.perf_counter() - started)
+
+
+@contextmanager
+def db_query():
+    """Cuenta el bloque como una consulta (p. ej. un COPY, que no pasa por execute)"""
+    current = _current.get()
+    if current is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        current.add_query(time.perf_counter() - started)
+
+
+def execute_wrapper(execute, sql, params, many, context):
+    """Envoltorio de todas las consultas (weather.apps lo instala en cada
+    conexión): cuenta y cronometra las de la petición en curso. Las conexiones
+    son por hilo y las vistas async consultan desde otro hilo, por eso no se
+    instala por petición."""
+    current = _current.get()
+    if current is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        current.add_query(time.perf_counter() - started)
+
+
+def install_execute_wrapper(sender, connection, **kwargs):
+    """Receptor de connection_created"""
+    if execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(execute_wrapper)
+
+
+def timed(name):
+    """Decorador: la función entera cuenta como la fase `name`"""
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with phase(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def add_rows(rows):
+    current = _current.get()
+    if current is not None:
+        current.add_rows(rows)
+
+
+def observe_upstream(url, status, seconds):
+    """Latencia de una petición a Open-Meteo (status = código HTTP o "error")"""
+    if not settings.WEATHER_METRICS_ENABLED:
+        return
+    parts = urlsplit(url)
+    UPSTREAM_SECONDS.observe(seconds, host=parts.netloc, path=parts.path, status=status)
+    current = _current.get()
+    if current is not None:
+        current.add("upstream", seconds)
+
+
+def render():
+    """Todos los histogramas en formato de texto de Prometheus"""
+    return "\n".join(histogram.render() for histogram in HISTOGRAMS) + "\n"
+
+
+def clear():
+    for histogram in HISTOGRAMS:
+        histogram.clear()
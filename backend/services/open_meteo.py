@@ -1,100 +1,369 @@
-from datetime import datetime
-from django.utils import timezone
-from weather.models import WeatherRecord
+from asgiref.sync import sync_to_async
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from datetime import date, timedelta
+from itertools import islice
+from django.conf import settings
+from django.db import connection
+from weather.models import DailyWeatherSummary
+from services.bulk_load import COPY_CHUNK_SIZE, copy_weather_data
+from services import geocoding_cache, http_client, locations
+import asyncio
+import httpx
 import requests
 import logging
-import os
 
-# Logs 
-LOG_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'logs')
-os.makedirs(LOG_DIR, exist_ok=True)
+logger = logging.getLogger(__name__)
 
-# Nombre del archivo Log con fecha actual
-today_str = timezone.now().strftime("%d-%m-%Y")
-log_file = os.path.join(LOG_DIR, f"weather{today_str}.log")
 
-# Logger 
-logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)  # INFO, WARNING, ERROR
+def _geocoding_params(city_name, language):
+    return {"name": city_name, "count": 1, "language": language, "format": "json"}
+
+
+def _geocoding_result(data):
+    """Primer resultado del geocoding API, o None si la ciudad no existe"""
+    if "results" not in data or len(data["results"]) == 0:
+        return None
+
+    city_data = data["results"][0]
+    logger.info("Coordinates found for %s: %s, %s", city_data["name"], city_data["latitude"], city_data["longitude"])
+    return {
+        "name": city_data["name"],
+        "latitude": city_data["latitude"],
+        "longitude": city_data["longitude"],
+        "country": city_data.get("country"),
+        "geocoding_id": city_data.get("id"),
+    }
 
-# Handler al archivo
-handler = logging.FileHandler(log_file, encoding='utf-8')
-formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-handler.setFormatter(formatter)
-logger.addHandler(handler)
 
+def _archive_params(latitude, longitude, start_date, end_date):
+    return {
+        "latitude": latitude,
+        "longitude": longitude,
+        "start_date": start_date,
+        "end_date": end_date,
+        "hourly": "temperature_2m,precipitation",
+        "timezone": "UTC"
+    }
+
+
+def _in_db(func):
+    """sync_to_async para el código async. Al terminar se cierra la conexión
+    (fuera de transacción): una carga que espera a Open-Meteo no ocupa una
+    conexión de PostgreSQL, y puede haber cientos en vuelo."""
+    def run(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            if not connection.in_atomic_block:
+                connection.close()
+
+    return sync_to_async(run)
 
-GEOCODING_URL = "https://geocoding-api.open-meteo.com/v1/search"
-ARCHIVE_URL = "https://archive-api.open-meteo.com/v1/archive"
 
 class OpenMeteoService:
     @staticmethod
-    def get_city_coordinates(city_name: str):
-        logger.info(f"Searching coordinates for city: {city_name}")
-        params = {
-            "name": city_name,
-            "count": 1,
-            "language": "en",
-            "format": "json"
-        }
-
-        response = requests.get(GEOCODING_URL, params=params)
-        response.raise_for_status()
-        data = response.json()
+    def get_city_coordinates(city_name: str, language="en"):
+        logger.info("Searching coordinates for city: %s", city_name)
+        city_data = geocoding_cache.cached_geocode(city_name, language, OpenMeteoService.geocode)
 
-        if "results" not in data or len(data["results"]) == 0:
-            logger.error(f"City not found: {city_name}")
+        if city_data is None:
+            logger.error("City not found: %s", city_name)
             raise ValueError(f"City not found: {city_name}")
 
-        city_data = data["results"][0]
-        logger.info(f"Coordinates found: {city_data}")
-        return {
-            "name": city_data["name"],
-            "latitude": city_data["latitude"],
-            "longitude": city_data["longitude"],
-            "country": city_data.get("country")
-        }
+        return dict(city_data)
+
+    @staticmethod
+    def geocode(city_name, language="en"):
+        """Consulta el geocoding API sin caché; devuelve None si la ciudad no existe"""
+        response = http_client.get(settings.OPEN_METEO_GEOCODING_URL, params=_geocoding_params(city_name, language))
+        return _geocoding_result(response.json())
 
     @staticmethod
     def fetch_weather_data(latitude, longitude, start_date, end_date):
-        logger.info(f"Fetching weather data for lat={latitude}, lon={longitude}, from {start_date} to {end_date}")
+        logger.info("Fetching weather data for lat=%s, lon=%s, from %s to %s", latitude, longitude, start_date, end_date)
+        params = _archive_params(latitude, longitude, start_date, end_date)
+        response = http_client.get(settings.OPEN_METEO_ARCHIVE_URL, params=params)
+        data = response.json()
+        logger.info("Weather data received: %d records", len(data.get("hourly", {}).get("time", [])))
+        return data
+
+    @staticmethod
+    def store_weather_data(city_name, latitude, longitude, weather_json, chunk_size=COPY_CHUNK_SIZE):
+        logger.info("Storing weather data for %s", city_name)
+        counts = copy_weather_data(city_name, latitude, longitude, weather_json.get("hourly", {}), chunk_size)
+        logger.info(
+            "Stored weather data for %s: %d inserted, %d updated, %d skipped",
+            city_name, counts["inserted"], counts["updated"], counts["skipped"],
+        )
+        return counts
+
+    @staticmethod
+    def missing_date_ranges(city_name, start_date, end_date):
+        """Devuelve los sub-rangos [(inicio, fin)] de fechas ISO sin las 24 horas guardadas"""
+        start = date.fromisoformat(start_date)
+        end = date.fromisoformat(end_date)
+        covered = set(
+            DailyWeatherSummary.objects.filter(
+                city=city_name, date__gte=start, date__lte=end, count__gte=24
+            ).values_list("date", flat=True)
+        )
+
+        gaps = []
+        day = start
+        while day <= end:
+            if day not in covered:
+                if gaps and gaps[-1][1] == day - timedelta(days=1):
+                    gaps[-1][1] = day
+                else:
+                    gaps.append([day, day])
+            day += timedelta(days=1)
+
+        return [(gap_start.isoformat(), gap_end.isoformat()) for gap_start, gap_end in gaps]
+
+    @staticmethod
+    def fetch_weather_data_multi(coordinates, start_date, end_date):
+        """Una sola petición al archive API para varias coordenadas [(lat, lon)].
+        Devuelve una respuesta por coordenada, en el mismo orden."""
+        logger.info("Fetching weather data for %d locations, from %s to %s", len(coordinates), start_date, end_date)
         params = {
-            "latitude": latitude,
-            "longitude": longitude,
+            "latitude": ",".join(str(latitude) for latitude, _ in coordinates),
+            "longitude": ",".join(str(longitude) for _, longitude in coordinates),
             "start_date": start_date,
             "end_date": end_date,
             "hourly": "temperature_2m,precipitation",
             "timezone": "UTC"
         }
 
-        response = requests.get(ARCHIVE_URL, params=params)
-        response.raise_for_status()
-        logger.info(f"Weather data received: {len(response.json().get('hourly', {}).get('time', []))} records")
-        return response.json()
+        response = http_client.get(settings.OPEN_METEO_ARCHIVE_URL, params=params)
+        data = response.json()
+        # Con una sola coordenada el API devuelve un objeto en vez de una lista
+        return data if isinstance(data, list) else [data]
 
     @staticmethod
-    def store_weather_data(city_name, latitude, longitude, weather_json):
-        logger.info(f"Storing weather data for {city_name}")
-        hourly = weather_json.get("hourly", {})
-        times = hourly.get("time", [])
-        temperatures = hourly.get("temperature_2m", [])
-        precipitations = hourly.get("precipitation", [])
-
-        records = []
-        for i, time_str in enumerate(times):
-            dt_naive = datetime.fromisoformat(time_str)
-            dt_aware = timezone.make_aware(dt_naive)
-
-            record = WeatherRecord(
-                city=city_name,
-                latitude=latitude,
-                longitude=longitude,
-                datetime=dt_aware,
-                temperature=temperatures[i],
-                precipitation=precipitations[i]
-            )
-            records.append(record)
-
-        WeatherRecord.objects.bulk_create(records)
-        logger.info(f"{len(records)} records inserted into DB for {city_name}")
-        return len(records)
+    def fetch_window(latitude, longitude, window, retries=0):
+        """fetch_weather_data de una ventana, reintentando la ventana entera ante errores de red"""
+        return retry_window(
+            lambda: OpenMeteoService.fetch_weather_data(latitude, longitude, *window), window, retries
+        )
+
+    @staticmethod
+    def fetch_window_multi(coordinates, window, retries=0):
+        """fetch_weather_data_multi de una ventana, con los mismos reintentos que fetch_window"""
+        return retry_window(
+            lambda: OpenMeteoService.fetch_weather_data_multi(coordinates, *window), window, retries
+        )
+
+    @staticmethod
+    def load_weather(city_name, start_date, end_date, window_days=None, chunk_size=COPY_CHUNK_SIZE,
+                     workers=1, window_retries=0, on_progress=None):
+        """Descarga y guarda los días que faltan de city_name entre start_date y end_date.
+
+        Con window_days cada hueco se pide al archive API en ventanas de ese
+        tamaño; hasta `workers` ventanas se descargan a la vez y se guardan en
+        orden a medida que llegan, así que en memoria hay como mucho `workers`
+        ventanas. Las horas de días ya completos cuentan como omitidas.
+
+        Si alguna ventana falla, las demás se guardan igualmente y se lanza
+        PartialLoadError; al repetir la carga solo se piden los días que faltan.
+        on_progress(ventanas_procesadas, total) se llama tras cada ventana.
+        """
+        gaps = OpenMeteoService.missing_date_ranges(city_name, start_date, end_date)
+        requested_days = (date.fromisoformat(end_date) - date.fromisoformat(start_date)).days + 1
+        gap_days = sum((date.fromisoformat(end) - date.fromisoformat(start)).days + 1 for start, end in gaps)
+        counts = {"inserted": 0, "updated": 0, "skipped": (requested_days - gap_days) * 24}
+        if not gaps:
+            return counts
+
+        coords = OpenMeteoService.get_city_coordinates(city_name)
+        locations.save_geocoded(city_name, coords)
+        all_windows = [window for gap in gaps for window in split_date_range(*gap, window_days)]
+        windows = iter(all_windows)
+        failed = []
+        done = 0
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            def submit(window):
+                # Con el contexto de la petición, para que las métricas vean la latencia de Open-Meteo
+                future = pool.submit(
+                    copy_context().run,
+                    OpenMeteoService.fetch_window, coords['latitude'], coords['longitude'], window, window_retries
+                )
+                return window, future
+
+            pending = deque(submit(window) for window in islice(windows, workers))
+            while pending:
+                window, future = pending.popleft()
+                next_window = next(windows, None)
+                if next_window:
+                    pending.append(submit(next_window))
+
+                try:
+                    weather_data = future.result()
+                except Exception as e:
+                    logger.error("Failed window %s - %s for %s: %s", window[0], window[1], city_name, e)
+                    failed.append(window)
+                else:
+                    stored = OpenMeteoService.store_weather_data(
+                        city_name=city_name,
+                        latitude=coords['latitude'],
+                        longitude=coords['longitude'],
+                        weather_json=weather_data,
+                        chunk_size=chunk_size,
+                    )
+                    for key, value in stored.items():
+                        counts[key] += value
+
+                done += 1
+                if on_progress:
+                    on_progress(done, len(all_windows))
+
+        if failed:
+            raise PartialLoadError(city_name, counts, failed)
+        return counts
+
+    # ----------------------------
+    # Versiones async (vistas ASGI)
+    # ----------------------------
+    # Las esperas a Open-Meteo no ocupan un hilo: un proceso puede tener
+    # cientos de cargas en vuelo. El acceso a la base de datos sigue siendo
+    # síncrono y pasa por sync_to_async (_in_db).
+
+    @staticmethod
+    async def ageocode(city_name, language="en"):
+        """geocode() con el cliente async"""
+        response = await http_client.aget(settings.OPEN_METEO_GEOCODING_URL, params=_geocoding_params(city_name, language))
+        return _geocoding_result(response.json())
+
+    @staticmethod
+    async def aget_city_coordinates(city_name, language="en"):
+        """get_city_coordinates() con el cliente async y la misma caché de geocoding"""
+        logger.info("Searching coordinates for city: %s", city_name)
+        found, city_data = await _in_db(geocoding_cache.lookup)(city_name, language)
+        if not found:
+            city_data = await OpenMeteoService.ageocode(city_name, language)
+            await _in_db(geocoding_cache.store)(city_name, language, city_data)
+
+        if city_data is None:
+            logger.error("City not found: %s", city_name)
+            raise ValueError(f"City not found: {city_name}")
+
+        return dict(city_data)
+
+    @staticmethod
+    async def afetch_weather_data(latitude, longitude, start_date, end_date):
+        """fetch_weather_data() con el cliente async"""
+        logger.info("Fetching weather data for lat=%s, lon=%s, from %s to %s", latitude, longitude, start_date, end_date)
+        params = _archive_params(latitude, longitude, start_date, end_date)
+        response = await http_client.aget(settings.OPEN_METEO_ARCHIVE_URL, params=params)
+        data = response.json()
+        logger.info("Weather data received: %d records", len(data.get("hourly", {}).get("time", [])))
+        return data
+
+    @staticmethod
+    async def afetch_window(latitude, longitude, window, retries=0):
+        """fetch_window() con el cliente async"""
+        for attempt in range(retries + 1):
+            try:
+                return await OpenMeteoService.afetch_weather_data(latitude, longitude, *window)
+            except httpx.HTTPError as e:
+                if attempt == retries:
+                    raise
+                logger.warning("Retrying window %s - %s after error: %s", window[0], window[1], e)
+
+    @staticmethod
+    async def aload_weather(city_name, start_date, end_date, window_days=None, chunk_size=COPY_CHUNK_SIZE,
+                            workers=1, window_retries=0):
+        """load_weather() sin hilos: hasta `workers` ventanas se descargan a la
+        vez como tareas del event loop y se guardan en orden a medida que llegan"""
+        gaps = await _in_db(OpenMeteoService.missing_date_ranges)(city_name, start_date, end_date)
+        requested_days = (date.fromisoformat(end_date) - date.fromisoformat(start_date)).days + 1
+        gap_days = sum((date.fromisoformat(end) - date.fromisoformat(start)).days + 1 for start, end in gaps)
+        counts = {"inserted": 0, "updated": 0, "skipped": (requested_days - gap_days) * 24}
+        if not gaps:
+            return counts
+
+        # Un cliente HTTP para toda la carga (geocoding y ventanas), cerrado al terminar
+        async with http_client.async_client():
+            return await OpenMeteoService._aload_gaps(city_name, gaps, counts, window_days, chunk_size, workers, window_retries)
+
+    @staticmethod
+    async def _aload_gaps(city_name, gaps, counts, window_days, chunk_size, workers, window_retries):
+        coords = await OpenMeteoService.aget_city_coordinates(city_name)
+        await _in_db(locations.save_geocoded)(city_name, coords)
+        windows = iter([window for gap in gaps for window in split_date_range(*gap, window_days)])
+        failed = []
+
+        def submit(window):
+            fetch = OpenMeteoService.afetch_window(coords["latitude"], coords["longitude"], window, window_retries)
+            return window, asyncio.ensure_future(fetch)
+
+        pending = deque(submit(window) for window in islice(windows, workers))
+        try:
+            while pending:
+                window, task = pending.popleft()
+                next_window = next(windows, None)
+                if next_window:
+                    pending.append(submit(next_window))
+
+                try:
+                    weather_data = await task
+                except Exception as e:
+                    logger.error("Failed window %s - %s for %s: %s", window[0], window[1], city_name, e)
+                    failed.append(window)
+                    continue
+
+                stored = await _in_db(OpenMeteoService.store_weather_data)(
+                    city_name=city_name,
+                    latitude=coords["latitude"],
+                    longitude=coords["longitude"],
+                    weather_json=weather_data,
+                    chunk_size=chunk_size,
+                )
+                for key, value in stored.items():
+                    counts[key] += value
+        finally:
+            # Si la carga se cancela (cliente desconectado) o falla al guardar, no quedan descargas sueltas
+            for _, task in pending:
+                task.cancel()
+
+        if failed:
+            raise PartialLoadError(city_name, counts, failed)
+        return counts
+
+
+class PartialLoadError(Exception):
+    """Algunas ventanas no se pudieron descargar; el resto ya está guardado"""
+
+    def __init__(self, city_name, counts, failed_windows):
+        self.counts = counts
+        self.failed_windows = failed_windows
+        super().__init__(f"{len(failed_windows)} date windows could not be loaded for {city_name}")
+
+
+def retry_window(fetch, window, retries):
+    """Llama a fetch() hasta retries + 1 veces mientras falle la red (no si el circuito está abierto)"""
+    for attempt in range(retries + 1):
+        try:
+            return fetch()
+        except http_client.CircuitOpenError:
+            raise
+        except requests.RequestException as e:
+            if attempt == retries:
+                raise
+            logger.warning("Retrying window %s - %s after error: %s", window[0], window[1], e)
+
+
+def split_date_range(start_date, end_date, window_days=None):
+    """Divide [start_date, end_date] (fechas ISO) en ventanas de como mucho window_days días"""
+    if not window_days:
+        return [(start_date, end_date)]
+    start = date.fromisoformat(start_date)
+    end = date.fromisoformat(end_date)
+    windows = []
+    while start <= end:
+        window_end = min(start + timedelta(days=window_days - 1), end)
+        windows.append((start.isoformat(), window_end.isoformat()))
+        start = window_end + timedelta(days=1)
+    return windows
@@ -0,0 +1,131 @@
+from datetime import date, datetime, timezone as dt_timezone
+from django.db import connection, transaction
+from weather.models import Location, WeatherRecord
+import gzip
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+TABLE = WeatherRecord._meta.db_table
+LOCATION_TABLE = Location._meta.db_table
+DEFAULT_PARTITION = f"{TABLE}_default"
+PARTITION_RE = re.compile(rf"^{TABLE}_p(\d{{4}})_(\d{{2}})$")
+
+# ----------------------------
+# Particiones mensuales de WeatherRecord
+# ----------------------------
+# La tabla horaria está particionada por rango de datetime (un mes UTC por
+# partición, ver la migración 0007). El ingest crea las particiones que
+# necesita antes de escribir; lo que se inserta fuera de ellas (p. ej. con
+# el ORM) cae en la partición por defecto y se mueve a su mes cuando este se
+# crea. Los meses antiguos pueden desengancharse y archivarse.
+
+
+def month_of(value):
+    """Primer día del mes (UTC) de un date, datetime o cadena ISO"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        value = value.astimezone(dt_timezone.utc)
+    return date(value.year, value.month, 1)
+
+
+def next_month(month):
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def months_between(start, end):
+    """Meses desde el de start hasta el de end, ambos incluidos"""
+    month, last = month_of(start), month_of(end)
+    while month <= last:
+        yield month
+        month = next_month(month)
+
+
+def partition_name(month):
+    return f"{TABLE}_p{month:%Y_%m}"
+
+
+def _bound(month):
+    return f"'{month.isoformat()} 00:00:00+00'"
+
+
+def list_partitions():
+    """Meses con partición enganchada a la tabla, ordenados"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = %s::regclass",
+            [TABLE],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    return sorted(
+        date(int(m.group(1)), int(m.group(2)), 1)
+        for m in map(PARTITION_RE.match, names) if m
+    )
+
+
+def create_partition(cursor, month):
+    """Crea la partición de un mes; las filas de ese mes que estén en la
+    partición por defecto se mueven a ella"""
+    name, lower, upper = partition_name(month), _bound(month), _bound(next_month(month))
+    cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE datetime >= {lower} AND datetime < {upper})")
+    if not cursor.fetchone()[0]:
+        cursor.execute(f"CREATE TABLE {name} PARTITION OF {TABLE} FOR VALUES FROM ({lower}) TO ({upper})")
+    else:
+        cursor.execute(f"CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS)")
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE datetime >= {lower} AND datetime < {upper} RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        )
+        cursor.execute(f"ALTER TABLE {TABLE} ATTACH PARTITION {name} FOR VALUES FROM ({lower}) TO ({upper})")
+    logger.info("Created partition %s", name)
+
+
+def ensure_partitions(start, end):
+    """Crea las particiones mensuales que falten entre start y end. Devuelve cuántas"""
+    existing = set(list_partitions())
+    missing = [m for m in months_between(start, end) if m not in existing]
+    if not missing:
+        return 0
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Un solo proceso crea particiones a la vez; tras el lock se vuelve a mirar
+        cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [TABLE])
+        existing = set(list_partitions())
+        missing = [m for m in missing if m not in existing]
+        for month in missing:
+            create_partition(cursor, month)
+    return len(missing)
+
+
+def detach_partition(month, archive_dir=None, drop=False):
+    """Desengancha la partición de un mes. Con archive_dir la vuelca antes a
+    <archive_dir>/<partición>.csv.gz (con ciudad y coordenadas de Location,
+    para que el archivo se entienda sin la base de datos); con drop la borra después.
+
+    El resumen diario de esos días se conserva, así que las estadísticas que
+    salen del rollup siguen incluyéndolos.
+    """
+    name = partition_name(month)
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Comprobaciones de la FK (diferida) pendientes en esta transacción:
+        # con ellas en cola PostgreSQL no deja desenganchar ni borrar la tabla
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        cursor.execute(f"ALTER TABLE {TABLE} DETACH PARTITION {name}")
+        path = None
+        if archive_dir:
+            path = archive_dir / f"{name}.csv.gz"
+            query = (
+                f"SELECT r.record_id, l.name AS city, l.latitude, l.longitude, r.datetime, r.temperature, r.precipitation "
+                f"FROM {name} r JOIN {LOCATION_TABLE} l USING (location_id) ORDER BY r.datetime, l.name"
+            )
+            with gzip.open(path, "wb") as archive, cursor.copy(f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER)") as copy:
+                for block in copy:
+                    archive.write(block)
+        if drop:
+            cursor.execute(f"DROP TABLE {name}")
+    logger.info("Detached partition %s%s", name, f" (archived to {path})" if path else "")
+    return path
@@ -0,0 +1,222 @@
+from collections import defaultdict
+from itertools import groupby
+from django.conf import settings
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from weather.models import DailyWeatherSummary, Location, WeatherRecord
+from weather.queries import filter_records
+from services import metrics
+import logging
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_FIELDS = [
+    "count",
+    "temperature_sum",
+    "temperature_min",
+    "temperature_min_at",
+    "temperature_max",
+    "temperature_max_at",
+    "precipitation_sum",
+    "precipitation_max",
+    "hours_above_threshold",
+    "hours_below_threshold",
+]
+
+# ----------------------------
+# Mantenimiento del resumen diario
+# ----------------------------
+
+def _day_rows(records):
+    """Agrega un queryset de WeatherRecord por ciudad y día, con los campos del resumen diario"""
+    rows = (
+        records.order_by()
+        .annotate(date=TruncDate("datetime"))
+        .values("date", city=F("location__name"))
+        .annotate(
+            count=Count("record_id"),
+            temperature_sum=Sum("temperature"),
+            temperature_min=Min("temperature"),
+            temperature_max=Max("temperature"),
+            # Primer instante del día con el mínimo / máximo
+            temperature_min_at=ArrayAgg("datetime", order_by=("temperature", "datetime")),
+            temperature_max_at=ArrayAgg("datetime", order_by=("-temperature", "datetime")),
+            precipitation_sum=Sum("precipitation"),
+            precipitation_max=Max("precipitation"),
+            hours_above_threshold=Count("record_id", filter=Q(temperature__gt=settings.WEATHER_THRESHOLD_HIGH)),
+            hours_below_threshold=Count("record_id", filter=Q(temperature__lt=settings.WEATHER_THRESHOLD_LOW)),
+        )
+    )
+    for row in rows:
+        row["temperature_min_at"] = row["temperature_min_at"][0]
+        row["temperature_max_at"] = row["temperature_max_at"][0]
+        yield row
+
+
+def _summarize(records):
+    """Agrega un queryset de WeatherRecord en objetos DailyWeatherSummary (uno por ciudad y día)"""
+    for row in _day_rows(records):
+        yield DailyWeatherSummary(**row)
+
+
+def update_daily_summaries(city, start, end):
+    """Recalcula los resúmenes de city para los días entre start y end (datetimes, ambos incluidos)"""
+    records = filter_records(WeatherRecord.objects.all(), city, start.date(), end.date())
+    summaries = list(_summarize(records))
+    DailyWeatherSummary.objects.bulk_create(
+        summaries,
+        update_conflicts=True,
+        unique_fields=["city", "date"],
+        update_fields=SUMMARY_FIELDS,
+    )
+    logger.info("%d daily summaries updated for %s", len(summaries), city)
+    return len(summaries)
+
+
+def rebuild_daily_summaries(city=None):
+    """Regenera desde cero el resumen diario (de una ciudad o de todas) a partir de los datos horarios"""
+    records = WeatherRecord.objects.all()
+    summaries = DailyWeatherSummary.objects.all()
+    if city:
+        records = records.filter(location__name=city)
+        summaries = summaries.filter(city=city)
+
+    with transaction.atomic():
+        summaries.delete()
+        created = DailyWeatherSummary.objects.bulk_create(_summarize(records), batch_size=1000)
+
+    logger.info("Daily summaries rebuilt: %d rows", len(created))
+    return len(created)
+
+# ----------------------------
+# Estadísticas desde el resumen diario
+# ----------------------------
+# El resumen solo cubre lo que pasa por el ingest: las ciudades con más horas
+# guardadas (Location.hours, contadas al escribir) que horas en el resumen
+# tienen datos cargados fuera del ingest y se agregan desde los datos horarios
+# hasta el próximo `manage.py rebuild_daily_summaries`.
+
+def uncovered_cities(cities=None):
+    """Nombres de las ciudades dadas (o de todas) con horas que no están en el resumen diario.
+
+    Compara contadores de toda la ciudad, sin leer los datos horarios: una
+    ciudad con alguna hora sin resumir no usa el resumen en ningún rango.
+    """
+    summarized = (
+        DailyWeatherSummary.objects.filter(city=OuterRef("name"))
+        .order_by().values("city").annotate(hours=Sum("count")).values("hours")
+    )
+    locations = Location.objects.all() if cities is None else Location.objects.filter(name__in=cities)
+    # Con más horas en el resumen faltan datos horarios (particiones archivadas), no resúmenes
+    return set(
+        locations.annotate(summarized=Coalesce(Subquery(summarized), 0))
+        .filter(hours__gt=F("summarized"))
+        .values_list("name", flat=True)
+    )
+
+
+def _by_date(days, field):
+    """Suma field y count por fecha (varias ciudades pueden compartir fecha)"""
+    totals = defaultdict(lambda: [0.0, 0])
+    for d in days:
+        totals[d["date"]][0] += d[field]
+        totals[d["date"]][1] += d["count"]
+    return sorted(totals.items())
+
+
+@metrics.timed("aggregate")
+def temperature_stats(qs, threshold_high=None, threshold_low=None):
+    """Estadísticas de temperatura a partir de un queryset de DailyWeatherSummary.
+
+    El resumen solo tiene las horas fuera de los umbrales de settings; con
+    otros umbrales devuelve {} y hay que ir a los datos horarios.
+    """
+    if threshold_high not in (None, settings.WEATHER_THRESHOLD_HIGH) or \
+            threshold_low not in (None, settings.WEATHER_THRESHOLD_LOW):
+        return {}
+
+    days = list(qs.order_by("date").values(
+        "date", "count", "temperature_sum",
+        "temperature_max", "temperature_max_at", "temperature_min", "temperature_min_at",
+        "hours_above_threshold", "hours_below_threshold",
+    ))
+    if not days:
+        return {}
+
+    total = sum(d["temperature_sum"] for d in days)
+    count = sum(d["count"] for d in days)
+    max_day = min(days, key=lambda d: (-d["temperature_max"], d["temperature_max_at"]))
+    min_day = min(days, key=lambda d: (d["temperature_min"], d["temperature_min_at"]))
+
+    result = {
+        "average": round(total / count, 2),
+        "average_by_day": {str(k): round(s / n, 2) for k, (s, n) in _by_date(days, "temperature_sum")},
+        "max": {"value": round(max_day["temperature_max"], 2), "date_time": max_day["temperature_max_at"].isoformat()},
+        "min": {"value": round(min_day["temperature_min"], 2), "date_time": min_day["temperature_min_at"].isoformat()},
+    }
+    if threshold_high is not None:
+        result["hours_above_threshold"] = sum(d["hours_above_threshold"] for d in days)
+    if threshold_low is not None:
+        result["hours_below_threshold"] = sum(d["hours_below_threshold"] for d in days)
+    logger.info("Calculated temperature stats from daily summaries")
+    return result
+
+
+@metrics.timed("aggregate")
+def precipitation_stats(qs):
+    """Estadísticas de precipitación a partir de un queryset de DailyWeatherSummary"""
+    days = list(qs.order_by("date").values("date", "count", "precipitation_sum", "precipitation_max"))
+    if not days:
+        return {}
+
+    total = sum(d["precipitation_sum"] for d in days)
+    count = sum(d["count"] for d in days)
+    by_date = _by_date(days, "precipitation_sum")
+    max_day = max(days, key=lambda d: d["precipitation_max"])  # Primer día con el máximo
+
+    result = {
+        "total": round(total, 2),
+        "total_by_day": {str(k): round(s, 2) for k, (s, _) in by_date},
+        "days_with_precipitation": sum(1 for _, (s, _) in by_date if s > 0),
+        "max": {"value": round(max_day["precipitation_max"], 2), "date": str(max_day["date"])},
+        "average": round(total / count, 2),
+    }
+    logger.info("Calculated precipitation stats from daily summaries")
+    return result
+
+
+@metrics.timed("aggregate")
+def global_stats(qs, records=None):
+    """Estadísticas globales por ciudad a partir de un queryset de DailyWeatherSummary.
+
+    Las ciudades de records (queryset de WeatherRecord), si se pasa, se
+    agregan por día desde los datos horarios.
+    """
+    rows = list(qs.order_by("city", "date").values("city", "date", *SUMMARY_FIELDS))
+    if records is not None:
+        rows.extend(_day_rows(records))
+        rows.sort(key=lambda d: (d["city"], d["date"]))
+    stats = {}
+
+    for city, days in groupby(rows, key=lambda d: d["city"]):
+        days = list(days)
+        count = sum(d["count"] for d in days)
+        max_temp = min(days, key=lambda d: (-d["temperature_max"], d["temperature_max_at"]))
+        min_temp = min(days, key=lambda d: (d["temperature_min"], d["temperature_min_at"]))
+        max_prec = max(days, key=lambda d: d["precipitation_max"])
+
+        stats[city] = {
+            "start_date": str(days[0]["date"]),
+            "end_date": str(days[-1]["date"]),
+            "temperature_average": round(sum(d["temperature_sum"] for d in days) / count, 2),
+            "precipitation_total": round(sum(d["precipitation_sum"] for d in days), 2),
+            "days_with_precipitation": sum(1 for d in days if d["precipitation_sum"] > 0),
+            "precipitation_max": {"date": str(max_prec["date"]), "value": round(max_prec["precipitation_max"], 2)},
+            "temperature_max": {"date": str(max_temp["temperature_max_at"].date()), "value": round(max_temp["temperature_max"], 2)},
+            "temperature_min": {"date": str(min_temp["temperature_min_at"].date()), "value": round(min_temp["temperature_min"], 2)},
+        }
+
+    logger.info("Calculated global stats from daily summaries")
+    return stats
@@ -0,0 +1,64 @@
+from datetime import timedelta
+from django.db.models import Avg, Max, Min, Sum
+from django.db.models.functions import Trunc
+from services import metrics
+import math
+import logging
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------
+# Series agregadas por intervalos
+# ----------------------------
+# Los datos horarios se agrupan en PostgreSQL con date_trunc (Trunc) y la
+# respuesta lleva arrays paralelos (timestamps, values, min, max), así que
+# su tamaño depende del número de intervalos y no del rango pedido.
+
+# De más fina a más gruesa, con la duración aproximada de cada intervalo
+RESOLUTIONS = {
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+    "week": timedelta(weeks=1),
+    "month": timedelta(days=365.25 / 12),
+}
+VARIABLES = {
+    "temperature": Avg,  # Media del intervalo
+    "precipitation": Sum,  # Total del intervalo
+}
+
+
+def point_count(resolution, start, end):
+    """Intervalos (como mucho) que ocupa [start, end) con esa resolución"""
+    return math.ceil((end - start) / RESOLUTIONS[resolution]) + 1
+
+
+def pick_resolution(start, end, max_points):
+    """La resolución más fina con la que [start, end) no pasa de max_points intervalos"""
+    for resolution in RESOLUTIONS:
+        if point_count(resolution, start, end) <= max_points:
+            return resolution
+    return "month"
+
+
+@metrics.timed("aggregate")
+def bucketed(qs, variable, resolution, decimals=2):
+    """Serie de un queryset de WeatherRecord agrupada por intervalos de `resolution`.
+
+    values es la media (temperature) o el total (precipitation) de cada
+    intervalo; min y max, los valores horarios extremos.
+    """
+    rows = list(
+        qs.order_by()
+        .annotate(bucket=Trunc("datetime", resolution))
+        .values("bucket")
+        .annotate(value=VARIABLES[variable](variable), low=Min(variable), high=Max(variable))
+        .order_by("bucket")
+        .values_list("bucket", "value", "low", "high")
+    )
+    buckets, values, lows, highs = zip(*rows) if rows else ((), (), (), ())
+    return {
+        "timestamps": [bucket.isoformat() for bucket in buckets],
+        "values": [round(value, decimals) for value in values],
+        "min": [round(low, decimals) for low in lows],
+        "max": [round(high, decimals) for high in highs],
+    }
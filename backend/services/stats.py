@@ -1,119 +1,187 @@
+import numpy as np
 import pandas as pd
+from services import metrics
 import logging
 
 logger = logging.getLogger(__name__)
 
 # ----------------------------
-# Funciones de estadísticas
+# Motor de estadísticas
 # ----------------------------
+# weather_stats calcula todas las métricas de temperatura y precipitación
+# sobre los arrays de columnas: los días se factorizan una sola vez y las
+# sumas / conteos por día salen de np.bincount, sin un groupby por métrica.
+# Lo usan las vistas (backend "pandas") y weather/tasks.py, que solo cambian
+# el redondeo y los umbrales.
 
-def temperature_stats(df, start_date=None, end_date=None):
-    """Devuelve estadísticas de temperatura para un dataframe con columnas ['datetime','temperature']"""
-    if df.empty:
+
+def _round(value, decimals):
+    return round(float(value), decimals)
+
+
+def weather_stats(datetimes, temperatures=None, precipitations=None,
+                  threshold_high=None, threshold_low=None, decimals=2):
+    """Estadísticas de las series horarias dadas (arrays o Series alineados con datetimes).
+
+    Devuelve {"temperature": {...}, "precipitation": {...}} con las claves de
+    las series pasadas. Las horas por encima de threshold_high / por debajo
+    de threshold_low solo se cuentan si se pasa el umbral. La media horaria
+    de precipitación lleva al menos 2 decimales (suele ser < 0.1 mm).
+    """
+    times = pd.DatetimeIndex(datetimes)
+    if not len(times):
         return {}
 
-    df['datetime'] = pd.to_datetime(df['datetime'])
+    # Día (en la zona horaria de los datos) de cada hora, factorizado una vez
+    wall = times.tz_localize(None) if times.tz is not None else times
+    day_codes, days = pd.factorize(wall.values.astype("datetime64[D]"), sort=True)
+    day_labels = np.datetime_as_string(days, unit="D").tolist()
+    hours_per_day = np.bincount(day_codes)
+    result = {}
+
+    if temperatures is not None:
+        values = np.asarray(temperatures, dtype="float64")
+        daily_sum = np.bincount(day_codes, weights=values)
+        max_at, min_at = values.argmax(), values.argmin()
+        stats = {
+            "average": _round(values.mean(), decimals),
+            "average_by_day": {
+                day: _round(total / hours, decimals)
+                for day, total, hours in zip(day_labels, daily_sum.tolist(), hours_per_day.tolist())
+            },
+            "max": {"value": _round(values[max_at], decimals), "date_time": times[max_at].isoformat()},
+            "min": {"value": _round(values[min_at], decimals), "date_time": times[min_at].isoformat()},
+        }
+        if threshold_high is not None:
+            stats["hours_above_threshold"] = int(np.count_nonzero(values > threshold_high))
+        if threshold_low is not None:
+            stats["hours_below_threshold"] = int(np.count_nonzero(values < threshold_low))
+        result["temperature"] = stats
+
+    if precipitations is not None:
+        values = np.asarray(precipitations, dtype="float64")
+        daily_sum = np.bincount(day_codes, weights=values)
+        max_at = values.argmax()
+        result["precipitation"] = {
+            "total": _round(values.sum(), decimals),
+            "total_by_day": {day: _round(total, decimals) for day, total in zip(day_labels, daily_sum.tolist())},
+            "days_with_precipitation": int(np.count_nonzero(daily_sum > 0)),
+            "max": {"value": _round(values[max_at], decimals), "date": day_labels[day_codes[max_at]]},
+            "average": _round(values.mean(), max(decimals, 2)),
+        }
 
-    # Filtrar por fechas si se pasan
+    return result
+
+
+def _in_range(df, start_date=None, end_date=None):
+    """Filas de df (columna datetime) entre start_date y end_date (fechas, ambas incluidas)"""
+    df = df.assign(datetime=pd.to_datetime(df["datetime"]))
+    if not (start_date or end_date):
+        return df
+    times = pd.DatetimeIndex(df["datetime"])
+    days = (times.tz_localize(None) if times.tz is not None else times).values.astype("datetime64[D]")
+    mask = np.ones(len(df), dtype=bool)
     if start_date:
-        df = df[df['datetime'].dt.date >= pd.to_datetime(start_date).date()]
+        mask &= days >= np.datetime64(str(start_date)[:10], "D")
     if end_date:
-        df = df[df['datetime'].dt.date <= pd.to_datetime(end_date).date()]
+        mask &= days <= np.datetime64(str(end_date)[:10], "D")
+    return df[mask]
+
+# ----------------------------
+# Funciones de estadísticas
+# ----------------------------
 
+@metrics.timed("aggregate")
+def temperature_stats(df, start_date=None, end_date=None, threshold_high=None, threshold_low=None, decimals=2):
+    """Devuelve estadísticas de temperatura para un dataframe con columnas ['datetime','temperature']"""
+    if df.empty:
+        return {}
+    df = _in_range(df, start_date, end_date)
     if df.empty:
         return {}
 
-    df['date'] = df['datetime'].dt.date
-
-    avg_temp = round(df['temperature'].mean(), 2)
-    max_row = df.loc[df['temperature'].idxmax()]
-    min_row = df.loc[df['temperature'].idxmin()]
-
-    result = {
-        "average": avg_temp,
-        "average_by_day": {str(k): round(v,2) for k,v in df.groupby('date')['temperature'].mean().to_dict().items()},
-        "max": {"value": round(max_row['temperature'],2), "date_time": max_row['datetime'].isoformat()},
-        "min": {"value": round(min_row['temperature'],2), "date_time": min_row['datetime'].isoformat()},
-    }
+    result = weather_stats(df["datetime"], temperatures=df["temperature"],
+                           threshold_high=threshold_high, threshold_low=threshold_low, decimals=decimals)
     logger.info("Calculated temperature stats")
-    return result
+    return result["temperature"]
 
 
-def precipitation_stats(df, start_date=None, end_date=None):
+@metrics.timed("aggregate")
+def precipitation_stats(df, start_date=None, end_date=None, decimals=2):
     """Devuelve estadísticas de precipitación para un dataframe con columnas ['datetime','precipitation']"""
     if df.empty:
         return {}
-
-    df['datetime'] = pd.to_datetime(df['datetime'])
-
-    # Filtrar por fechas si se pasan
-    if start_date:
-        df = df[df['datetime'].dt.date >= pd.to_datetime(start_date).date()]
-    if end_date:
-        df = df[df['datetime'].dt.date <= pd.to_datetime(end_date).date()]
-
+    df = _in_range(df, start_date, end_date)
     if df.empty:
         return {}
 
-    df['date'] = df['datetime'].dt.date
-
-    total_prec = round(df['precipitation'].sum(), 2)
-    days_with_prec = int((df.groupby('date')['precipitation'].sum() > 0).sum())
-    max_row = df.loc[df['precipitation'].idxmax()]
-
-    result = {
-        "total": total_prec,
-        "total_by_day": {str(k): round(v,2) for k,v in df.groupby('date')['precipitation'].sum().to_dict().items()},
-        "days_with_precipitation": days_with_prec,
-        "max": {"value": round(max_row['precipitation'],2), "date": str(max_row['date'])},
-        "average": round(df['precipitation'].mean(),2)
-    }
+    result = weather_stats(df["datetime"], precipitations=df["precipitation"], decimals=decimals)
     logger.info("Calculated precipitation stats")
-    return result
+    return result["precipitation"]
 
 
+@metrics.timed("aggregate")
 def global_stats(df):
-    """Devuelve estadísticas globales para todas las ciudades"""
+    """Devuelve estadísticas globales para todas las ciudades (columnas city, datetime,
+    temperature, precipitation), ya con el formato de la respuesta de /api/global-stats/.
+
+    Todas las ciudades se agregan en una sola pasada agrupada; los máximos y
+    mínimos se resuelven con idxmax/idxmin por grupo y una única búsqueda por
+    índice, sin copiar subtablas por ciudad.
+    """
     if df.empty:
         return {}
 
-    df['datetime'] = pd.to_datetime(df['datetime'])
-    stats = {}
-
-    for city, group in df.groupby('city'):
-        start_date = str(group['datetime'].min().date())
-        end_date = str(group['datetime'].max().date())
-
-        # Temperatura
-        temp = group[['datetime','temperature']].copy()
-        avg_temp = round(temp['temperature'].mean(),2)
-        max_row = temp.loc[temp['temperature'].idxmax()]
-        min_row = temp.loc[temp['temperature'].idxmin()]
-        temp_max = {"value": round(max_row['temperature'],2), "date": str(max_row['datetime'].date())}
-        temp_min = {"value": round(min_row['temperature'],2), "date": str(min_row['datetime'].date())}
-
-        # Precipitación
-        prec = group[['datetime','precipitation']].copy()
-        total_prec = round(prec['precipitation'].sum(),2)
-        days_with_prec = int((prec.groupby(prec['datetime'].dt.date)['precipitation'].sum() > 0).sum())
-        max_prec_row = prec.loc[prec['precipitation'].idxmax()]
-        prec_max = {"value": round(max_prec_row['precipitation'],2), "date": str(max_prec_row['datetime'].date())}
-
-        # Ubicación
-        latitude = group['latitude'].iloc[0] if 'latitude' in group.columns else None
-        longitude = group['longitude'].iloc[0] if 'longitude' in group.columns else None
-
-        stats[city] = {
+    datetimes = pd.to_datetime(df["datetime"])
+    if datetimes.dt.tz is not None:
+        datetimes = datetimes.dt.tz_convert(None)  # Fechas en UTC, como .date() en la respuesta
+    frame = pd.DataFrame({
+        "city": df["city"].to_numpy(),
+        "date": datetimes.to_numpy().astype("datetime64[D]"),
+        "temperature": df["temperature"].to_numpy(),
+        "precipitation": df["precipitation"].to_numpy(),
+    })
+
+    agg = frame.groupby("city", sort=True).agg(
+        start_date=("date", "min"),
+        end_date=("date", "max"),
+        temperature_average=("temperature", "mean"),
+        precipitation_total=("precipitation", "sum"),
+        temperature_max=("temperature", "idxmax"),
+        temperature_min=("temperature", "idxmin"),
+        precipitation_max=("precipitation", "idxmax"),
+    )
+    daily_prec = frame.groupby(["city", "date"], sort=False)["precipitation"].sum()
+    days_with_prec = (daily_prec > 0).groupby(level="city").sum().reindex(agg.index)
+
+    def extreme(column, value):
+        rows = frame.loc[agg[column], ["date", value]]
+        return rows["date"].dt.strftime("%Y-%m-%d").tolist(), rows[value].round(2).tolist()
+
+    temp_max_dates, temp_max_values = extreme("temperature_max", "temperature")
+    temp_min_dates, temp_min_values = extreme("temperature_min", "temperature")
+    prec_max_dates, prec_max_values = extreme("precipitation_max", "precipitation")
+
+    stats = {
+        city: {
             "start_date": start_date,
             "end_date": end_date,
-            "temperature_average": avg_temp,
-            "temperature_max": temp_max,
-            "temperature_min": temp_min,
-            "precipitation_total": total_prec,
-            "days_with_precipitation": days_with_prec,
-            "precipitation_max": prec_max,
-            "location": {"latitude": latitude, "longitude": longitude}
+            "temperature_average": temperature_average,
+            "precipitation_total": precipitation_total,
+            "days_with_precipitation": days,
+            "precipitation_max": {"date": prec_max_date, "value": prec_max_value},
+            "temperature_max": {"date": temp_max_date, "value": temp_max_value},
+            "temperature_min": {"date": temp_min_date, "value": temp_min_value},
         }
+        for (city, start_date, end_date, temperature_average, precipitation_total, days,
+             prec_max_date, prec_max_value, temp_max_date, temp_max_value, temp_min_date, temp_min_value)
+        in zip(
+            agg.index, agg["start_date"].dt.strftime("%Y-%m-%d"), agg["end_date"].dt.strftime("%Y-%m-%d"),
+            agg["temperature_average"].round(2).tolist(), agg["precipitation_total"].round(2).tolist(),
+            days_with_prec.astype(int).tolist(),
+            prec_max_dates, prec_max_values, temp_max_dates, temp_max_values, temp_min_dates, temp_min_values,
+        )
+    }
 
     logger.info("Calculated global stats for all cities")
     return stats
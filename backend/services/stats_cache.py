@@ -0,0 +1,98 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Max
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+from django.utils import timezone
+from weather.models import Location
+from functools import wraps
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------
+# Caché de respuestas de estadísticas
+# ----------------------------
+# Cada ciudad tiene una versión (Location.data_version, el instante de su
+# última escritura) en la base de datos, así que una carga hecha por el
+# worker de ingesta se ve en todos los procesos aunque la caché
+# WEATHER_STATS_CACHE sea la memoria de cada uno. Las respuestas se guardan
+# bajo (endpoint, parámetros GET, backend, versión de la ciudad o, sin
+# ciudad, la mayor de todas); al escribir datos basta con cambiar la versión.
+# ETag y Last-Modified salen de la versión, por lo que un GET condicional se
+# responde con 304 con una sola consulta a Location.
+
+
+def _cache():
+    return caches[settings.WEATHER_STATS_CACHE]
+
+
+def _hash(*parts):
+    return hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest()
+
+
+def city_version(city):
+    """Instante de la última escritura de la ciudad (de cualquiera si city es None);
+    None si no hay datos"""
+    if city:
+        return Location.objects.filter(name=city).values_list("data_version", flat=True).first()
+    return Location.objects.aggregate(version=Max("data_version"))["version"]
+
+
+def _request_version(request):
+    # Una consulta por petición: la usan el ETag, Last-Modified y la clave de la respuesta
+    if not hasattr(request, "_stats_version"):
+        request._stats_version = city_version(request.GET.get("city"))
+    return request._stats_version
+
+
+def invalidate(city):
+    """Invalida las respuestas cacheadas de la ciudad (y las de todas las ciudades)"""
+    Location.objects.filter(name=city).update(data_version=timezone.now())
+    logger.info("Stats cache invalidated for %s", city)
+
+
+def clear():
+    """Invalida todas las respuestas"""
+    Location.objects.update(data_version=timezone.now())
+    _cache().clear()
+
+
+def _request_key(endpoint, request):
+    # Todos los parámetros GET (fechas, umbrales, resolución...), en orden estable
+    params = sorted(request.GET.lists())
+    return _hash(endpoint, params, settings.WEATHER_STATS_BACKEND, _request_version(request))
+
+
+def cached_stats(endpoint):
+    """Decorador de las vistas de estadísticas: caché de la respuesta + ETag / Last-Modified"""
+
+    def etag(request, *args, **kwargs):
+        return _request_key(endpoint, request)
+
+    def last_modified(request, *args, **kwargs):
+        version = _request_version(request)
+        return version.replace(microsecond=0) if version else None
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            key = f"weather-stats:response:{_request_key(endpoint, request)}"
+            cached = _cache().get(key)
+            if cached is not None:
+                status, content = cached
+                response = HttpResponse(content, status=status, content_type="application/json")
+            else:
+                response = view(request, *args, **kwargs)
+                # 404 (sin datos) también se guarda: la próxima carga de la ciudad lo invalida
+                if response.status_code in (200, 404):
+                    _cache().set(key, (response.status_code, response.content), settings.WEATHER_STATS_CACHE_TTL)
+            # El navegador guarda la respuesta pero revalida siempre (If-None-Match -> 304)
+            patch_cache_control(response, no_cache=True)
+            return response
+
+        return condition(etag_func=etag, last_modified_func=last_modified)(wrapper)
+
+    return decorator
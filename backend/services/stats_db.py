@@ -0,0 +1,99 @@
+from django.db.models import Count, Q, Sum, Value
+from django.db.models.functions import TruncDate
+from services import metrics
+import logging
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------------------------
+# Estadísticas calculadas en la base de datos
+# ----------------------------------------------
+# Misma salida que services.stats, pero las agregaciones (suma, conteo,
+# buckets diarios y argmax/argmin) se resuelven en PostgreSQL y a Python
+# solo llega una fila por día.
+
+
+def _daily(qs, field, **extra):
+    """Agrega un queryset de WeatherRecord por día: suma, número de horas y los agregados extra"""
+    return list(
+        qs.order_by()
+        .annotate(date=TruncDate("datetime"))
+        .values("date")
+        .annotate(total=Sum(field), count=Count(field), **extra)
+        .order_by("date")
+    )
+
+
+def _extreme(qs, field, kind):
+    """Queryset de una fila con el máximo ('max') o mínimo ('min') de field.
+
+    En caso de empate gana el registro más antiguo, igual que idxmax/idxmin
+    sobre un dataframe ordenado por datetime.
+    """
+    order = f"-{field}" if kind == "max" else field
+    return (
+        qs.annotate(kind=Value(kind))
+        .order_by(order, "datetime")
+        .values("kind", "datetime", field)[:1]
+    )
+
+
+@metrics.timed("aggregate")
+def temperature_stats(qs, threshold_high=None, threshold_low=None):
+    """Devuelve estadísticas de temperatura para un queryset de WeatherRecord"""
+    # Horas fuera de los umbrales en la misma consulta que los buckets diarios
+    extra = {}
+    if threshold_high is not None:
+        extra["above"] = Count("temperature", filter=Q(temperature__gt=threshold_high))
+    if threshold_low is not None:
+        extra["below"] = Count("temperature", filter=Q(temperature__lt=threshold_low))
+    days = _daily(qs, "temperature", **extra)
+    if not days:
+        return {}
+
+    total = sum(d["total"] for d in days)
+    count = sum(d["count"] for d in days)
+
+    # Máximo y mínimo en una sola consulta (UNION ALL)
+    extremes = {
+        row["kind"]: row
+        for row in _extreme(qs, "temperature", "max").union(
+            _extreme(qs, "temperature", "min"), all=True
+        )
+    }
+    max_row, min_row = extremes["max"], extremes["min"]
+
+    result = {
+        "average": round(total / count, 2),
+        "average_by_day": {str(d["date"]): round(d["total"] / d["count"], 2) for d in days},
+        "max": {"value": round(max_row["temperature"], 2), "date_time": max_row["datetime"].isoformat()},
+        "min": {"value": round(min_row["temperature"], 2), "date_time": min_row["datetime"].isoformat()},
+    }
+    if threshold_high is not None:
+        result["hours_above_threshold"] = sum(d["above"] for d in days)
+    if threshold_low is not None:
+        result["hours_below_threshold"] = sum(d["below"] for d in days)
+    logger.info("Calculated temperature stats in database")
+    return result
+
+
+@metrics.timed("aggregate")
+def precipitation_stats(qs):
+    """Devuelve estadísticas de precipitación para un queryset de WeatherRecord"""
+    days = _daily(qs, "precipitation")
+    if not days:
+        return {}
+
+    total = sum(d["total"] for d in days)
+    count = sum(d["count"] for d in days)
+    max_row = _extreme(qs, "precipitation", "max").get()
+
+    result = {
+        "total": round(total, 2),
+        "total_by_day": {str(d["date"]): round(d["total"], 2) for d in days},
+        "days_with_precipitation": sum(1 for d in days if d["total"] > 0),
+        "max": {"value": round(max_row["precipitation"], 2), "date": str(max_row["datetime"].date())},
+        "average": round(total / count, 2),
+    }
+    logger.info("Calculated precipitation stats in database")
+    return result
@@ -0,0 +1,81 @@
+from datetime import date
+import numpy as np
+from services.bulk_load import COPY_CHUNK_SIZE, copy_weather_series
+import logging
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------
+# Datos horarios sintéticos
+# ----------------------------
+# Series con la forma de las reales para probar y medir con muchos datos sin
+# llamar a Open-Meteo: ciclo anual (invertido en el hemisferio sur) y diario,
+# anomalías de varios días en vez de ruido independiente hora a hora, y
+# lluvia en episodios de varias horas separados por periodos secos. Todo es
+# determinista a partir de la semilla.
+
+ANOMALY_HOURS = 72  # Persistencia de las anomalías de temperatura
+RAIN_HOURS = 8  # Duración típica de un episodio de lluvia
+RAIN_THRESHOLD = 1.2  # Cuanto más alto, menos horas de lluvia (~10 % con 1.2)
+
+
+def _smoothed(rng, hours, scale):
+    """Ruido normal correlacionado en `scale` horas (media 0, desviación 1)"""
+    kernel = np.exp(-np.arange(4 * scale) / scale)
+    noise = np.convolve(rng.normal(size=hours + len(kernel) - 1), kernel, mode="valid")
+    return noise / np.sqrt((kernel ** 2).sum())
+
+
+def city_coordinates(rng):
+    """Latitud y longitud plausibles (sin los polos)"""
+    return round(float(rng.uniform(-60, 70)), 4), round(float(rng.uniform(-180, 180)), 4)
+
+
+def synthetic_hourly(latitude, start_date, end_date, rng):
+    """Serie horaria con el formato de Open-Meteo (time, temperature_2m,
+    precipitation) entre dos fechas (date o ISO), ambas incluidas"""
+    start = np.datetime64(str(start_date), "h")
+    end = np.datetime64(str(end_date), "h") + np.timedelta64(24, "h")
+    times = np.arange(start, end, dtype="datetime64[h]")
+    hours = len(times)
+
+    day_of_year = (times - times.astype("datetime64[Y]")).astype("timedelta64[D]").astype(int)
+    hour_of_day = (times - times.astype("datetime64[D]")).astype(int)
+    hemisphere = 1 if latitude >= 0 else -1
+    mean = 27 - 0.4 * abs(latitude)
+    amplitude = 3 + 0.2 * abs(latitude)
+
+    temperatures = (
+        mean
+        - hemisphere * amplitude * np.cos(2 * np.pi * (day_of_year - 15) / 365.25)
+        + 5 * np.sin(np.pi * (hour_of_day - 9) / 12)
+        + 3 * _smoothed(rng, hours, ANOMALY_HOURS)
+        + rng.normal(0, 0.4, hours)
+    )
+    wetness = _smoothed(rng, hours, RAIN_HOURS)
+    precipitations = np.where(wetness > RAIN_THRESHOLD, (wetness - RAIN_THRESHOLD) * rng.exponential(1.0, hours), 0.0)
+
+    return {
+        "time": np.datetime_as_string(times, unit="m").tolist(),
+        "temperature_2m": temperatures.round(1).tolist(),
+        "precipitation": precipitations.round(1).tolist(),
+    }
+
+
+def seed_cities(cities, years, end_year=None, seed=0, prefix="Synthetic", chunk_size=COPY_CHUNK_SIZE):
+    """Guarda `years` años completos (hasta end_year, por defecto el anterior
+    al actual) de `cities` ciudades llamadas "<prefix> 001", "<prefix> 002"...
+    Repetir con la misma semilla no cambia nada. Devuelve las cuentas por ciudad."""
+    end_year = end_year or date.today().year - 1
+    start_date, end_date = date(end_year - years + 1, 1, 1), date(end_year, 12, 31)
+    rng = np.random.default_rng(seed)
+
+    counts = {}
+    for index in range(1, cities + 1):
+        name = f"{prefix} {index:03d}"
+        latitude, longitude = city_coordinates(rng)
+        hourly = synthetic_hourly(latitude, start_date, end_date, rng)
+        # Una ciudad por escritura: la memoria no crece con el número de ciudades
+        counts.update(copy_weather_series([(name, latitude, longitude, hourly)], chunk_size))
+        logger.info("Synthetic data stored for %s: %d hours", name, len(hourly["time"]))
+    return counts
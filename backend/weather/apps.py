@@ -1,5 +1,13 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class WeatherConfig(AppConfig):
     name = "weather"
+
+    def ready(self):
+        if settings.WEATHER_METRICS_ENABLED:
+            from django.db.backends.signals import connection_created
+            from services import metrics
+
+            connection_created.connect(metrics.install_execute_wrapper)
@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from services.open_meteo import OpenMeteoService, PartialLoadError
+
+
+class Command(BaseCommand):
+    help = "Load historical hourly weather for one or more cities, streaming each window into PostgreSQL with COPY"
+
+    def add_arguments(self, parser):
+        parser.add_argument("cities", nargs="+", help="City names to load")
+        parser.add_argument("--start-date", required=True, help="First day (YYYY-MM-DD)")
+        parser.add_argument("--end-date", required=True, help="Last day (YYYY-MM-DD)")
+        parser.add_argument(
+            "--window-days",
+            type=int,
+            default=settings.WEATHER_FETCH_WINDOW_DAYS,
+            help="Days requested from the archive API per call",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.WEATHER_FETCH_WORKERS,
+            help="Windows downloaded concurrently",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=settings.WEATHER_COPY_CHUNK_SIZE,
+            help="Hours sent to PostgreSQL per COPY block",
+        )
+
+    def handle(self, *args, **options):
+        if options["start_date"] > options["end_date"]:
+            raise CommandError("start_date must be before end_date")
+
+        failed = []
+        for city in options["cities"]:
+            try:
+                counts = OpenMeteoService.load_weather(
+                    city,
+                    options["start_date"],
+                    options["end_date"],
+                    window_days=options["window_days"],
+                    chunk_size=options["chunk_size"],
+                    workers=options["workers"],
+                    window_retries=settings.WEATHER_FETCH_WINDOW_RETRIES,
+                )
+            except PartialLoadError as e:
+                # El resto de ventanas ya está guardado; repetir el comando solo pide lo que falta
+                failed.append(city)
+                self.stderr.write(f"{city}: {e} {e.failed_windows}")
+                continue
+
+            self.stdout.write(self.style.SUCCESS(
+                f"{city}: {counts['inserted']} inserted, {counts['updated']} updated, {counts['skipped']} skipped"
+            ))
+
+        if failed:
+            raise CommandError(f"Incomplete backfill for: {', '.join(failed)}. Run the command again to resume.")
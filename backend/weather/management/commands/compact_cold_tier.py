@@ -0,0 +1,42 @@
+from datetime import date
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from services import cold_tier
+
+
+class Command(BaseCommand):
+    help = "Compact the finished months of each city into the Arrow cold tier and verify it against the database"
+
+    def add_arguments(self, parser):
+        parser.add_argument("cities", nargs="*", help="Cities to compact (default: all)")
+        parser.add_argument("--before", help="First month left in PostgreSQL only (YYYY-MM, default: current month)")
+        parser.add_argument("--verify-only", action="store_true", help="Only check the files already compacted")
+
+    def handle(self, *args, **options):
+        if cold_tier.pa is None:
+            raise CommandError("The cold tier requires pyarrow")
+        if not settings.WEATHER_COLD_TIER_DIR:
+            raise CommandError("Set WEATHER_COLD_TIER_DIR to the cold tier directory")
+        before = None
+        if options["before"]:
+            try:
+                before = date.fromisoformat(f"{options['before']}-01")
+            except ValueError:
+                raise CommandError("--before must be a YYYY-MM month")
+
+        cities = options["cities"] or [None]
+        if not options["verify_only"]:
+            for city in cities:
+                for name, hours in cold_tier.compact(city, before).items():
+                    self.stdout.write(f"{name}: {hours} hours compacted")
+
+        problems = {}
+        for city in cities:
+            problems.update(cold_tier.verify(city))
+        for name, found in problems.items():
+            for problem in found:
+                self.stderr.write(f"{name}: {problem}")
+        failed = sum(1 for found in problems.values() if found)
+        if failed:
+            raise CommandError(f"{failed} of {len(problems)} cities failed verification")
+        self.stdout.write(self.style.SUCCESS(f"{len(problems)} cities verified in {settings.WEATHER_COLD_TIER_DIR}"))
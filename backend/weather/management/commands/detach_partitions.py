@@ -0,0 +1,37 @@
+from datetime import date
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from services.partitions import detach_partition, list_partitions, partition_name
+
+
+class Command(BaseCommand):
+    help = "Detach (and optionally archive and drop) the monthly WeatherRecord partitions older than a month"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--before", required=True, help="First month to keep (YYYY-MM)")
+        parser.add_argument("--archive-dir", help="Dump each detached partition to <dir>/<partition>.csv.gz")
+        parser.add_argument("--drop", action="store_true", help="Drop the detached tables")
+        parser.add_argument("--dry-run", action="store_true", help="Only list the partitions that would be detached")
+
+    def handle(self, *args, **options):
+        try:
+            before = date.fromisoformat(f"{options['before']}-01")
+        except ValueError:
+            raise CommandError("--before must be a YYYY-MM month")
+
+        archive_dir = None
+        if options["archive_dir"]:
+            archive_dir = Path(options["archive_dir"])
+            archive_dir.mkdir(parents=True, exist_ok=True)
+        elif options["drop"] and not options["dry_run"]:
+            self.stdout.write(self.style.WARNING("Dropping partitions without --archive-dir: their hourly rows are lost"))
+
+        months = [month for month in list_partitions() if month < before]
+        for month in months:
+            if options["dry_run"]:
+                self.stdout.write(partition_name(month))
+                continue
+            path = detach_partition(month, archive_dir=archive_dir, drop=options["drop"])
+            self.stdout.write(f"{partition_name(month)} detached" + (f" -> {path}" if path else ""))
+
+        self.stdout.write(self.style.SUCCESS(f"{len(months)} partitions {'to detach' if options['dry_run'] else 'detached'}"))
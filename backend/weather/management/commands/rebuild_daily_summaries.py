@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from services.rollup import rebuild_daily_summaries
+from services import stats_cache
+
+
+class Command(BaseCommand):
+    help = "Rebuild the DailyWeatherSummary rollup from the hourly WeatherRecord data"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--city", help="Only rebuild the summaries of this city")
+
+    def handle(self, *args, **options):
+        rows = rebuild_daily_summaries(city=options["city"])
+        if options["city"]:
+            stats_cache.invalidate(options["city"])
+        else:
+            stats_cache.clear()
+        self.stdout.write(self.style.SUCCESS(f"{rows} daily summaries rebuilt"))
@@ -0,0 +1,78 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from services.jobs import run_pending_jobs, run_worker
+import logging
+import multiprocessing
+import signal
+
+
+def _worker_main(poll_interval, stop_event):
+    # Cada proceso abre sus propias conexiones a la base de datos
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        run_worker(poll_interval, stop_event)
+    finally:
+        connections.close_all()
+        # multiprocessing sale con os._exit (sin atexit): se vacía aquí la cola de logging
+        logging.shutdown()
+
+
+class Command(BaseCommand):
+    help = "Consume queued LoadJob rows with a pool of worker processes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=settings.WEATHER_INGEST_WORKER_PROCESSES,
+            help="Worker processes to start",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=settings.WEATHER_INGEST_POLL_INTERVAL,
+            help="Seconds to wait when the queue is empty",
+        )
+        parser.add_argument("--once", action="store_true", help="Process the pending jobs and exit")
+
+    def handle(self, *args, **options):
+        if options["once"]:
+            processed = run_pending_jobs()
+            self.stdout.write(self.style.SUCCESS(f"{processed} jobs processed"))
+            return
+
+        if options["processes"] == 1:
+            self.stdout.write(f"Ingest worker started (pid {multiprocessing.current_process().pid})")
+            try:
+                run_worker(options["poll_interval"])
+            except KeyboardInterrupt:
+                pass
+            return
+
+        # Las conexiones abiertas (y el pool, si lo hay) no deben compartirse con los procesos hijos
+        connections.close_all()
+        for conn in connections.all(initialized_only=True):
+            conn.close_pool()
+        context = multiprocessing.get_context("fork")
+        stop_event = context.Event()
+        workers = [
+            context.Process(target=_worker_main, args=(options["poll_interval"], stop_event), daemon=True)
+            for _ in range(options["processes"])
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f"{len(workers)} ingest workers started")
+
+        def stop(signum, frame):
+            stop_event.set()
+
+        signal.signal(signal.SIGTERM, stop)
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            stop_event.set()
+            for worker in workers:
+                worker.join()
+        self.stdout.write("Ingest workers stopped")
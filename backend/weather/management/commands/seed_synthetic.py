@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from services.synthetic import seed_cities
+
+
+class Command(BaseCommand):
+    help = "Store realistic synthetic hourly weather for N cities x M years (for load tests and benchmarks)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--cities", type=int, default=10, help="Number of cities")
+        parser.add_argument("--years", type=int, default=1, help="Whole years per city")
+        parser.add_argument("--end-year", type=int, help="Last year stored (default: last year)")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed; the same seed gives the same data")
+        parser.add_argument("--prefix", default="Synthetic", help='City names are "<prefix> 001", "<prefix> 002"...')
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=settings.WEATHER_COPY_CHUNK_SIZE,
+            help="Hours sent to PostgreSQL per COPY block",
+        )
+
+    def handle(self, *args, **options):
+        if options["cities"] < 1 or options["years"] < 1:
+            raise CommandError("--cities and --years must be at least 1")
+
+        counts = seed_cities(
+            options["cities"],
+            options["years"],
+            end_year=options["end_year"],
+            seed=options["seed"],
+            prefix=options["prefix"],
+            chunk_size=options["chunk_size"],
+        )
+        inserted = sum(c["inserted"] for c in counts.values())
+        updated = sum(c["updated"] for c in counts.values())
+        skipped = sum(c["skipped"] for c in counts.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(counts)} cities: {inserted} inserted, {updated} updated, {skipped} skipped"
+        ))
@@ -0,0 +1,49 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from services import metrics
+import time
+
+
+class MetricsMiddleware:
+    """Mide cada petición (fases, consultas, filas) para /metrics y la cabecera Server-Timing.
+    Con WEATHER_METRICS_ENABLED = False Django no lo instala. Sirve para vistas
+    síncronas y async; las consultas las cuenta metrics.execute_wrapper."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.WEATHER_METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        current, token = metrics.start_request()
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.end_request(token)
+        return self._finish(request, response, current, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        current, token = metrics.start_request()
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.end_request(token)
+        return self._finish(request, response, current, time.perf_counter() - started)
+
+    def _finish(self, request, response, current, total):
+        match = request.resolver_match
+        endpoint = (match.url_name or match.view_name) if match else "unmatched"
+        metrics.record_request(current, endpoint, request.method, response.status_code, total)
+        if settings.WEATHER_SERVER_TIMING:
+            response["Server-Timing"] = current.server_timing(total)
+        return response
@@ -0,0 +1,69 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+REBUILD_SUMMARIES = """
+    INSERT INTO weather_dailyweathersummary (
+        city, date, count,
+        temperature_sum, temperature_min, temperature_min_at, temperature_max, temperature_max_at,
+        precipitation_sum, precipitation_max, hours_above_threshold, hours_below_threshold
+    )
+    SELECT
+        city,
+        (datetime AT TIME ZONE 'UTC')::date,
+        count(*),
+        sum(temperature),
+        min(temperature),
+        (array_agg(datetime ORDER BY temperature, datetime))[1],
+        max(temperature),
+        (array_agg(datetime ORDER BY temperature DESC, datetime))[1],
+        sum(precipitation),
+        max(precipitation),
+        count(*) FILTER (WHERE temperature > %s),
+        count(*) FILTER (WHERE temperature < %s)
+    FROM weather_weatherrecord
+    GROUP BY 1, 2
+"""
+
+
+def backfill_summaries(apps, schema_editor):
+    """Rellena el resumen diario con los datos horarios ya cargados"""
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(REBUILD_SUMMARIES, [settings.WEATHER_THRESHOLD_HIGH, settings.WEATHER_THRESHOLD_LOW])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("weather", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyWeatherSummary",
+            fields=[
+                ("summary_id", models.AutoField(primary_key=True, serialize=False)),
+                ("city", models.CharField(max_length=100)),
+                ("date", models.DateField()),
+                ("count", models.IntegerField()),
+                ("temperature_sum", models.FloatField()),
+                ("temperature_min", models.FloatField()),
+                ("temperature_min_at", models.DateTimeField()),
+                ("temperature_max", models.FloatField()),
+                ("temperature_max_at", models.DateTimeField()),
+                ("precipitation_sum", models.FloatField()),
+                ("precipitation_max", models.FloatField()),
+                ("hours_above_threshold", models.IntegerField()),
+                ("hours_below_threshold", models.IntegerField()),
+            ],
+            options={
+                "verbose_name": "Daily Weather Summary",
+                "verbose_name_plural": "Daily Weather Summaries",
+                "ordering": ["city", "date"],
+                "constraints": [models.UniqueConstraint(fields=("city", "date"), name="unique_daily_summary_city_date")],
+            },
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 6.0.2 on 2026-10-18 12:05
+
+from importlib import import_module
+from django.conf import settings
+from django.db import migrations, models
+
+
+DELETE_DUPLICATES = """
+    DELETE FROM weather_weatherrecord a
+    USING weather_weatherrecord b
+    WHERE a.city = b.city
+      AND a.datetime = b.datetime
+      AND a.record_id > b.record_id
+"""
+
+# Misma consulta que el relleno inicial del resumen diario
+REBUILD_SUMMARIES = import_module("weather.migrations.0002_daily_weather_summary").REBUILD_SUMMARIES
+
+
+def remove_duplicate_records(apps, schema_editor):
+    """Elimina horas duplicadas (se conserva la primera) y regenera el resumen diario"""
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(DELETE_DUPLICATES)
+        if cursor.rowcount:
+            cursor.execute("DELETE FROM weather_dailyweathersummary")
+            cursor.execute(REBUILD_SUMMARIES, [settings.WEATHER_THRESHOLD_HIGH, settings.WEATHER_THRESHOLD_LOW])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("weather", "0002_daily_weather_summary"),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_records, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="weatherrecord",
+            constraint=models.UniqueConstraint(
+                fields=("city", "datetime"), name="unique_weather_record_city_datetime"
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-18 12:20
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("weather", "0003_unique_weather_record_city_datetime"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="weatherrecord",
+            index=django.contrib.postgres.indexes.BrinIndex(fields=["datetime"], name="weather_record_datetime_brin"),
+        ),
+    ]
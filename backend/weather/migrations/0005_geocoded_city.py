@@ -0,0 +1,31 @@
+# Generated by Django 6.0.2 on 2026-10-18 13:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("weather", "0004_weather_record_datetime_brin"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GeocodedCity",
+            fields=[
+                ("geocoded_id", models.AutoField(primary_key=True, serialize=False)),
+                ("key", models.CharField(max_length=150, unique=True)),
+                ("found", models.BooleanField()),
+                ("name", models.CharField(blank=True, max_length=100)),
+                ("latitude", models.FloatField(null=True)),
+                ("longitude", models.FloatField(null=True)),
+                ("country", models.CharField(blank=True, max_length=100, null=True)),
+                ("geocoding_id", models.BigIntegerField(null=True)),
+                ("fetched_at", models.DateTimeField()),
+            ],
+            options={
+                "verbose_name": "Geocoded City",
+                "verbose_name_plural": "Geocoded Cities",
+            },
+        ),
+    ]
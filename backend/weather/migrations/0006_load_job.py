@@ -0,0 +1,41 @@
+# Generated by Django 6.0.2 on 2026-10-18 14:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("weather", "0005_geocoded_city"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LoadJob",
+            fields=[
+                ("job_id", models.AutoField(primary_key=True, serialize=False)),
+                ("city", models.CharField(max_length=100)),
+                ("start_date", models.DateField()),
+                ("end_date", models.DateField()),
+                ("dedup_key", models.CharField(max_length=200)),
+                ("state", models.CharField(choices=[("queued", "Queued"), ("running", "Running"), ("succeeded", "Succeeded"), ("failed", "Failed")], default="queued", max_length=10)),
+                ("progress", models.IntegerField(default=0)),
+                ("attempts", models.IntegerField(default=0)),
+                ("error", models.TextField(blank=True)),
+                ("result", models.JSONField(blank=True, null=True)),
+                ("run_after", models.DateTimeField(default=django.utils.timezone.now)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("started_at", models.DateTimeField(blank=True, null=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "verbose_name": "Load Job",
+                "verbose_name_plural": "Load Jobs",
+                "ordering": ["created_at"],
+                "indexes": [models.Index(fields=["state", "run_after"], name="load_job_state_run_after")],
+                "constraints": [models.UniqueConstraint(condition=models.Q(("state__in", ["queued", "running"])), fields=("dedup_key",), name="unique_in_flight_load_job")],
+            },
+        ),
+    ]
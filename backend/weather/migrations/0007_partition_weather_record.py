@@ -0,0 +1,112 @@
+# Generated by Django 6.0.2 on 2026-10-18 16:10
+
+from datetime import date
+from django.db import migrations
+from django.utils import timezone
+
+
+TABLE = "weather_weatherrecord"
+OLD = "weather_weatherrecord_old"
+COLUMNS = "record_id, city, latitude, longitude, datetime, temperature, precipitation"
+MONTHS_AHEAD = 3
+
+CREATE_PARTITIONED = f"""
+    CREATE TABLE {TABLE} (
+        record_id integer NOT NULL,
+        city varchar(100) NOT NULL,
+        latitude double precision NOT NULL,
+        longitude double precision NOT NULL,
+        datetime timestamp with time zone NOT NULL,
+        temperature double precision NOT NULL,
+        precipitation double precision NOT NULL,
+        CONSTRAINT weather_weatherrecord_pkey PRIMARY KEY (record_id, datetime),
+        CONSTRAINT unique_weather_record_city_datetime UNIQUE (city, datetime)
+    ) PARTITION BY RANGE (datetime)
+"""
+
+CREATE_PLAIN = f"""
+    CREATE TABLE {TABLE} (
+        record_id integer GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+        city varchar(100) NOT NULL,
+        latitude double precision NOT NULL,
+        longitude double precision NOT NULL,
+        datetime timestamp with time zone NOT NULL,
+        temperature double precision NOT NULL,
+        precipitation double precision NOT NULL,
+        CONSTRAINT unique_weather_record_city_datetime UNIQUE (city, datetime)
+    )
+"""
+
+
+def _rename_old(cursor):
+    """Libera los nombres de la tabla y de sus índices"""
+    cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {OLD}")
+    cursor.execute(f"ALTER INDEX weather_weatherrecord_pkey RENAME TO {OLD}_pkey")
+    cursor.execute(f"ALTER INDEX unique_weather_record_city_datetime RENAME TO {OLD}_city_datetime")
+    cursor.execute(f"ALTER INDEX weather_record_datetime_brin RENAME TO {OLD}_datetime_brin")
+
+
+def _next_month(month):
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def partition_by_month(apps, schema_editor):
+    """Convierte la tabla horaria en una tabla particionada por mes (UTC) de datetime.
+
+    Se crean las particiones de los meses con datos, la del mes actual y las
+    de los MONTHS_AHEAD siguientes, más una partición por defecto.
+    """
+    with schema_editor.connection.cursor() as cursor:
+        _rename_old(cursor)
+        cursor.execute(CREATE_PARTITIONED)
+        cursor.execute(f"CREATE INDEX weather_record_datetime_brin ON {TABLE} USING brin (datetime)")
+        cursor.execute(f"CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT")
+
+        cursor.execute(f"SELECT DISTINCT date_trunc('month', datetime AT TIME ZONE 'UTC')::date FROM {OLD}")
+        months = {row[0] for row in cursor.fetchall()}
+        month = timezone.now().date().replace(day=1)
+        for _ in range(MONTHS_AHEAD + 1):
+            months.add(month)
+            month = _next_month(month)
+        for month in sorted(months):
+            cursor.execute(
+                f"CREATE TABLE {TABLE}_p{month:%Y_%m} PARTITION OF {TABLE} "
+                f"FOR VALUES FROM ('{month} 00:00:00+00') TO ('{_next_month(month)} 00:00:00+00')"
+            )
+
+        cursor.execute(f"INSERT INTO {TABLE} ({COLUMNS}) SELECT {COLUMNS} FROM {OLD}")
+        cursor.execute(f"SELECT max(record_id) FROM {OLD}")
+        last_id = cursor.fetchone()[0]
+        cursor.execute(f"DROP TABLE {OLD}")
+
+        # Las tablas particionadas no admiten IDENTITY antes de PostgreSQL 17
+        cursor.execute(f"CREATE SEQUENCE {TABLE}_record_id_seq AS integer OWNED BY {TABLE}.record_id")
+        cursor.execute(f"ALTER TABLE {TABLE} ALTER COLUMN record_id SET DEFAULT nextval('{TABLE}_record_id_seq')")
+        if last_id:
+            cursor.execute(f"SELECT setval('{TABLE}_record_id_seq', %s)", [last_id])
+
+
+def unpartition(apps, schema_editor):
+    """Vuelve a una tabla sin particionar con las filas de las particiones enganchadas"""
+    with schema_editor.connection.cursor() as cursor:
+        _rename_old(cursor)
+        cursor.execute(f"ALTER SEQUENCE {TABLE}_record_id_seq RENAME TO {OLD}_record_id_seq")
+        cursor.execute(CREATE_PLAIN)
+        cursor.execute(f"CREATE INDEX weather_record_datetime_brin ON {TABLE} USING brin (datetime)")
+        cursor.execute(f"INSERT INTO {TABLE} ({COLUMNS}) SELECT {COLUMNS} FROM {OLD}")
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence('{TABLE}', 'record_id'), "
+            f"coalesce((SELECT max(record_id) FROM {TABLE}), 1))"
+        )
+        cursor.execute(f"DROP TABLE {OLD}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("weather", "0006_load_job"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_by_month, unpartition),
+    ]
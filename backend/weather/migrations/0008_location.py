@@ -0,0 +1,86 @@
+# Generated by Django 6.0.2 on 2026-10-18 17:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+DISTINCT_CITIES = """
+    SELECT DISTINCT ON (city) city, latitude, longitude
+    FROM weather_weatherrecord
+    ORDER BY city, datetime DESC
+"""
+
+LINK_RECORDS = """
+    UPDATE weather_weatherrecord r
+    SET location_id = l.location_id
+    FROM weather_location l
+    WHERE r.city = l.name
+"""
+
+
+def create_locations(apps, schema_editor):
+    """Una Location por ciudad con datos (coordenadas de su última hora), con país
+    e id de geocoding si la ciudad está en la caché de geocoding, y enlaza las horas"""
+    Location = apps.get_model("weather", "Location")
+    GeocodedCity = apps.get_model("weather", "GeocodedCity")
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(DISTINCT_CITIES)
+        cities = cursor.fetchall()
+
+    geocoded = {
+        row.key: row
+        for row in GeocodedCity.objects.filter(found=True, key__endswith="|en")
+    }
+    locations = []
+    for city, latitude, longitude in cities:
+        row = geocoded.get(f"{' '.join(city.casefold().split())}|en")
+        locations.append(Location(
+            name=city,
+            latitude=latitude,
+            longitude=longitude,
+            country=(row.country or "") if row else "",
+            geocoding_id=row.geocoding_id if row else None,
+        ))
+    Location.objects.bulk_create(locations, batch_size=1000)
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(LINK_RECORDS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("weather", "0007_partition_weather_record"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Location",
+            fields=[
+                ("location_id", models.AutoField(primary_key=True, serialize=False)),
+                ("name", models.CharField(max_length=100, unique=True)),
+                ("country", models.CharField(blank=True, max_length=100)),
+                ("latitude", models.FloatField()),
+                ("longitude", models.FloatField()),
+                ("geocoding_id", models.BigIntegerField(blank=True, null=True)),
+            ],
+            options={
+                "verbose_name": "Location",
+                "verbose_name_plural": "Locations",
+                "ordering": ["name"],
+            },
+        ),
+        migrations.AddField(
+            model_name="weatherrecord",
+            name="location",
+            field=models.ForeignKey(
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="records",
+                to="weather.location",
+            ),
+        ),
+        migrations.RunPython(create_locations, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 6.0.2 on 2026-10-18 17:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+RESTORE_CITY = """
+    UPDATE weather_weatherrecord r
+    SET city = l.name, latitude = l.latitude, longitude = l.longitude
+    FROM weather_location l
+    WHERE r.location_id = l.location_id
+"""
+
+
+def restore_city(apps, schema_editor):
+    """Vuelve a copiar ciudad y coordenadas de Location en cada hora"""
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(RESTORE_CITY)
+
+
+class Migration(migrations.Migration):
+    # Separada de 0008: PostgreSQL no deja alterar la tabla en la misma
+    # transacción que el UPDATE que enlaza las horas (la FK es diferida)
+
+    dependencies = [
+        ("weather", "0008_location"),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name="weatherrecord",
+            name="unique_weather_record_city_datetime",
+        ),
+        # Nullables para poder deshacer la migración: se rellenan en restore_city
+        migrations.AlterField(
+            model_name="weatherrecord",
+            name="city",
+            field=models.CharField(max_length=100, null=True),
+        ),
+        migrations.AlterField(
+            model_name="weatherrecord",
+            name="latitude",
+            field=models.FloatField(null=True),
+        ),
+        migrations.AlterField(
+            model_name="weatherrecord",
+            name="longitude",
+            field=models.FloatField(null=True),
+        ),
+        migrations.RunPython(migrations.RunPython.noop, restore_city),
+        migrations.RemoveField(
+            model_name="weatherrecord",
+            name="city",
+        ),
+        migrations.RemoveField(
+            model_name="weatherrecord",
+            name="latitude",
+        ),
+        migrations.RemoveField(
+            model_name="weatherrecord",
+            name="longitude",
+        ),
+        migrations.AlterField(
+            model_name="weatherrecord",
+            name="location",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="records",
+                to="weather.location",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="weatherrecord",
+            constraint=models.UniqueConstraint(
+                fields=("location", "datetime"), name="unique_weather_record_location_datetime"
+            ),
+        ),
+    ]
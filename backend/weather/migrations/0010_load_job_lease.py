@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-18 21:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("weather", "0009_weather_record_location"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="loadjob",
+            name="lease",
+            field=models.UUIDField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 6.0.2 on 2026-10-18 21:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("weather", "0010_load_job_lease"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="location",
+            name="data_version",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 6.0.2 on 2026-10-18 23:10
+
+from django.db import migrations, models
+
+
+# Triggers de sentencia (una vez por INSERT / DELETE, no por fila) sobre la
+# tabla particionada: cuentan las horas de cada ciudad al escribirlas, vengan
+# del ingest, de bulk_create o de SQL a mano. Mover filas entre particiones
+# (services.partitions) o archivar un mes no pasa por la tabla padre y no
+# cambia la cuenta, igual que no cambia el resumen diario.
+CREATE_TRIGGERS = """
+    CREATE FUNCTION weather_location_count_hours() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            UPDATE weather_location l SET hours = l.hours + n.hours
+            FROM (SELECT location_id, count(*) AS hours FROM new_rows GROUP BY location_id) n
+            WHERE l.location_id = n.location_id;
+        ELSE
+            UPDATE weather_location l SET hours = l.hours - o.hours
+            FROM (SELECT location_id, count(*) AS hours FROM old_rows GROUP BY location_id) o
+            WHERE l.location_id = o.location_id;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql;
+
+    CREATE TRIGGER weather_record_count_inserted AFTER INSERT ON weather_weatherrecord
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION weather_location_count_hours();
+    CREATE TRIGGER weather_record_count_deleted AFTER DELETE ON weather_weatherrecord
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION weather_location_count_hours();
+
+    UPDATE weather_location l SET hours = r.hours
+    FROM (SELECT location_id, count(*) AS hours FROM weather_weatherrecord GROUP BY location_id) r
+    WHERE l.location_id = r.location_id;
+"""
+
+DROP_TRIGGERS = """
+    DROP TRIGGER weather_record_count_deleted ON weather_weatherrecord;
+    DROP TRIGGER weather_record_count_inserted ON weather_weatherrecord;
+    DROP FUNCTION weather_location_count_hours();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("weather", "0011_location_data_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="location",
+            name="hours",
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.RunSQL(CREATE_TRIGGERS, DROP_TRIGGERS),
+    ]
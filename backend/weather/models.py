@@ -1,10 +1,36 @@
+from django.contrib.postgres.indexes import BrinIndex
 from django.db import models
+from django.utils import timezone
 
-class WeatherRecord(models.Model):
-    record_id = models.AutoField(primary_key=True)  # ID único
-    city = models.CharField(max_length=100)
+class Location(models.Model):
+    """Ciudad tal y como se pide en ?city= / /api/load/, con los datos del geocoding API"""
+    location_id = models.AutoField(primary_key=True)
+    name = models.CharField(max_length=100, unique=True)
+    country = models.CharField(max_length=100, blank=True)
     latitude = models.FloatField()
     longitude = models.FloatField()
+    geocoding_id = models.BigIntegerField(null=True, blank=True)
+    # Última escritura de datos horarios: versión de sus respuestas en la caché de estadísticas
+    data_version = models.DateTimeField(default=timezone.now)
+    # Horas guardadas de la ciudad; la llevan triggers de la tabla horaria (migración 0012)
+    hours = models.BigIntegerField(default=0, editable=False)
+
+    class Meta:
+        ordering = ['name']
+        verbose_name = "Location"
+        verbose_name_plural = "Locations"
+
+    def __str__(self):
+        return f"{self.name} ({self.latitude}, {self.longitude})"
+
+
+class WeatherRecord(models.Model):
+    """Dato horario. En PostgreSQL la tabla está particionada por mes de datetime
+    (migración 0007, services.partitions); su clave primaria real es (record_id, datetime)."""
+    record_id = models.AutoField(primary_key=True)  # ID único
+    # Ciudad y coordenadas en Location: cada hora solo guarda un entero.
+    # Sin índice propio: lo cubre el índice único (location, datetime)
+    location = models.ForeignKey(Location, on_delete=models.PROTECT, related_name="records", db_index=False)
     datetime = models.DateTimeField()
     temperature = models.FloatField()
     precipitation = models.FloatField()
@@ -13,6 +39,117 @@ class WeatherRecord(models.Model):
         ordering = ['datetime']
         verbose_name = "Weather Record"
         verbose_name_plural = "Weather Records"
+        constraints = [
+            # Su índice B-tree (location, datetime) sirve a los filtros por ciudad y rango
+            models.UniqueConstraint(fields=['location', 'datetime'], name='unique_weather_record_location_datetime'),
+        ]
+        indexes = [
+            # Datos horarios que se añaden casi siempre en orden: BRIN ocupa muy poco
+            BrinIndex(fields=['datetime'], name='weather_record_datetime_brin'),
+        ]
+
+    @property
+    def city(self):
+        return self.location.name
 
     def __str__(self):
         return f"{self.city} - {self.datetime} - Temp: {self.temperature}°C"
+
+
+class DailyWeatherSummary(models.Model):
+    """Resumen diario por ciudad, mantenido al ingerir WeatherRecord"""
+    summary_id = models.AutoField(primary_key=True)
+    city = models.CharField(max_length=100)
+    date = models.DateField()
+    count = models.IntegerField()  # Horas agregadas
+    temperature_sum = models.FloatField()
+    temperature_min = models.FloatField()
+    temperature_min_at = models.DateTimeField()
+    temperature_max = models.FloatField()
+    temperature_max_at = models.DateTimeField()
+    precipitation_sum = models.FloatField()
+    precipitation_max = models.FloatField()
+    hours_above_threshold = models.IntegerField()
+    hours_below_threshold = models.IntegerField()
+
+    class Meta:
+        ordering = ['city', 'date']
+        verbose_name = "Daily Weather Summary"
+        verbose_name_plural = "Daily Weather Summaries"
+        constraints = [
+            models.UniqueConstraint(fields=['city', 'date'], name='unique_daily_summary_city_date'),
+        ]
+
+    def __str__(self):
+        return f"{self.city} - {self.date} - {self.count}h"
+
+
+class GeocodedCity(models.Model):
+    """Caché persistente del geocoding API (incluye las ciudades no encontradas)"""
+    geocoded_id = models.AutoField(primary_key=True)
+    key = models.CharField(max_length=150, unique=True)  # Nombre normalizado + idioma
+    found = models.BooleanField()
+    name = models.CharField(max_length=100, blank=True)
+    latitude = models.FloatField(null=True)
+    longitude = models.FloatField(null=True)
+    country = models.CharField(max_length=100, null=True, blank=True)
+    geocoding_id = models.BigIntegerField(null=True)  # id de Open-Meteo
+    fetched_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Geocoded City"
+        verbose_name_plural = "Geocoded Cities"
+
+    def __str__(self):
+        return f"{self.key} - {self.name if self.found else 'not found'}"
+
+
+class LoadJob(models.Model):
+    """Carga de datos pendiente o en curso, consumida por `manage.py run_ingest_worker`"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    STATES = [
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (SUCCEEDED, "Succeeded"),
+        (FAILED, "Failed"),
+    ]
+    IN_FLIGHT = [QUEUED, RUNNING]
+
+    job_id = models.AutoField(primary_key=True)
+    city = models.CharField(max_length=100)
+    start_date = models.DateField()
+    end_date = models.DateField()
+    dedup_key = models.CharField(max_length=200)  # Ciudad normalizada + rango
+    state = models.CharField(max_length=10, choices=STATES, default=QUEUED)
+    progress = models.IntegerField(default=0)  # Porcentaje de ventanas procesadas
+    attempts = models.IntegerField(default=0)
+    lease = models.UUIDField(null=True, blank=True)  # Token del worker que lo ejecuta (cambia en cada intento)
+    error = models.TextField(blank=True)
+    result = models.JSONField(null=True, blank=True)  # inserted / updated / skipped
+    run_after = models.DateTimeField(default=timezone.now)  # Reintentos con espera
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        verbose_name = "Load Job"
+        verbose_name_plural = "Load Jobs"
+        constraints = [
+            # Un solo trabajo en cola o en curso por ciudad y rango
+            models.UniqueConstraint(
+                fields=['dedup_key'],
+                condition=models.Q(state__in=['queued', 'running']),
+                name='unique_in_flight_load_job',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['state', 'run_after'], name='load_job_state_run_after'),
+        ]
+
+    def __str__(self):
+        return f"Job {self.job_id} - {self.city} {self.start_date}..{self.end_date} - {self.state}"
@@ -0,0 +1,58 @@
+from datetime import date, datetime, time, timedelta
+import math
+from django.utils import timezone
+
+# ----------------------------
+# Filtros comunes de las vistas
+# ----------------------------
+# Las fechas se traducen a un rango semiabierto [inicio, fin + 1 día) sobre
+# la columna datetime en vez de `datetime__date`, que convierte la columna a
+# fecha y deja sin uso los índices (location, datetime) y BRIN(datetime).
+
+
+def as_date(day):
+    """Acepta un date o una cadena ISO (YYYY-MM-DD)"""
+    return date.fromisoformat(day) if isinstance(day, str) else day
+
+
+def day_start(day):
+    """Medianoche (en la zona horaria actual) del día dado"""
+    return timezone.make_aware(datetime.combine(as_date(day), time.min))
+
+
+def filter_records(qs, city=None, start_date=None, end_date=None):
+    """Filtra un queryset de WeatherRecord por ciudad (nombre de su Location) y rango
+    de fechas (ambas incluidas)"""
+    if city:
+        qs = qs.filter(location__name=city)
+    if start_date:
+        qs = qs.filter(datetime__gte=day_start(start_date))
+    if end_date:
+        qs = qs.filter(datetime__lt=day_start(as_date(end_date) + timedelta(days=1)))
+    return qs
+
+
+def filter_summaries(qs, city=None, start_date=None, end_date=None):
+    """Filtra un queryset de DailyWeatherSummary por ciudad y rango de fechas (ambas incluidas)"""
+    if city:
+        qs = qs.filter(city=city)
+    if start_date:
+        qs = qs.filter(date__gte=start_date)
+    if end_date:
+        qs = qs.filter(date__lte=end_date)
+    return qs
+
+
+def thresholds(params):
+    """Umbrales opcionales threshold_high / threshold_low (°C) de los parámetros GET.
+    Lanza ValueError si no son números."""
+    result = {}
+    for name in ("threshold_high", "threshold_low"):
+        value = params.get(name)
+        if value is None or value == "":
+            result[name] = None
+            continue
+        result[name] = float(value)
+        if not math.isfinite(result[name]):
+            raise ValueError(f"{name} must be a finite number")
+    return result
@@ -0,0 +1,40 @@
+import pytest
+import copy
+import logging.config
+from django.conf import settings
+from django.core.cache import cache
+from services import geocoding_cache, http_client
+from fake_open_meteo import FakeOpenMeteo
+
+
+@pytest.fixture(autouse=True, scope="session")
+def log_dir(tmp_path_factory):
+    """Los logs de los tests van a un directorio temporal, no a backend/logs"""
+    settings.WEATHER_LOG_DIR = tmp_path_factory.mktemp("logs")
+    config = copy.deepcopy(settings.LOGGING)
+    config["handlers"]["file"]["directory"] = settings.WEATHER_LOG_DIR
+    logging.config.dictConfig(config)
+    return settings.WEATHER_LOG_DIR
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """La caché en memoria sobrevive entre tests; la base de datos no"""
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def open_meteo_server(settings):
+    """Servidor Open-Meteo falso en local; los servicios apuntan a él durante el test"""
+    server = FakeOpenMeteo().start()
+    settings.OPEN_METEO_GEOCODING_URL = server.geocoding_url
+    settings.OPEN_METEO_ARCHIVE_URL = server.archive_url
+    settings.OPEN_METEO_BACKOFF_FACTOR = 0.01
+    http_client.reset()
+    geocoding_cache.clear()
+    yield server
+    http_client.reset()
+    geocoding_cache.clear()
+    server.stop()
@@ -0,0 +1,135 @@
+from collections import deque
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+import json
+import math
+import threading
+import time
+import zlib
+
+# ---------------------------
+# Servidor Open-Meteo falso
+# ---------------------------
+# Imita /v1/search (geocoding) y /v1/archive en 127.0.0.1 para probar
+# latencia, reintentos y circuit breaker sin red. Los datos son
+# deterministas: dependen solo del nombre de la ciudad y de la fecha.
+
+
+def fake_coordinates(name):
+    """Coordenadas estables a partir del nombre"""
+    seed = zlib.crc32(name.lower().encode())
+    return round((seed % 18000) / 100 - 90, 4), round((seed // 18000 % 36000) / 100 - 180, 4)
+
+
+def fake_hourly(latitude, start_date, end_date):
+    """Serie horaria (time, temperature_2m, precipitation) entre dos fechas ISO"""
+    start = datetime.combine(date.fromisoformat(start_date), datetime.min.time())
+    hours = ((date.fromisoformat(end_date) - date.fromisoformat(start_date)).days + 1) * 24
+    times, temperatures, precipitations = [], [], []
+    for h in range(hours):
+        moment = start + timedelta(hours=h)
+        times.append(moment.strftime("%Y-%m-%dT%H:%M"))
+        season = math.cos(2 * math.pi * (moment.timetuple().tm_yday - 200) / 365)
+        temperatures.append(round(15 - abs(latitude) / 6 + 10 * season + 6 * math.sin(math.pi * (moment.hour - 9) / 12), 1))
+        precipitations.append(round(max(0.0, 2 * math.sin(h / 7.0) - 1.4), 1))
+    return {"time": times, "temperature_2m": temperatures, "precipitation": precipitations}
+
+
+class FakeOpenMeteo:
+    """Servidor HTTP local. `script` encola respuestas forzadas (status, headers, body)
+    que se sirven antes que las normales; `latency` añade espera a cada petición."""
+
+    def __init__(self):
+        self.latency = 0.0
+        self.unknown_cities = set()
+        self.requests = []
+        self._script = deque()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    @property
+    def geocoding_url(self):
+        return f"{self.url}/v1/search"
+
+    @property
+    def archive_url(self):
+        return f"{self.url}/v1/archive"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def script(self, status, headers=None, body=None, times=1):
+        """Encola `times` respuestas forzadas"""
+        for _ in range(times):
+            self._script.append((status, headers or {}, body if body is not None else {"error": True}))
+
+    def count(self, path):
+        return sum(1 for p, _ in self.requests if p == path)
+
+    def respond(self, path, params):
+        with self._lock:
+            self.requests.append((path, params))
+            if self._script:
+                return self._script.popleft()
+
+        if path == "/v1/search":
+            name = params.get("name", "")
+            if name in self.unknown_cities:
+                return 200, {}, {"generationtime_ms": 0.1}
+            latitude, longitude = fake_coordinates(name)
+            return 200, {}, {"results": [{
+                "id": zlib.crc32(name.encode()), "name": name, "latitude": latitude,
+                "longitude": longitude, "country": "Fakeland",
+            }]}
+        if path == "/v1/archive":
+            # Varias coordenadas separadas por comas -> lista de respuestas en el mismo orden
+            locations = [
+                {
+                    "latitude": float(latitude),
+                    "longitude": float(longitude),
+                    "timezone": "UTC",
+                    "hourly": fake_hourly(float(latitude), params["start_date"], params["end_date"]),
+                }
+                for latitude, longitude in zip(params["latitude"].split(","), params["longitude"].split(","))
+            ]
+            return 200, {}, locations if len(locations) > 1 else locations[0]
+        return 404, {}, {"error": True, "reason": "Not found"}
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                params = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+                if fake.latency:
+                    time.sleep(fake.latency)
+                status, headers, body = fake.respond(parts.path, params)
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,120 @@
+import pytest
+import asyncio
+import time
+import httpx
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from django.urls import reverse
+from weather.models import Location, WeatherRecord
+from services import http_client
+from services.open_meteo import OpenMeteoService
+
+# ---------------------------
+# Fixtures
+# ---------------------------
+def run(coroutine_function, *args, **kwargs):
+    """Ejecuta una corrutina desde un test síncrono (misma conexión y transacción del test)"""
+    return async_to_sync(coroutine_function)(*args, **kwargs)
+
+# ---------------------------
+# Tests
+# ---------------------------
+@pytest.mark.django_db
+def test_concurrent_loads_share_one_thread(open_meteo_server):
+    open_meteo_server.latency = 0.3
+    cities = [f"City {i}" for i in range(20)]
+
+    async def load_all():
+        return await asyncio.gather(*(
+            OpenMeteoService.aload_weather(city, "2024-07-01", "2024-07-02") for city in cities
+        ))
+
+    started = time.monotonic()
+    results = run(load_all)
+
+    # 20 cargas x (geocoding + archive) x 0.3 s en serie serían 12 s
+    assert time.monotonic() - started < 4
+    assert results == [{"inserted": 48, "updated": 0, "skipped": 0}] * 20
+    assert Location.objects.count() == 20
+    assert WeatherRecord.objects.count() == 20 * 48
+
+@pytest.mark.django_db
+def test_async_load_only_fetches_gaps(open_meteo_server):
+    run(OpenMeteoService.aload_weather, "Madrid", "2024-07-02", "2024-07-02")
+
+    counts = run(OpenMeteoService.aload_weather, "Madrid", "2024-07-01", "2024-07-03", window_days=1, workers=2)
+
+    assert counts == {"inserted": 48, "updated": 0, "skipped": 24}
+    assert open_meteo_server.count("/v1/archive") == 3
+    # La segunda carga toma las coordenadas de la caché de geocoding
+    assert open_meteo_server.count("/v1/search") == 1
+
+def test_aget_retries_5xx_then_succeeds(open_meteo_server):
+    open_meteo_server.script(503, times=2)
+
+    coords = run(OpenMeteoService.ageocode, "Madrid")
+
+    assert coords["name"] == "Madrid"
+    assert open_meteo_server.count("/v1/search") == 3
+
+def test_aget_gives_up_and_opens_circuit(open_meteo_server, settings):
+    settings.OPEN_METEO_RETRIES = 1
+    settings.OPEN_METEO_BREAKER_THRESHOLD = 1
+    open_meteo_server.script(500, times=2)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        run(OpenMeteoService.ageocode, "Madrid")
+    with pytest.raises(http_client.CircuitOpenError):
+        run(OpenMeteoService.ageocode, "Madrid")
+    assert open_meteo_server.count("/v1/search") == 2
+
+def test_aget_honors_retry_after(open_meteo_server):
+    open_meteo_server.script(429, headers={"Retry-After": "1"})
+
+    started = time.monotonic()
+    run(OpenMeteoService.ageocode, "Madrid")
+
+    assert time.monotonic() - started >= 1
+
+def test_aget_long_retry_after_fails_fast(open_meteo_server):
+    open_meteo_server.script(429, headers={"Retry-After": "3600"})
+
+    started = time.monotonic()
+    with pytest.raises(httpx.HTTPStatusError):
+        run(OpenMeteoService.ageocode, "Madrid")
+
+    assert time.monotonic() - started < 1
+    assert open_meteo_server.count("/v1/search") == 1
+
+@pytest.mark.django_db
+def test_load_view_under_asgi(open_meteo_server, settings):
+    settings.WEATHER_LOAD_ASYNC = False
+
+    response = run(AsyncClient().post, reverse("load_weather"), {
+        "city": "Madrid", "start_date": "2024-07-01", "end_date": "2024-07-01",
+    }, content_type="application/json")
+
+    assert response.status_code == 200
+    assert response.json()["inserted"] == 24
+    assert "upstream;dur=" in response["Server-Timing"]
+    assert "queries" in response["Server-Timing"]  # Consultas hechas desde el hilo de sync_to_async
+
+@pytest.mark.django_db
+def test_async_client_closed_after_each_load(open_meteo_server, monkeypatch):
+    clients = []
+
+    class SpyClient(httpx.AsyncClient):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            clients.append(self)
+
+    monkeypatch.setattr(http_client.httpx, "AsyncClient", SpyClient)
+
+    # Fuera de ASGI cada llamada corre en un event loop nuevo, como una petición bajo WSGI
+    run(OpenMeteoService.aload_weather, "Madrid", "2024-07-01", "2024-07-02", window_days=1, workers=2)
+    run(OpenMeteoService.aload_weather, "Bilbao", "2024-07-01", "2024-07-01")
+
+    # Un cliente por carga (geocoding y ventanas comparten conexiones) y ninguno queda abierto
+    assert len(clients) == 2
+    assert all(client.is_closed for client in clients)
+    assert http_client._async_client.get() is None
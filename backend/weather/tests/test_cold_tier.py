@@ -0,0 +1,139 @@
+import pytest
+import datetime
+import json
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from weather.models import WeatherRecord
+from services import cold_tier
+from services.open_meteo import OpenMeteoService
+from fake_open_meteo import fake_hourly
+
+pytest.importorskip("pyarrow")
+
+# ---------------------------
+# Fixtures
+# ---------------------------
+@pytest.fixture
+def api_client():
+    """Cliente API de DRF para tests"""
+    return APIClient()
+
+@pytest.fixture
+def cold_dir(settings, tmp_path):
+    """Tier frío en un directorio temporal y estadísticas con el backend pandas"""
+    settings.WEATHER_COLD_TIER_DIR = str(tmp_path / "cold")
+    settings.WEATHER_STATS_BACKEND = "pandas"
+    return tmp_path / "cold"
+
+def store(city, start_date, end_date, latitude=40.4, hourly=None):
+    hourly = hourly or fake_hourly(latitude, start_date, end_date)
+    OpenMeteoService.store_weather_data(city, latitude, -3.7, {"hourly": hourly})
+
+def get(api_client, name, **params):
+    cache.clear()
+    response = api_client.get(reverse(name), params)
+    assert response.status_code == 200
+    return response.json()
+
+def from_database(api_client, settings, name, **params):
+    """La misma respuesta sin el tier frío"""
+    cold_dir, settings.WEATHER_COLD_TIER_DIR = settings.WEATHER_COLD_TIER_DIR, ""
+    try:
+        return get(api_client, name, **params)
+    finally:
+        settings.WEATHER_COLD_TIER_DIR = cold_dir
+
+# ---------------------------
+# Tests
+# ---------------------------
+@pytest.mark.django_db
+def test_compact_writes_finished_months(cold_dir):
+    store("Madrid", "2019-12-30", "2020-02-02")
+
+    assert call_command("compact_cold_tier", "--before", "2020-02") is None
+    entry = cold_tier.manifest()["Madrid"]
+    assert (entry["start"], entry["end"], entry["rows"]) == ("2019-12-01", "2020-02-01", 33 * 24)
+    assert (cold_dir / entry["file"]).exists()
+
+    # Incremental: solo se añade febrero
+    assert cold_tier.compact("Madrid", datetime.date(2020, 3, 1)) == {"Madrid": 2 * 24}
+    assert cold_tier.manifest()["Madrid"]["rows"] == 35 * 24
+    assert cold_tier.verify() == {"Madrid": []}
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("name, params", [
+    ("temperature_stats", {"city": "Madrid", "threshold_high": 20}),
+    ("temperature_stats", {"city": "Madrid", "start_date": "2020-01-15", "end_date": "2020-02-01"}),
+    ("precipitation_stats", {"city": "Madrid", "start_date": "2019-12-31"}),
+    ("precipitation_stats", {"city": "Sevilla"}),
+    ("global_stats", {}),
+    ("global_stats", {"end_date": "2020-01-10"}),
+])
+def test_stats_match_database(api_client, settings, cold_dir, name, params):
+    store("Madrid", "2019-12-30", "2020-02-02")
+    store("Sevilla", "2020-01-20", "2020-02-05", latitude=37.4)
+    cold_tier.compact(before=datetime.date(2020, 2, 1))
+
+    assert get(api_client, name, **params) == from_database(api_client, settings, name, **params)
+
+@pytest.mark.django_db
+def test_cold_months_are_not_read_from_database(api_client, cold_dir):
+    store("Madrid", "2019-12-30", "2020-02-02")
+    cold_tier.compact(before=datetime.date(2020, 2, 1))
+    qs = WeatherRecord.objects.filter(location__name="Madrid")
+
+    with CaptureQueriesContext(connection) as queries:
+        df = cold_tier.records_frame(qs, "datetime", "temperature", city="Madrid")
+
+    assert len(df) == 35 * 24
+    assert df["datetime"].is_monotonic_increasing
+    copy, = [q["sql"] for q in queries.captured_queries if q["sql"].startswith("COPY")]
+    assert "2020-02-01" in copy  # Solo las horas desde el final del tier frío
+
+@pytest.mark.django_db
+def test_dropped_partitions_are_still_served(api_client, settings, cold_dir):
+    store("Madrid", "2019-12-30", "2020-01-02")
+    expected = get(api_client, "temperature_stats", city="Madrid")
+    cold_tier.compact(before=datetime.date(2020, 1, 1))
+    call_command("detach_partitions", "--before", "2020-01", "--drop")
+
+    assert WeatherRecord.objects.count() == 2 * 24
+    assert get(api_client, "temperature_stats", city="Madrid") == expected
+    # Los meses sin datos horarios se comprueban contra el resumen diario
+    assert cold_tier.verify() == {"Madrid": []}
+
+@pytest.mark.django_db
+def test_writes_into_compacted_months_cut_the_tier(api_client, settings, cold_dir):
+    store("Madrid", "2019-12-30", "2020-02-02")
+    cold_tier.compact(before=datetime.date(2020, 2, 1))
+
+    hourly = fake_hourly(40.4, "2020-01-10", "2020-01-10")
+    hourly["temperature_2m"] = [45.0] * 24
+    store("Madrid", "2020-01-10", "2020-01-10", hourly=hourly)
+
+    assert cold_tier.manifest()["Madrid"]["end"] == "2020-01-01"
+    result = get(api_client, "temperature_stats", city="Madrid")
+    assert result["temperature"]["max"]["value"] == 45.0
+    assert result == from_database(api_client, settings, "temperature_stats", city="Madrid")
+
+@pytest.mark.django_db
+def test_verify_detects_changed_files(cold_dir):
+    store("Madrid", "2019-12-30", "2020-01-02")
+    cold_tier.compact(before=datetime.date(2020, 2, 1))
+
+    manifest = cold_dir / cold_tier.MANIFEST
+    data = json.loads(manifest.read_text())
+    data["cities"]["Madrid"]["sha256"] = "0" * 64
+    manifest.write_text(json.dumps(data))
+
+    with pytest.raises(CommandError, match="1 of 1 cities failed"):
+        call_command("compact_cold_tier", "--verify-only")
+
+def test_command_needs_directory(settings):
+    settings.WEATHER_COLD_TIER_DIR = ""
+    with pytest.raises(CommandError, match="WEATHER_COLD_TIER_DIR"):
+        call_command("compact_cold_tier")
@@ -0,0 +1,126 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from weather.models import DailyWeatherSummary, Location, WeatherRecord
+from services.open_meteo import OpenMeteoService
+from fake_open_meteo import fake_hourly
+import datetime
+
+# ---------------------------
+# Fixtures
+# ---------------------------
+@pytest.fixture
+def api_client():
+    """Cliente API de DRF para tests"""
+    return APIClient()
+
+@pytest.fixture
+def cities(db):
+    """Madrid del 1 al 5 de julio de 2024 y Sevilla del 3 al 7"""
+    OpenMeteoService.store_weather_data("Madrid", 40.4, -3.7, {"hourly": fake_hourly(40.4, "2024-07-01", "2024-07-05")})
+    OpenMeteoService.store_weather_data("Sevilla", 37.4, -6.0, {"hourly": fake_hourly(37.4, "2024-07-03", "2024-07-07")})
+
+def get_compare(api_client, **params):
+    cache.clear()
+    return api_client.get(reverse("compare"), params)
+
+def get_stats(api_client, name, city):
+    cache.clear()
+    return api_client.get(reverse(name), {"city": city}).json()
+
+# ---------------------------
+# Tests
+# ---------------------------
+@pytest.mark.parametrize("backend", ["rollup", "database"])
+def test_compare_matches_city_endpoints(api_client, cities, settings, backend):
+    settings.WEATHER_STATS_BACKEND = backend
+    body = get_compare(api_client, cities="Madrid,Sevilla").json()
+
+    assert body["cities"] == ["Madrid", "Sevilla"]
+    assert body["missing"] == []
+    assert body["dates"] == [f"2024-07-0{day}" for day in range(1, 8)]
+    for index, city in enumerate(body["cities"]):
+        temperature = get_stats(api_client, "temperature_stats", city)["temperature"]
+        precipitation = get_stats(api_client, "precipitation_stats", city)["precipitation"]
+        by_day = dict(zip(body["dates"], body["temperature"]["average_by_day"][index]))
+
+        assert {day: value for day, value in by_day.items() if value is not None} == temperature["average_by_day"]
+        for key in ("average", "max", "min"):
+            assert body["temperature"][key][index] == temperature[key]
+        for key in ("total", "days_with_precipitation", "max", "average"):
+            assert body["precipitation"][key][index] == precipitation[key]
+
+def test_series_are_aligned(api_client, cities):
+    body = get_compare(api_client, cities="Sevilla,Madrid", metrics="precipitation").json()
+
+    assert body["cities"] == ["Sevilla", "Madrid"]  # En el orden pedido
+    assert "temperature" not in body
+    sevilla, madrid = body["precipitation"]["total_by_day"]
+    assert [value is None for value in sevilla] == [True, True, False, False, False, False, False]
+    assert [value is None for value in madrid] == [False, False, False, False, False, True, True]
+
+@pytest.mark.parametrize("backend", ["rollup", "database"])
+def test_compare_is_one_query(api_client, cities, settings, backend):
+    settings.WEATHER_STATS_BACKEND = backend
+    with CaptureQueriesContext(connection) as queries:
+        response = get_compare(api_client, cities="Madrid,Sevilla", start_date="2024-07-02", end_date="2024-07-04")
+
+    assert response.status_code == 200
+    assert response.json()["dates"] == ["2024-07-02", "2024-07-03", "2024-07-04"]
+    # Una consulta de datos, más la versión para la caché de respuestas (y con
+    # rollup, la comprobación de que el resumen cubre las ciudades)
+    assert len(queries) == (3 if backend == "rollup" else 2)
+
+def test_compare_mixes_summary_and_hourly_cities(api_client, cities, settings):
+    settings.WEATHER_STATS_BACKEND = "rollup"
+    expected = get_compare(api_client, cities="Madrid,Sevilla").json()
+    # Sevilla queda solo con datos horarios (p. ej. cargada antes del resumen diario)
+    DailyWeatherSummary.objects.filter(city="Sevilla").delete()
+
+    with CaptureQueriesContext(connection) as queries:
+        body = get_compare(api_client, cities="Madrid,Sevilla").json()
+
+    assert body == expected
+    assert len(queries) == 4  # Cobertura, resumen, horarios de Sevilla y versión de la caché
+
+def test_compare_city_with_hours_outside_rollup(api_client, cities, settings):
+    settings.WEATHER_STATS_BACKEND = "rollup"
+    # Madrid tiene días en el resumen y, además, horas de 2023 cargadas fuera del ingest
+    madrid = Location.objects.get(name="Madrid")
+    start = timezone.make_aware(datetime.datetime(2023, 7, 1))
+    WeatherRecord.objects.bulk_create(
+        WeatherRecord(location=madrid, datetime=start + datetime.timedelta(hours=h), temperature=40.0, precipitation=0.0)
+        for h in range(24)
+    )
+
+    body = get_compare(api_client, cities="Madrid,Sevilla").json()
+    assert body["dates"][0] == "2023-07-01"
+    for index, city in enumerate(body["cities"]):
+        temperature = get_stats(api_client, "temperature_stats", city)["temperature"]
+        for key in ("average", "max", "min"):
+            assert body["temperature"][key][index] == temperature[key]
+    assert body["temperature"]["max"][0]["value"] == 40.0
+
+def test_missing_cities(api_client, cities):
+    body = get_compare(api_client, cities="Madrid, Atlantis ,Madrid").json()
+    assert body["cities"] == ["Madrid"]
+    assert body["missing"] == ["Atlantis"]
+
+    response = get_compare(api_client, cities="Atlantis")
+    assert response.status_code == 404
+    assert response.json()["missing"] == ["Atlantis"]
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("params", [
+    {},
+    {"cities": " , "},
+    {"cities": "Madrid", "metrics": "humidity"},
+    {"cities": "Madrid", "start_date": "2024-13-01"},
+    {"cities": ",".join(f"City {i}" for i in range(21))},
+])
+def test_compare_validation(api_client, params):
+    assert get_compare(api_client, **params).status_code == 400
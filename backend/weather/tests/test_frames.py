@@ -0,0 +1,65 @@
+import pytest
+import datetime
+import pandas as pd
+from django.utils import timezone
+from weather.models import Location, WeatherRecord
+from weather.tasks import calculate_temperature_stats
+from services.frames import records_frame
+
+# ---------------------------
+# Fixtures
+# ---------------------------
+@pytest.fixture
+def records(db):
+    """Dos ciudades, con nombres que necesitan comillas en CSV"""
+    start = timezone.make_aware(datetime.datetime(2024, 7, 1))
+    return WeatherRecord.objects.bulk_create([
+        WeatherRecord(
+            location=Location.objects.get_or_create(name=city, defaults={"latitude": 40.4, "longitude": -3.7})[0],
+            datetime=start + datetime.timedelta(hours=hour, minutes=30 if hour == 5 else 0),
+            temperature=20 + hour / 10, precipitation=hour % 3 * 0.1,
+        )
+        for city in ("Madrid", 'Villa "del", Río')
+        for hour in range(48)
+    ])
+
+# ---------------------------
+# Tests
+# ---------------------------
+def test_frame_matches_values(records):
+    qs = WeatherRecord.objects.order_by("-datetime", "location__name")
+    fields = ("location", "datetime", "temperature", "precipitation", "record_id")
+
+    df = records_frame(qs, *fields)
+    expected = pd.DataFrame(list(qs.values(*fields)))
+
+    assert str(df["datetime"].dtype) == "datetime64[ns, UTC]"
+    assert df["temperature"].dtype == "float64"
+    assert df["record_id"].dtype == "int64"
+    assert df["location"].dtype == "int64"
+    assert df["location"].tolist() == expected["location"].tolist()
+    assert df["datetime"].tolist() == pd.to_datetime(expected["datetime"]).tolist()
+    assert df[["temperature", "precipitation", "record_id"]].values.tolist() == \
+        expected[["temperature", "precipitation", "record_id"]].values.tolist()
+
+def test_frame_applies_filters(records):
+    qs = WeatherRecord.objects.filter(location__name='Villa "del", Río', temperature__gte=24)
+
+    df = records_frame(qs, "datetime", "temperature")
+
+    assert len(df) == 8
+    assert df["temperature"].min() == 24
+
+def test_empty_frame_keeps_types(db):
+    df = records_frame(WeatherRecord.objects.all(), "datetime", "temperature")
+
+    assert df.empty
+    assert list(df.columns) == ["datetime", "temperature"]
+    assert str(df["datetime"].dtype) == "datetime64[ns, UTC]"
+
+def test_tasks_use_frames(records):
+    result = calculate_temperature_stats("Madrid")["temperature"]
+
+    assert result["max"] == {"value": 24.7, "date_time": "2024-07-02T23:00:00+00:00"}
+    assert result["average_by_day"] == {"2024-07-01": 21.2, "2024-07-02": 23.6}
+    assert calculate_temperature_stats("Sevilla") is None
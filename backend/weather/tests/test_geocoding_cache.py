@@ -0,0 +1,81 @@
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+from weather.models import GeocodedCity
+from services import geocoding_cache
+from services.open_meteo import OpenMeteoService
+
+# ---------------------------
+# Fixtures
+# ---------------------------
+@pytest.fixture
+def api_client():
+    """Cliente API de DRF para tests"""
+    return APIClient()
+
+# ---------------------------
+# Tests
+# ---------------------------
+def test_cache_key_normalizes_name():
+    assert geocoding_cache.cache_key("  New   York ", "en") == geocoding_cache.cache_key("new york", "en")
+    assert geocoding_cache.cache_key("Madrid", "en") != geocoding_cache.cache_key("Madrid", "es")
+
+@pytest.mark.django_db
+def test_repeated_lookups_hit_memory(open_meteo_server):
+    for name in ["Madrid", "madrid", " MADRID "]:
+        coords = OpenMeteoService.get_city_coordinates(name)
+
+    assert coords["name"] == "Madrid"
+    assert open_meteo_server.count("/v1/search") == 1
+    assert geocoding_cache.stats()["misses"] == 1
+    assert geocoding_cache.stats()["memory_hits"] == 2
+
+@pytest.mark.django_db
+def test_persistent_table_survives_process_cache(open_meteo_server):
+    OpenMeteoService.get_city_coordinates("Madrid")
+    geocoding_cache.clear()  # Como un proceso nuevo
+
+    OpenMeteoService.get_city_coordinates("Madrid")
+
+    assert open_meteo_server.count("/v1/search") == 1
+    assert geocoding_cache.stats()["db_hits"] == 1
+    assert GeocodedCity.objects.get().found
+
+@pytest.mark.django_db
+def test_negative_lookups_use_shorter_ttl(open_meteo_server, settings):
+    open_meteo_server.unknown_cities.add("Atlantis")
+
+    for _ in range(2):
+        with pytest.raises(ValueError, match="City not found"):
+            OpenMeteoService.get_city_coordinates("Atlantis")
+    assert open_meteo_server.count("/v1/search") == 1
+    assert geocoding_cache.stats()["negative_hits"] == 1
+
+    # Caducado el TTL negativo (pero no el positivo) se vuelve a preguntar
+    settings.GEOCODING_NEGATIVE_TTL = 0
+    geocoding_cache.clear()
+    with pytest.raises(ValueError):
+        OpenMeteoService.get_city_coordinates("Atlantis")
+    assert open_meteo_server.count("/v1/search") == 2
+
+def test_ttl_cache_expires_and_evicts():
+    cache = geocoding_cache.TTLCache(maxsize=2)
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=0)
+    assert cache.get("b") == (False, None)  # Caducada
+
+    cache.set("c", 3, ttl=60)
+    assert cache.get("a") == (True, 1)
+    cache.set("d", 4, ttl=60)  # Expulsa la menos usada recientemente (c)
+    assert cache.get("c") == (False, None)
+    assert cache.get("a") == (True, 1)
+
+@pytest.mark.django_db
+def test_geocoding_cache_stats_endpoint(api_client, open_meteo_server):
+    OpenMeteoService.get_city_coordinates("Madrid")
+    OpenMeteoService.get_city_coordinates("Madrid")
+
+    response = api_client.get(reverse("geocoding_cache_stats"))
+
+    assert response.status_code == 200
+    assert response.json() == {"memory_hits": 1, "db_hits": 0, "negative_hits": 0, "misses": 1, "hit_ratio": 0.5}
@@ -0,0 +1,91 @@
+import pytest
+import requests
+import time
+from services import http_client
+from services.open_meteo import OpenMeteoService
+
+# ---------------------------
+# Tests
+# ---------------------------
+def test_requests_reuse_pooled_session(open_meteo_server):
+    OpenMeteoService.geocode("Madrid")
+    session = http_client.get_session()
+    OpenMeteoService.fetch_weather_data(40.4, -3.7, "2024-07-01", "2024-07-01")
+
+    assert http_client.get_session() is session
+    assert open_meteo_server.count("/v1/search") == open_meteo_server.count("/v1/archive") == 1
+
+def test_read_timeout(open_meteo_server, settings):
+    settings.OPEN_METEO_READ_TIMEOUT = 0.2
+    settings.OPEN_METEO_RETRIES = 0
+    http_client.reset()
+    open_meteo_server.latency = 1
+
+    started = time.monotonic()
+    with pytest.raises(requests.Timeout):
+        OpenMeteoService.geocode("Madrid")
+    assert time.monotonic() - started < 1
+
+def test_retries_5xx_then_succeeds(open_meteo_server):
+    open_meteo_server.script(503, times=2)
+
+    coords = OpenMeteoService.geocode("Madrid")
+
+    assert coords["name"] == "Madrid"
+    assert open_meteo_server.count("/v1/search") == 3
+
+def test_retry_honors_retry_after(open_meteo_server):
+    open_meteo_server.script(429, headers={"Retry-After": "1"})
+
+    started = time.monotonic()
+    OpenMeteoService.geocode("Madrid")
+
+    assert time.monotonic() - started >= 1
+    assert open_meteo_server.count("/v1/search") == 2
+
+def test_long_retry_after_fails_fast(open_meteo_server):
+    open_meteo_server.script(429, headers={"Retry-After": "3600"})
+
+    started = time.monotonic()
+    with pytest.raises(requests.HTTPError):
+        OpenMeteoService.geocode("Madrid")
+
+    assert time.monotonic() - started < 1
+    assert open_meteo_server.count("/v1/search") == 1
+
+def test_gives_up_after_max_retries(open_meteo_server, settings):
+    settings.OPEN_METEO_RETRIES = 2
+    http_client.reset()
+    open_meteo_server.script(500, times=10)
+
+    with pytest.raises(requests.HTTPError):
+        OpenMeteoService.geocode("Madrid")
+    assert open_meteo_server.count("/v1/search") == 3
+
+def test_client_errors_are_not_retried(open_meteo_server):
+    open_meteo_server.script(400)
+
+    with pytest.raises(requests.HTTPError):
+        OpenMeteoService.geocode("Madrid")
+    assert open_meteo_server.count("/v1/search") == 1
+
+def test_circuit_breaker_opens_and_recovers(open_meteo_server, settings):
+    settings.OPEN_METEO_RETRIES = 0
+    settings.OPEN_METEO_BREAKER_THRESHOLD = 2
+    settings.OPEN_METEO_BREAKER_RESET = 0.3
+    http_client.reset()
+    open_meteo_server.script(503, times=2)
+
+    for _ in range(2):
+        with pytest.raises(requests.HTTPError):
+            OpenMeteoService.geocode("Madrid")
+
+    # Abierto: falla sin llegar al servidor
+    with pytest.raises(http_client.CircuitOpenError):
+        OpenMeteoService.geocode("Madrid")
+    assert open_meteo_server.count("/v1/search") == 2
+
+    # Half-open: la petición de prueba va bien y el circuito se cierra
+    time.sleep(0.3)
+    assert OpenMeteoService.geocode("Madrid")["name"] == "Madrid"
+    assert http_client.get_breaker(settings.OPEN_METEO_GEOCODING_URL).state == "closed"
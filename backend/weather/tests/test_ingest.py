@@ -0,0 +1,140 @@
+import pytest
+import numpy as np
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APIClient
+from weather.models import DailyWeatherSummary, WeatherRecord
+from services.open_meteo import OpenMeteoService, split_date_range
+from services.bulk_load import hourly_times
+
+# ---------------------------
+# Fixtures
+# ---------------------------
+def archive_json(start_day, days, temperature=20.0):
+    """Respuesta del archive API con `days` días horarios desde julio `start_day` de 2024"""
+    times = [f"2024-07-{start_day + h // 24:02d}T{h % 24:02d}:00" for h in range(days * 24)]
+    return {
+        "hourly": {
+            "time": times,
+            "temperature_2m": [temperature] * len(times),
+            "precipitation": [0.0] * len(times),
+        }
+    }
+
+@pytest.fixture
+def api_client():
+    """Cliente API de DRF para tests"""
+    return APIClient()
+
+@pytest.fixture
+def fake_open_meteo(monkeypatch):
+    """Sustituye las llamadas a Open-Meteo y registra los rangos pedidos"""
+    requested = []
+
+    def fetch_weather_data(latitude, longitude, start_date, end_date):
+        requested.append((start_date, end_date))
+        start, end = int(start_date[-2:]), int(end_date[-2:])
+        return archive_json(start, end - start + 1)
+
+    def get_city_coordinates(city):
+        return {"name": city, "latitude": 40.4168, "longitude": -3.7038, "country": "Spain"}
+
+    async def aget_city_coordinates(city):
+        return get_city_coordinates(city)
+
+    async def afetch_weather_data(*args):
+        return fetch_weather_data(*args)
+
+    # La vista /api/load/ usa las versiones async
+    monkeypatch.setattr(OpenMeteoService, "get_city_coordinates", staticmethod(get_city_coordinates))
+    monkeypatch.setattr(OpenMeteoService, "fetch_weather_data", staticmethod(fetch_weather_data))
+    monkeypatch.setattr(OpenMeteoService, "aget_city_coordinates", staticmethod(aget_city_coordinates))
+    monkeypatch.setattr(OpenMeteoService, "afetch_weather_data", staticmethod(afetch_weather_data))
+    return requested
+
+# ---------------------------
+# Tests
+# ---------------------------
+@pytest.mark.django_db
+def test_store_weather_data_is_idempotent():
+    first = OpenMeteoService.store_weather_data("Madrid", 40.4168, -3.7038, archive_json(1, 2))
+    second = OpenMeteoService.store_weather_data("Madrid", 40.4168, -3.7038, archive_json(1, 2))
+
+    assert first == {"inserted": 48, "updated": 0, "skipped": 0}
+    assert second == {"inserted": 0, "updated": 0, "skipped": 48}
+    assert WeatherRecord.objects.count() == 48
+    assert list(DailyWeatherSummary.objects.values_list("count", flat=True)) == [24, 24]
+
+@pytest.mark.django_db
+def test_store_weather_data_updates_changed_hours():
+    OpenMeteoService.store_weather_data("Madrid", 40.4168, -3.7038, archive_json(1, 1))
+    counts = OpenMeteoService.store_weather_data("Madrid", 40.4168, -3.7038, archive_json(1, 2, temperature=25.0))
+
+    assert counts == {"inserted": 24, "updated": 24, "skipped": 0}
+    assert set(WeatherRecord.objects.values_list("temperature", flat=True)) == {25.0}
+    assert DailyWeatherSummary.objects.get(date="2024-07-01").temperature_sum == 24 * 25.0
+
+@pytest.mark.django_db
+def test_missing_date_ranges():
+    OpenMeteoService.store_weather_data("Madrid", 40.4168, -3.7038, archive_json(3, 2))
+    OpenMeteoService.store_weather_data("Madrid", 40.4168, -3.7038, archive_json(8, 1))
+
+    assert OpenMeteoService.missing_date_ranges("Madrid", "2024-07-01", "2024-07-10") == [
+        ("2024-07-01", "2024-07-02"),
+        ("2024-07-05", "2024-07-07"),
+        ("2024-07-09", "2024-07-10"),
+    ]
+    assert OpenMeteoService.missing_date_ranges("Madrid", "2024-07-03", "2024-07-04") == []
+
+@pytest.mark.django_db
+def test_load_weather_only_fetches_gaps(api_client, fake_open_meteo, settings):
+    settings.WEATHER_LOAD_ASYNC = False
+    url = reverse('load_weather')
+    OpenMeteoService.store_weather_data("Madrid", 40.4168, -3.7038, archive_json(2, 1))
+
+    response = api_client.post(url, {"city": "Madrid", "start_date": "2024-07-01", "end_date": "2024-07-03"}, format='json')
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "status": "success", "records_added": 48, "inserted": 48, "updated": 0, "skipped": 24,
+    }
+    assert fake_open_meteo == [("2024-07-01", "2024-07-01"), ("2024-07-03", "2024-07-03")]
+
+    # Segunda carga: todo cubierto, no se llama al archive API
+    response = api_client.post(url, {"city": "Madrid", "start_date": "2024-07-01", "end_date": "2024-07-03"}, format='json')
+    assert response.json()["skipped"] == 72
+    assert len(fake_open_meteo) == 2
+    assert WeatherRecord.objects.count() == 72
+
+def test_hourly_times_generates_regular_grid():
+    times = ["2024-07-01T00:00", "2024-07-01T01:00", "2024-07-01T02:00"]
+    assert list(hourly_times(times)) == list(np.array(times, dtype="datetime64[s]"))
+
+    # Si falta una hora la rejilla no cuadra y se parsea la lista
+    irregular = ["2024-07-01T00:00", "2024-07-01T02:00", "2024-07-01T03:00"]
+    assert list(hourly_times(irregular)) == list(np.array(irregular, dtype="datetime64[s]"))
+
+def test_split_date_range():
+    assert split_date_range("2024-07-01", "2024-07-10", 4) == [
+        ("2024-07-01", "2024-07-04"), ("2024-07-05", "2024-07-08"), ("2024-07-09", "2024-07-10"),
+    ]
+    assert split_date_range("2024-07-01", "2024-07-10") == [("2024-07-01", "2024-07-10")]
+
+@pytest.mark.django_db
+def test_store_weather_data_in_small_copy_chunks_skips_null_hours():
+    weather_json = archive_json(1, 2)
+    weather_json["hourly"]["temperature_2m"][-3:] = [None] * 3
+
+    counts = OpenMeteoService.store_weather_data("Madrid", 40.4168, -3.7038, weather_json, chunk_size=7)
+
+    assert counts == {"inserted": 45, "updated": 0, "skipped": 3}
+    assert WeatherRecord.objects.count() == 45
+    assert OpenMeteoService.missing_date_ranges("Madrid", "2024-07-01", "2024-07-02") == [("2024-07-02", "2024-07-02")]
+
+@pytest.mark.django_db
+def test_backfill_command_fetches_in_windows(fake_open_meteo):
+    call_command("backfill", "Madrid", "Sevilla", start_date="2024-07-01", end_date="2024-07-10", window_days=4)
+
+    assert fake_open_meteo == split_date_range("2024-07-01", "2024-07-10", 4) * 2
+    assert WeatherRecord.objects.filter(location__name="Sevilla").count() == 240
+    assert DailyWeatherSummary.objects.filter(city="Madrid").count() == 10
@@ -0,0 +1,201 @@
+import pytest
+import threading
+import time
+from datetime import timedelta
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from weather.models import LoadJob, WeatherRecord
+from services import jobs
+from services.jobs import claim_next_job, run_job, run_pending_jobs, run_worker, submit_load_job
+from services.open_meteo import OpenMeteoService
+
+# ---------------------------
+# Fixtures
+# ---------------------------
+@pytest.fixture
+def api_client():
+    """Cliente API de DRF para tests"""
+    return APIClient()
+
+def post_load(api_client, city="Madrid", start_date="2024-07-01", end_date="2024-07-03"):
+    return api_client.post(reverse('load_weather'), {
+        "city": city, "start_date": start_date, "end_date": end_date,
+    }, format='json')
+
+# ---------------------------
+# Tests
+# ---------------------------
+@pytest.mark.django_db
+def test_load_view_queues_job(api_client):
+    response = post_load(api_client)
+
+    assert response.status_code == 202
+    body = response.json()
+    assert body["status"] == "queued"
+    assert body["deduplicated"] is False
+    assert body["status_url"] == reverse('load_job_status', args=[body["job_id"]])
+    assert WeatherRecord.objects.count() == 0  # Nada descargado todavía
+
+@pytest.mark.django_db
+def test_identical_in_flight_loads_are_deduplicated(api_client):
+    first = post_load(api_client).json()
+    second = post_load(api_client, city="  madrid ").json()
+    other_range = post_load(api_client, end_date="2024-07-04").json()
+
+    assert second["job_id"] == first["job_id"]
+    assert second["deduplicated"] is True
+    assert other_range["job_id"] != first["job_id"]
+    assert LoadJob.objects.count() == 2
+
+@pytest.mark.django_db
+def test_finished_job_does_not_block_new_one():
+    job, _ = submit_load_job("Madrid", "2024-07-01", "2024-07-01")
+    LoadJob.objects.filter(pk=job.pk).update(state=LoadJob.SUCCEEDED)
+
+    again, created = submit_load_job("Madrid", "2024-07-01", "2024-07-01")
+
+    assert created
+    assert again.job_id != job.job_id
+
+@pytest.mark.django_db
+def test_worker_runs_job_and_reports_progress(api_client, open_meteo_server, settings):
+    settings.WEATHER_FETCH_WINDOW_DAYS = 1
+    job_id = post_load(api_client).json()["job_id"]
+
+    call_command("run_ingest_worker", "--once")
+
+    status = api_client.get(reverse('load_job_status', args=[job_id])).json()
+    assert status["status"] == "succeeded"
+    assert status["progress"] == 100
+    assert status["attempts"] == 1
+    assert status["result"] == {"inserted": 72, "updated": 0, "skipped": 0}
+    assert status["finished_at"] is not None
+    assert WeatherRecord.objects.count() == 72
+    assert open_meteo_server.count("/v1/archive") == 3
+
+@pytest.mark.django_db
+def test_failed_job_is_retried_with_backoff(open_meteo_server, settings):
+    settings.OPEN_METEO_RETRIES = 0
+    settings.WEATHER_FETCH_WINDOW_RETRIES = 0
+    settings.WEATHER_JOB_MAX_ATTEMPTS = 2
+    settings.WEATHER_JOB_RETRY_DELAY = 60
+    OpenMeteoService.get_city_coordinates("Madrid")  # Geocoding ya en caché
+    job, _ = submit_load_job("Madrid", "2024-07-01", "2024-07-01")
+
+    open_meteo_server.script(503)
+    assert run_pending_jobs() == 1
+
+    job.refresh_from_db()
+    assert job.state == LoadJob.QUEUED
+    assert job.attempts == 1
+    assert "could not be loaded" in job.error
+    assert job.result == {"inserted": 0, "updated": 0, "skipped": 0}
+    assert job.run_after > timezone.now() + timedelta(seconds=50)
+    assert claim_next_job() is None  # Todavía en espera
+
+    # Último intento fallido -> failed
+    LoadJob.objects.filter(pk=job.pk).update(run_after=timezone.now())
+    open_meteo_server.script(503)
+    run_pending_jobs()
+
+    job.refresh_from_db()
+    assert job.state == LoadJob.FAILED
+    assert job.attempts == 2
+    assert job.finished_at is not None
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("status", [400, 404])
+def test_permanent_error_fails_job_at_once(open_meteo_server, settings, status):
+    settings.WEATHER_JOB_MAX_ATTEMPTS = 3
+    job, _ = submit_load_job("Madrid", "2024-07-01", "2024-07-01")
+
+    open_meteo_server.script(status)  # El geocoding responde 4xx
+    assert run_pending_jobs() == 1
+
+    job.refresh_from_db()
+    assert job.state == LoadJob.FAILED
+    assert job.attempts == 1
+    assert str(status) in job.error
+    assert job.finished_at is not None
+
+@pytest.mark.django_db
+def test_unknown_city_fails_job_at_once(open_meteo_server, settings):
+    settings.WEATHER_JOB_MAX_ATTEMPTS = 3
+    open_meteo_server.unknown_cities.add("Atlantis")
+    job, _ = submit_load_job("Atlantis", "2024-07-01", "2024-07-01")
+
+    assert run_pending_jobs() == 1
+
+    job.refresh_from_db()
+    assert job.state == LoadJob.FAILED
+    assert job.attempts == 1
+    assert job.error == "City not found: Atlantis"
+
+@pytest.mark.django_db
+def test_stale_running_job_is_reclaimed(open_meteo_server, settings):
+    settings.WEATHER_JOB_STALE_AFTER = 60
+    job, _ = submit_load_job("Madrid", "2024-07-01", "2024-07-01")
+    claimed = claim_next_job()
+    assert claimed.job_id == job.job_id
+    assert claim_next_job() is None  # En curso y con actividad reciente
+
+    # El worker murió hace rato
+    LoadJob.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(minutes=5))
+    reclaimed = claim_next_job()
+
+    assert reclaimed.job_id == job.job_id
+    assert reclaimed.attempts == 2
+    assert reclaimed.lease != claimed.lease
+    assert run_job(reclaimed)
+    assert WeatherRecord.objects.count() == 24
+
+    # El worker lento termina después: su resultado se descarta
+    assert not run_job(claimed)
+    job.refresh_from_db()
+    assert (job.state, job.attempts) == (LoadJob.SUCCEEDED, 2)
+
+@pytest.mark.django_db(transaction=True)
+def test_heartbeat_keeps_slow_job_claimed(open_meteo_server, settings):
+    settings.WEATHER_JOB_STALE_AFTER = 0.5
+    settings.WEATHER_JOB_HEARTBEAT = 0.1
+    open_meteo_server.latency = 0.6
+    submit_load_job("Madrid", "2024-07-01", "2024-07-01")
+    job = claim_next_job()
+
+    def work():
+        try:
+            run_job(job)
+        finally:
+            connection.close()
+
+    worker = threading.Thread(target=work)
+    worker.start()
+    time.sleep(0.8)
+    assert claim_next_job() is None  # En curso pese a pasar de WEATHER_JOB_STALE_AFTER
+    worker.join()
+
+    job.refresh_from_db()
+    assert (job.state, job.attempts) == (LoadJob.SUCCEEDED, 1)
+
+def test_worker_survives_loop_errors(monkeypatch):
+    stop_event = threading.Event()
+    calls = []
+
+    def claim():
+        calls.append(1)
+        if len(calls) == 1:
+            raise OperationalError("server closed the connection unexpectedly")
+        stop_event.set()
+
+    monkeypatch.setattr(jobs, "claim_next_job", claim)
+    run_worker(0.01, stop_event)
+
+    assert len(calls) == 2
+
+@pytest.mark.django_db
+def test_job_status_not_found(api_client):
+    response = api_client.get(reverse('load_job_status', args=[999]))
+    assert response.status_code == 404
@@ -0,0 +1,76 @@
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+from weather.models import DailyWeatherSummary, WeatherRecord
+from services.open_meteo import OpenMeteoService
+
+# ---------------------------
+# Fixtures
+# ---------------------------
+@pytest.fixture
+def api_client():
+    """Cliente API de DRF para tests"""
+    return APIClient()
+
+def post_batch(api_client, items):
+    return api_client.post(reverse('load_weather_batch'), items, format='json')
+
+# ---------------------------
+# Tests
+# ---------------------------
+@pytest.mark.django_db
+def test_batch_uses_multi_coordinate_requests(api_client, open_meteo_server, settings):
+    settings.WEATHER_BATCH_COORDS_PER_REQUEST = 2
+    cities = ["Madrid", "Sevilla", "Bilbao"]
+
+    response = post_batch(api_client, [
+        {"city": city, "start_date": "2024-07-01", "end_date": "2024-07-02"} for city in cities
+    ])
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "success"
+    assert [r["city"] for r in response.json()["results"]] == cities
+    assert all(r["inserted"] == 48 for r in response.json()["results"])
+    # 3 ciudades con la misma ventana y 2 coordenadas por petición -> 2 peticiones
+    assert open_meteo_server.count("/v1/archive") == 2
+    assert open_meteo_server.count("/v1/search") == 3
+    assert WeatherRecord.objects.count() == 144
+    assert DailyWeatherSummary.objects.count() == 6
+
+@pytest.mark.django_db
+def test_batch_matches_single_city_load(api_client, open_meteo_server):
+    post_batch(api_client, [{"city": "Madrid", "start_date": "2024-07-01", "end_date": "2024-07-03"}])
+    batch = list(WeatherRecord.objects.values_list("datetime", "temperature", "precipitation"))
+    WeatherRecord.objects.all().delete()
+    DailyWeatherSummary.objects.all().delete()
+
+    OpenMeteoService.load_weather("Madrid", "2024-07-01", "2024-07-03")
+
+    assert list(WeatherRecord.objects.values_list("datetime", "temperature", "precipitation")) == batch
+
+@pytest.mark.django_db
+def test_batch_reports_per_city_status(api_client, open_meteo_server):
+    open_meteo_server.unknown_cities.add("Atlantis")
+    OpenMeteoService.load_weather("Madrid", "2024-07-01", "2024-07-01")
+
+    response = post_batch(api_client, [
+        {"city": "Madrid", "start_date": "2024-07-01", "end_date": "2024-07-02"},
+        {"city": "Atlantis", "start_date": "2024-07-01", "end_date": "2024-07-02"},
+        {"city": "Sevilla", "start_date": "2024-07-03", "end_date": "2024-07-01"},
+        {"city": "madrid", "start_date": "2024-07-01", "end_date": "2024-07-02"},
+    ])
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "partial"
+    madrid, atlantis, sevilla, duplicate = body["results"]
+    assert madrid["status"] == "success"
+    assert (madrid["inserted"], madrid["skipped"]) == (24, 24)
+    assert atlantis == {**atlantis, "status": "error", "error": "City not found: Atlantis"}
+    assert sevilla["error"] == "start_date must be before end_date"
+    assert duplicate["error"] == "Duplicate city in batch"
+
+@pytest.mark.django_db
+def test_batch_rejects_invalid_body(api_client):
+    assert post_batch(api_client, {"city": "Madrid"}).status_code == 400
+    assert post_batch(api_client, []).status_code == 400
@@ -0,0 +1,67 @@
+import pytest
+import zlib
+from django.urls import reverse
+from rest_framework.test import APIClient
+from weather.models import Location, WeatherRecord
+from services.bulk_load import copy_weather_data
+from services.locations import upsert_locations
+from services.open_meteo import OpenMeteoService
+from fake_open_meteo import fake_coordinates, fake_hourly
+
+# ---------------------------
+# Fixtures
+# ---------------------------
+@pytest.fixture
+def api_client():
+    """Cliente API de DRF para tests"""
+    return APIClient()
+
+# ---------------------------
+# Tests
+# ---------------------------
+@pytest.mark.django_db
+def test_load_creates_location_from_geocoding(api_client, open_meteo_server):
+    OpenMeteoService.load_weather("Madrid", "2024-07-01", "2024-07-02")
+
+    madrid = Location.objects.get()
+    assert (madrid.name, madrid.country, madrid.geocoding_id) == ("Madrid", "Fakeland", zlib.crc32(b"Madrid"))
+    assert (madrid.latitude, madrid.longitude) == fake_coordinates("Madrid")
+    assert WeatherRecord.objects.filter(location=madrid).count() == 48
+
+    response = api_client.get(reverse("temperature_stats") + "?city=Madrid")
+    assert response.status_code == 200
+    assert len(response.json()["temperature"]["average_by_day"]) == 2
+
+@pytest.mark.django_db
+def test_batch_load_creates_one_location_per_city(api_client, open_meteo_server):
+    api_client.post(reverse("load_weather_batch"), [
+        {"city": city, "start_date": "2024-07-01", "end_date": "2024-07-01"} for city in ("Madrid", "Sevilla")
+    ], format="json")
+
+    assert list(Location.objects.values_list("name", "country")) == [("Madrid", "Fakeland"), ("Sevilla", "Fakeland")]
+    assert WeatherRecord.objects.filter(location__name="Sevilla").count() == 24
+
+@pytest.mark.django_db
+def test_new_coordinates_update_location_not_hours():
+    hourly = fake_hourly(40.4, "2024-07-01", "2024-07-01")
+    copy_weather_data("Madrid", 40.4, -3.7, hourly)
+    upsert_locations([{"name": "Madrid", "latitude": 40.4, "longitude": -3.7, "country": "Spain", "geocoding_id": 1}])
+
+    counts = copy_weather_data("Madrid", 40.42, -3.70, hourly)
+
+    assert counts == {"inserted": 0, "updated": 0, "skipped": 24}
+    madrid = Location.objects.get()
+    # Sin datos de geocoding se conservan los que ya había
+    assert (madrid.latitude, madrid.country, madrid.geocoding_id) == (40.42, "Spain", 1)
+
+@pytest.mark.django_db
+def test_upsert_returns_ids_for_new_and_existing():
+    first = upsert_locations([{"name": "Madrid", "latitude": 40.4, "longitude": -3.7}])
+    both = upsert_locations([
+        {"name": "Madrid", "latitude": 40.4, "longitude": -3.7},
+        {"name": "Sevilla", "latitude": 37.4, "longitude": -6.0},
+    ])
+
+    assert both["Madrid"] == first["Madrid"]
+    assert set(both) == {"Madrid", "Sevilla"}
+    assert Location.objects.count() == 2
@@ -0,0 +1,154 @@
+import pytest
+import json
+import logging
+import logging.config
+import multiprocessing
+import os
+import sys
+import threading
+from datetime import datetime, timezone
+from config.logs import DailyFileHandler, JsonFormatter, QueueListenerHandler, SamplingFilter
+
+# ---------------------------
+# Fixtures
+# ---------------------------
+class ListHandler(logging.Handler):
+    """Guarda los mensajes y el hilo que los escribe"""
+
+    def __init__(self):
+        super().__init__()
+        self.written = []
+
+    def emit(self, record):
+        self.written.append((self.format(record), threading.current_thread()))
+
+def make_record(msg, *args, name="services.stats", level=logging.INFO, **extra):
+    record = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+def epoch(day):
+    return datetime.fromisoformat(day).replace(tzinfo=timezone.utc).timestamp()
+
+# ---------------------------
+# Tests
+# ---------------------------
+def test_queue_handler_writes_from_listener_thread():
+    config = {
+        "version": 1,
+        "disable_existing_loggers": False,
+        "handlers": {
+            "list": {"()": ListHandler, "level": "WARNING"},
+            "queue": {"()": "config.logs.QueueListenerHandler", "handlers": ["cfg://handlers.list"]},
+        },
+        "loggers": {"test.queue": {"handlers": ["queue"], "level": "INFO", "propagate": False}},
+    }
+    logging.config.dictConfig(config)
+    logger = logging.getLogger("test.queue")
+    queue_handler, = logger.handlers
+    target = queue_handler.listener.handlers[0]
+    try:
+        logger.info("below the target level")
+        logger.warning("Stored %d hours for %s", 24, "Madrid")
+    finally:
+        queue_handler.close()  # Vacía la cola
+        logger.removeHandler(queue_handler)
+
+    (message, thread), = target.written
+    assert message == "Stored 24 hours for Madrid"
+    assert thread is not threading.current_thread()
+
+def test_forked_child_restarts_listener(tmp_path):
+    config = {
+        "version": 1,
+        "disable_existing_loggers": False,
+        "handlers": {
+            "file": {"class": "logging.FileHandler", "filename": str(tmp_path / "child.log")},
+            "queue": {"()": "config.logs.QueueListenerHandler", "handlers": ["cfg://handlers.file"]},
+        },
+        "loggers": {"test.fork": {"handlers": ["queue"], "level": "INFO", "propagate": False}},
+    }
+    logging.config.dictConfig(config)
+    logger = logging.getLogger("test.fork")
+    queue_handler, = logger.handlers
+
+    def child():
+        logger.error("Load job %d failed: %s", 7, "boom")
+        logging.shutdown()  # Como _worker_main de run_ingest_worker
+
+    try:
+        process = multiprocessing.get_context("fork").Process(target=child)
+        process.start()
+        process.join(10)
+    finally:
+        queue_handler.close()
+        logger.removeHandler(queue_handler)
+
+    assert process.exitcode == 0
+    assert (tmp_path / "child.log").read_text() == "Load job 7 failed: boom\n"
+
+def test_queue_handler_needs_its_targets_first():
+    with pytest.raises(ValueError, match="must sort before"):
+        QueueListenerHandler(["cfg://handlers.file"])
+
+def test_daily_file_rotates_to_dated_name(tmp_path):
+    handler = DailyFileHandler(tmp_path, backup_days=2)
+    handler.emit(make_record("first day"))
+    handler.rolloverAt = epoch("2026-10-19")
+    handler.doRollover()
+    handler.emit(make_record("second day"))
+    handler.close()
+
+    assert (tmp_path / "weather18-10-2026.log").read_text().strip() == "first day"
+    assert (tmp_path / "weather.log").read_text().strip() == "second day"
+
+def test_stale_file_rotates_on_first_message(tmp_path):
+    stale = tmp_path / "weather.log"
+    stale.write_text("old\n")
+    os.utime(stale, (epoch("2026-02-19T10:00"), epoch("2026-02-19T10:00")))
+
+    handler = DailyFileHandler(tmp_path)
+    handler.emit(make_record("today"))
+    handler.close()
+
+    assert (tmp_path / "weather19-02-2026.log").read_text() == "old\n"
+    assert stale.read_text().strip() == "today"
+
+def test_old_daily_files_are_deleted(tmp_path):
+    for name in ("weather30-12-2025.log", "weather02-01-2026.log", "weather01-01-2026.log", "other.log"):
+        (tmp_path / name).write_text("")
+    handler = DailyFileHandler(tmp_path, backup_days=2)
+
+    assert handler.getFilesToDelete() == [str(tmp_path / "weather30-12-2025.log")]
+
+def test_json_formatter():
+    record = make_record("Load job %s finished", 7, job_id=7)
+    try:
+        raise RuntimeError("boom")
+    except RuntimeError:
+        record.exc_info = sys.exc_info()
+
+    entry = json.loads(JsonFormatter().format(record))
+
+    assert entry["message"] == "Load job 7 finished"
+    assert (entry["level"], entry["logger"], entry["job_id"]) == ("INFO", "services.stats", 7)
+    assert "RuntimeError: boom" in entry["exc_info"]
+    assert datetime.fromisoformat(entry["time"]).tzinfo is not None
+
+def test_sampling_filter_keeps_one_per_template():
+    sampling = SamplingFilter(every=3, loggers=["services.stats"])
+    kept = [sampling.filter(make_record("Calculated temperature stats")) for _ in range(7)]
+    other = [sampling.filter(make_record("Calculated global stats")) for _ in range(2)]
+
+    assert kept == [True, False, False, True, False, False, True]
+    assert other == [True, False]
+
+def test_sampling_filter_ignores_warnings_and_other_loggers():
+    sampling = SamplingFilter(every=10, loggers=["services.stats"])
+    record = make_record("Calculated temperature stats")
+    sampling.filter(record)
+
+    assert record.sample_every == 10
+    assert all(sampling.filter(make_record("Slow", level=logging.WARNING)) for _ in range(3))
+    assert all(sampling.filter(make_record("x", name="services.stats_db")) for _ in range(3))
+    assert [sampling.filter(make_record("y", name="services.stats.child")) for _ in range(2)] == [True, False]
@@ -0,0 +1,111 @@
+import pytest
+import datetime
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from weather.models import Location, WeatherRecord
+from services import metrics
+
+# ---------------------------
+# Fixtures
+# ---------------------------
+@pytest.fixture
+def api_client():
+    """Cliente API de DRF para tests"""
+    return APIClient()
+
+@pytest.fixture(autouse=True)
+def clear_metrics():
+    """Los histogramas son del proceso y sobreviven entre tests"""
+    metrics.clear()
+    yield
+    metrics.clear()
+
+@pytest.fixture
+def records(db):
+    """Dos días horarios de Madrid"""
+    location = Location.objects.create(name="Madrid", latitude=40.4, longitude=-3.7)
+    start = timezone.make_aware(datetime.datetime(2024, 7, 1))
+    WeatherRecord.objects.bulk_create(
+        WeatherRecord(location=location, datetime=start + datetime.timedelta(hours=hour),
+                      temperature=20 + hour % 10, precipitation=0.5)
+        for hour in range(48)
+    )
+
+def timing(response):
+    """Cabecera Server-Timing como {nombre: parámetros}"""
+    entries = {}
+    for entry in response["Server-Timing"].split(", "):
+        name, *params = entry.split(";")
+        entries[name] = params
+    return entries
+
+# ---------------------------
+# Tests
+# ---------------------------
+def test_server_timing_phases(api_client, records, settings):
+    settings.WEATHER_STATS_BACKEND = "pandas"
+    response = api_client.get(reverse("temperature_stats") + "?city=Madrid")
+
+    assert response.status_code == 200
+    entries = timing(response)
+    assert {"db", "frame", "aggregate", "encode", "rows", "total"} <= set(entries)
+    assert entries["rows"] == ['desc="48"']
+    assert entries["db"][1].endswith('queries"')
+    total = float(entries["total"][0].removeprefix("dur="))
+    assert float(entries["encode"][0].removeprefix("dur=")) <= total
+
+def test_request_histograms(api_client, records):
+    api_client.get(reverse("temperature_stats") + "?city=Madrid")
+    api_client.get(reverse("temperature_stats") + "?city=Madrid")
+
+    text = api_client.get(reverse("metrics")).content.decode()
+    assert 'weather_http_request_duration_seconds_count{endpoint="temperature_stats",method="GET",status="200"} 2' in text
+    # La segunda sale de la caché: no agrega
+    assert 'weather_request_phase_seconds_count{endpoint="temperature_stats",phase="aggregate"} 1' in text
+    assert "# TYPE weather_db_queries_per_request histogram" in text
+
+@pytest.mark.django_db
+def test_upstream_latency_counts_requests_from_threads(api_client, open_meteo_server, settings):
+    settings.WEATHER_FETCH_WINDOW_DAYS = 1
+    response = api_client.post(reverse("load_weather_batch"), [
+        {"city": "Madrid", "start_date": "2024-07-01", "end_date": "2024-07-03"},
+    ], format="json")
+
+    assert response.status_code == 200
+    assert {"upstream", "db", "rows"} <= set(timing(response))
+    text = metrics.render()
+    host = open_meteo_server.archive_url.split("/")[2]
+    assert f'weather_upstream_request_duration_seconds_count{{host="{host}",path="/v1/archive",status="200"}} 3' in text
+
+def test_histogram_render():
+    histogram = metrics.Histogram("test_seconds", "Test", ["path"], (0.1, 1))
+    histogram.observe(0.05, path='/a"b')
+    histogram.observe(0.5, path='/a"b')
+    histogram.observe(5, path='/a"b')
+
+    assert histogram.render().splitlines() == [
+        "# HELP test_seconds Test",
+        "# TYPE test_seconds histogram",
+        'test_seconds_bucket{path="/a\\"b",le="0.1"} 1',
+        'test_seconds_bucket{path="/a\\"b",le="1.0"} 2',
+        'test_seconds_bucket{path="/a\\"b",le="+Inf"} 3',
+        'test_seconds_sum{path="/a\\"b"} 5.55',
+        'test_seconds_count{path="/a\\"b"} 3',
+    ]
+
+def test_phase_outside_request_is_noop():
+    with metrics.phase("aggregate"):
+        pass
+    metrics.add_rows(10)
+
+    assert "weather_request_phase_seconds_count" not in metrics.render()
+
+@pytest.mark.django_db
+def test_disabled(api_client):
+    with override_settings(WEATHER_METRICS_ENABLED=False):
+        response = api_client.get(reverse("global_stats"))
+
+        assert "Server-Timing" not in response
+        assert api_client.get(reverse("metrics")).status_code == 404
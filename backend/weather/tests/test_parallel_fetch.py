@@ -0,0 +1,93 @@
+import pytest
+import httpx
+import requests
+from django.urls import reverse
+from rest_framework.test import APIClient
+from weather.models import WeatherRecord
+from services.open_meteo import OpenMeteoService, PartialLoadError
+
+# ---------------------------
+# Fixtures
+# ---------------------------
+@pytest.fixture
+def api_client():
+    """Cliente API de DRF para tests"""
+    return APIClient()
+
+@pytest.fixture
+def failing_window(monkeypatch):
+    """Hace fallar siempre la descarga de las ventanas de este conjunto"""
+    failing = set()
+    fetch = OpenMeteoService.fetch_weather_data
+    afetch = OpenMeteoService.afetch_weather_data
+
+    def fetch_weather_data(latitude, longitude, start_date, end_date):
+        if (start_date, end_date) in failing:
+            raise requests.ConnectionError("upstream down")
+        return fetch(latitude, longitude, start_date, end_date)
+
+    async def afetch_weather_data(latitude, longitude, start_date, end_date):
+        if (start_date, end_date) in failing:
+            raise httpx.ConnectError("upstream down")
+        return await afetch(latitude, longitude, start_date, end_date)
+
+    monkeypatch.setattr(OpenMeteoService, "fetch_weather_data", staticmethod(fetch_weather_data))
+    monkeypatch.setattr(OpenMeteoService, "afetch_weather_data", staticmethod(afetch_weather_data))
+    return failing
+
+# ---------------------------
+# Tests
+# ---------------------------
+@pytest.mark.django_db
+def test_windows_are_fetched_concurrently_and_stored(open_meteo_server):
+    open_meteo_server.latency = 0.3
+
+    counts = OpenMeteoService.load_weather("Madrid", "2024-01-01", "2024-01-12", window_days=3, workers=4)
+
+    assert counts == {"inserted": 288, "updated": 0, "skipped": 0}
+    assert open_meteo_server.count("/v1/archive") == 4
+    datetimes = list(WeatherRecord.objects.values_list("datetime", flat=True))
+    assert len(datetimes) == len(set(datetimes)) == 288
+
+@pytest.mark.django_db
+def test_window_is_retried(open_meteo_server, settings):
+    settings.OPEN_METEO_RETRIES = 0
+    OpenMeteoService.get_city_coordinates("Madrid")  # Geocoding ya en caché
+    open_meteo_server.script(503)
+
+    counts = OpenMeteoService.load_weather("Madrid", "2024-01-01", "2024-01-02", window_retries=1)
+
+    assert counts["inserted"] == 48
+    assert open_meteo_server.count("/v1/archive") == 2
+
+@pytest.mark.django_db
+def test_partial_failure_is_resumable(open_meteo_server, failing_window):
+    failing_window.add(("2024-01-04", "2024-01-06"))
+
+    with pytest.raises(PartialLoadError) as error:
+        OpenMeteoService.load_weather("Madrid", "2024-01-01", "2024-01-09", window_days=3, workers=2)
+    assert error.value.failed_windows == [("2024-01-04", "2024-01-06")]
+    assert error.value.counts["inserted"] == 6 * 24
+
+    # Al repetir solo se pide la ventana que faltaba
+    failing_window.clear()
+    before = open_meteo_server.count("/v1/archive")
+    counts = OpenMeteoService.load_weather("Madrid", "2024-01-01", "2024-01-09", window_days=3, workers=2)
+
+    assert open_meteo_server.count("/v1/archive") - before == 1
+    assert counts == {"inserted": 72, "updated": 0, "skipped": 144}
+    assert WeatherRecord.objects.count() == 9 * 24
+
+@pytest.mark.django_db
+def test_load_view_reports_partial_failure(api_client, open_meteo_server, failing_window, settings):
+    settings.WEATHER_LOAD_ASYNC = False
+    settings.WEATHER_FETCH_WINDOW_DAYS = 2
+    failing_window.add(("2024-01-03", "2024-01-04"))
+
+    response = api_client.post(reverse('load_weather'), {
+        "city": "Madrid", "start_date": "2024-01-01", "end_date": "2024-01-05",
+    }, format='json')
+
+    assert response.status_code == 502
+    assert response.json()["failed_windows"] == [["2024-01-03", "2024-01-04"]]
+    assert response.json()["inserted"] == 72
@@ -0,0 +1,80 @@
+import pytest
+import csv
+import datetime
+import gzip
+from django.core.management import call_command
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from weather.models import DailyWeatherSummary, Location, WeatherRecord
+from services.open_meteo import OpenMeteoService
+from services.partitions import ensure_partitions, list_partitions, partition_name
+from fake_open_meteo import fake_hourly
+
+# ---------------------------
+# Fixtures
+# ---------------------------
+@pytest.fixture
+def api_client():
+    """Cliente API de DRF para tests"""
+    return APIClient()
+
+def months(*pairs):
+    return [datetime.date(year, month, 1) for year, month in pairs]
+
+def partition_of(record_id):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT tableoid::regclass::text FROM weather_weatherrecord WHERE record_id = %s", [record_id])
+        return cursor.fetchone()[0]
+
+def store(start_date, end_date):
+    OpenMeteoService.store_weather_data("Madrid", 40.4, -3.7, {"hourly": fake_hourly(40.4, start_date, end_date)})
+
+# ---------------------------
+# Tests
+# ---------------------------
+@pytest.mark.django_db
+def test_ingest_creates_monthly_partitions():
+    store("2019-12-30", "2020-02-02")
+
+    assert set(months((2019, 12), (2020, 1), (2020, 2))) <= set(list_partitions())
+    assert WeatherRecord.objects.count() == 35 * 24
+    assert ensure_partitions("2020-01-15", "2020-02-01") == 0
+
+@pytest.mark.django_db
+def test_rows_in_default_partition_move_to_their_month():
+    record = WeatherRecord.objects.create(
+        location=Location.objects.create(name="Madrid", latitude=40.4, longitude=-3.7),
+        datetime=timezone.make_aware(datetime.datetime(2015, 3, 10, 12)), temperature=12.5, precipitation=0.0,
+    )
+    assert partition_of(record.record_id) == "weather_weatherrecord_default"
+
+    assert ensure_partitions("2015-03-01", "2015-03-31") == 1
+
+    assert partition_of(record.record_id) == partition_name(datetime.date(2015, 3, 1))
+    assert WeatherRecord.objects.get(pk=record.pk).temperature == 12.5
+
+@pytest.mark.django_db
+def test_detach_archives_old_months(api_client, tmp_path):
+    store("2019-12-31", "2020-01-01")
+    call_command("detach_partitions", "--before", "2020-01", "--archive-dir", str(tmp_path), "--drop")
+
+    assert datetime.date(2019, 12, 1) not in list_partitions()
+    assert WeatherRecord.objects.count() == 24
+    with gzip.open(tmp_path / f"{partition_name(datetime.date(2019, 12, 1))}.csv.gz", "rt") as archive:
+        rows = list(csv.DictReader(archive))
+    assert len(rows) == 24 and rows[0]["city"] == "Madrid"
+
+    # El resumen diario se conserva
+    assert DailyWeatherSummary.objects.count() == 2
+    response = api_client.get(reverse("temperature_stats") + "?city=Madrid")
+    assert list(response.json()["temperature"]["average_by_day"]) == ["2019-12-31", "2020-01-01"]
+
+@pytest.mark.django_db
+def test_detach_dry_run(capsys):
+    store("2019-12-31", "2019-12-31")
+    call_command("detach_partitions", "--before", "2020-01", "--dry-run")
+
+    assert partition_name(datetime.date(2019, 12, 1)) in capsys.readouterr().out
+    assert datetime.date(2019, 12, 1) in list_partitions()
@@ -0,0 +1,69 @@
+import pytest
+from django.db import connection
+from django.utils import timezone
+from weather.models import Location, WeatherRecord
+from weather.queries import filter_records
+from services.partitions import ensure_partitions, partition_name
+import datetime
+
+# ---------------------------
+# Fixtures
+# ---------------------------
+@pytest.fixture
+def weather_history(db):
+    """Una semana horaria para dos ciudades, con estadísticas actualizadas"""
+    start = timezone.make_aware(datetime.datetime(2024, 7, 1))
+    ensure_partitions("2024-06-01", "2024-08-31")
+    locations = [Location.objects.create(name=city, latitude=0.0, longitude=0.0) for city in ("Madrid", "Sevilla")]
+    WeatherRecord.objects.bulk_create(
+        WeatherRecord(
+            location=location,
+            datetime=start + datetime.timedelta(hours=hour),
+            temperature=20.0,
+            precipitation=0.0,
+        )
+        for location in locations
+        for hour in range(24 * 7)
+    )
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE weather_weatherrecord")
+        cursor.execute("ANALYZE weather_location")
+        # Con tablas tan pequeñas el planificador prefiere un seq scan;
+        # se desactiva para comprobar que el índice es utilizable
+        cursor.execute("SET LOCAL enable_seqscan = off")
+
+# ---------------------------
+# Tests
+# ---------------------------
+def test_city_date_range_uses_btree_index(weather_history):
+    qs = filter_records(WeatherRecord.objects.all(), "Madrid", "2024-07-02", "2024-07-03")
+    plan = qs.explain()
+
+    # Índice (location_id, datetime) de la partición del mes
+    assert f"{partition_name(datetime.date(2024, 7, 1))}_location_id_datetime_key" in plan
+    assert "Index Cond" in plan and "datetime" in plan.split("Index Cond", 1)[1]
+    assert qs.count() == 48
+
+def test_date_range_without_city_uses_brin_index(weather_history):
+    qs = filter_records(WeatherRecord.objects.all(), None, "2024-07-02", "2024-07-03")
+    plan = qs.explain()
+
+    assert f"{partition_name(datetime.date(2024, 7, 1))}_datetime_idx" in plan
+    assert qs.count() == 96
+
+def test_date_range_prunes_other_partitions(weather_history):
+    qs = filter_records(WeatherRecord.objects.all(), "Madrid", "2024-06-30", "2024-07-03")
+    plan = qs.explain()
+
+    assert partition_name(datetime.date(2024, 6, 1)) in plan
+    assert partition_name(datetime.date(2024, 7, 1)) in plan
+    assert partition_name(datetime.date(2024, 8, 1)) not in plan
+    assert "_default" not in plan
+
+def test_date_cast_filter_cannot_use_datetime_index(weather_history):
+    """El filtro anterior (datetime::date) solo aprovecha la parte location del índice"""
+    qs = WeatherRecord.objects.filter(location__name="Madrid", datetime__date__gte="2024-07-02", datetime__date__lte="2024-07-03")
+    plan = qs.explain()
+
+    assert "weather_record_datetime_brin" not in plan
+    assert "datetime" not in plan.split("Index Cond", 1)[1].split("\n", 1)[0]
@@ -0,0 +1,161 @@
+import pytest
+import csv
+import io
+import json
+import datetime
+import asyncio
+import warnings
+from asgiref.sync import async_to_sync
+from django.core.handlers.asgi import ASGIHandler
+from django.core.signals import request_finished, request_started
+from django.db import close_old_connections
+from django.http import StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from weather.models import Location, WeatherRecord
+from services import export as export_service
+
+# ---------------------------
+# Fixtures
+# ---------------------------
+@pytest.fixture
+def api_client():
+    """Cliente API de DRF para tests"""
+    return APIClient()
+
+@pytest.fixture
+def records(db):
+    """Tres días horarios para dos ciudades"""
+    start = timezone.make_aware(datetime.datetime(2024, 7, 1))
+    for city in ("Sevilla", "Madrid"):
+        location = Location.objects.create(name=city, latitude=40.4, longitude=-3.7)
+        WeatherRecord.objects.bulk_create(
+            WeatherRecord(
+                location=location,
+                datetime=start + datetime.timedelta(hours=hour),
+                temperature=20 + hour / 10,
+                precipitation=hour % 4 * 0.5,
+            )
+            for hour in range(72)
+        )
+
+def export(api_client, **params):
+    return api_client.get(reverse("export_records"), params)
+
+def streamed(response):
+    assert isinstance(response, StreamingHttpResponse)
+    return b"".join(response.streaming_content)
+
+# ---------------------------
+# Tests
+# ---------------------------
+def test_ndjson_streams_filtered_rows(api_client, records, settings):
+    settings.WEATHER_EXPORT_CHUNK_SIZE = 10
+    response = export(api_client, city="Madrid", start_date="2024-07-02", end_date="2024-07-02", format="ndjson")
+
+    assert response.status_code == 200
+    assert response["Content-Type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in streamed(response).decode().splitlines()]
+    assert len(rows) == 24
+    assert rows[0] == {"city": "Madrid", "datetime": "2024-07-02T00:00:00+00:00", "temperature": 22.4, "precipitation": 0.0}
+    assert [row["datetime"] for row in rows] == sorted(row["datetime"] for row in rows)
+
+def test_csv_groups_rows_by_city(api_client, records, settings):
+    settings.WEATHER_EXPORT_CHUNK_SIZE = 7
+    response = export(api_client, format="csv")
+
+    assert response["Content-Type"] == "text/csv"
+    rows = list(csv.DictReader(io.StringIO(streamed(response).decode())))
+    assert len(rows) == 144
+    assert [row["city"] for row in rows] == ["Sevilla"] * 72 + ["Madrid"] * 72  # Orden de location_id
+    assert rows[-1]["datetime"] == "2024-07-03T23:00:00+00:00"
+
+def test_empty_csv_has_header(api_client, records):
+    response = export(api_client, city="Bilbao", format="csv")
+
+    assert streamed(response).decode().splitlines() == ["city,datetime,temperature,precipitation"]
+
+def test_arrow_stream(api_client, records, settings):
+    pa = pytest.importorskip("pyarrow")
+    settings.WEATHER_EXPORT_CHUNK_SIZE = 50
+    response = export(api_client, city="Madrid", format="arrow")
+
+    table = pa.ipc.open_stream(streamed(response)).read_all()
+    assert table.num_rows == 72
+    assert table.schema.field("datetime").type == pa.timestamp("us", tz="UTC")
+    assert table.column("temperature").to_pylist()[:2] == [20.0, 20.1]
+
+def test_streams_block_by_block_under_asgi(records, settings, monkeypatch):
+    settings.WEATHER_EXPORT_CHUNK_SIZE = 24
+    events, body, requests = [], [], [{"type": "http.request", "body": b"", "more_body": False}]
+    blocks = export_service.blocks
+
+    def tracked_blocks(*args):
+        for block in blocks(*args):
+            events.append("read")
+            yield block
+
+    async def receive():
+        if requests:
+            return requests.pop()
+        await asyncio.Event().wait()  # El cliente sigue conectado
+
+    async def send(message):
+        if message["type"] == "http.response.body" and message.get("body"):
+            events.append("sent")
+            body.append(message["body"])
+
+    monkeypatch.setattr(export_service, "blocks", tracked_blocks)
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": reverse("export_records"), "query_string": b"format=ndjson", "headers": [],
+        "server": ("testserver", 80), "client": ("127.0.0.1", 1234),
+    }
+    # Como el cliente de tests de Django: la conexión (y la transacción) del test siguen abiertas
+    request_started.disconnect(close_old_connections)
+    request_finished.disconnect(close_old_connections)
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")  # Django avisa si tiene que leer el iterador entero
+            async_to_sync(ASGIHandler())(scope, receive, send)
+    finally:
+        request_started.connect(close_old_connections)
+        request_finished.connect(close_old_connections)
+
+    # Cada bloque se envía antes de leer el siguiente
+    assert events == ["read", "sent"] * 6
+    assert len(b"".join(body).decode().splitlines()) == 144
+
+def test_json_keyset_pages_cover_everything(api_client, records):
+    url, pages, rows = reverse("export_records") + "?limit=50", 0, []
+    while url:
+        body = api_client.get(url).json()
+        rows += body["results"]
+        url = body["next"]
+        pages += 1
+
+    assert pages == 3
+    assert len(rows) == 144
+    assert len({(row["city"], row["datetime"]) for row in rows}) == 144
+
+def test_json_page_keeps_filters(api_client, records):
+    body = export(api_client, city="Sevilla", start_date="2024-07-03", limit=20).json()
+    second = api_client.get(body["next"]).json()
+
+    assert "city=Sevilla" in body["next"]
+    assert second["results"][0]["datetime"] == "2024-07-03T20:00:00+00:00"
+    assert second["next"] is None and len(second["results"]) == 4
+
+@pytest.mark.parametrize("params", [
+    {"format": "xml"},
+    {"start_date": "01-07-2024"},
+    {"limit": "0"},
+    {"limit": "many"},
+    {"after": "not-a-cursor"},
+])
+def test_invalid_parameters(api_client, db, params):
+    response = export(api_client, **params)
+
+    assert response.status_code == 400
+    assert "error" in response.json()
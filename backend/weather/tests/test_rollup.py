@@ -0,0 +1,83 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from weather.models import DailyWeatherSummary, Location, WeatherRecord
+from services.open_meteo import OpenMeteoService
+from services import rollup
+import datetime
+
+# ---------------------------
+# Fixtures
+# ---------------------------
+@pytest.fixture
+def weather_json():
+    """Respuesta del archive API con dos días horarios"""
+    times = [f"2024-07-0{1 + h // 24}T{h % 24:02d}:00" for h in range(48)]
+    return {
+        "hourly": {
+            "time": times,
+            "temperature_2m": [31.0 if h in (14, 15) else -1.0 if h == 30 else 20.0 for h in range(48)],
+            "precipitation": [0.5 if h == 40 else 0.0 for h in range(48)],
+        }
+    }
+
+# ---------------------------
+# Tests
+# ---------------------------
+@pytest.mark.django_db
+def test_store_weather_data_updates_rollup(weather_json):
+    OpenMeteoService.store_weather_data("Madrid", 40.4168, -3.7038, weather_json)
+
+    day1, day2 = DailyWeatherSummary.objects.filter(city="Madrid")
+    assert day1.count == day2.count == 24
+    assert day1.temperature_max == 31.0
+    assert day1.temperature_max_at.hour == 14  # Primer instante con el máximo
+    assert day1.hours_above_threshold == 2
+    assert day2.temperature_min == -1.0
+    assert day2.temperature_min_at.hour == 6
+    assert day2.hours_below_threshold == 1
+    assert day2.precipitation_sum == day2.precipitation_max == 0.5
+
+@pytest.mark.django_db
+def test_rebuild_daily_summaries_command(weather_json):
+    OpenMeteoService.store_weather_data("Madrid", 40.4168, -3.7038, weather_json)
+    expected = list(DailyWeatherSummary.objects.values())
+    DailyWeatherSummary.objects.all().delete()
+
+    call_command("rebuild_daily_summaries")
+
+    rebuilt = list(DailyWeatherSummary.objects.values())
+    assert [{**row, "summary_id": None} for row in rebuilt] == [{**row, "summary_id": None} for row in expected]
+    assert sum(row["count"] for row in rebuilt) == WeatherRecord.objects.count()
+
+@pytest.mark.django_db
+def test_hours_outside_ingest_uncover_city(weather_json):
+    OpenMeteoService.store_weather_data("Madrid", 40.4168, -3.7038, weather_json)
+    madrid = Location.objects.get(name="Madrid")
+    assert madrid.hours == 48
+    assert rollup.uncovered_cities() == set()
+
+    # Horas guardadas sin pasar por el ingest: el trigger las cuenta y el resumen no las tiene
+    start = timezone.make_aware(datetime.datetime(2023, 7, 1))
+    extra = WeatherRecord.objects.bulk_create(
+        WeatherRecord(location=madrid, datetime=start + datetime.timedelta(hours=h), temperature=40.0, precipitation=0.0)
+        for h in range(3)
+    )
+    assert rollup.uncovered_cities() == rollup.uncovered_cities(["Madrid"]) == {"Madrid"}
+    assert rollup.uncovered_cities(["Sevilla"]) == set()
+
+    WeatherRecord.objects.filter(pk__in=[record.pk for record in extra]).delete()
+    assert Location.objects.get(name="Madrid").hours == 48
+    assert rollup.uncovered_cities() == set()
+
+@pytest.mark.django_db
+def test_coverage_check_does_not_read_hourly_rows(weather_json):
+    OpenMeteoService.store_weather_data("Madrid", 40.4168, -3.7038, weather_json)
+
+    with CaptureQueriesContext(connection) as queries:
+        rollup.uncovered_cities()
+
+    assert len(queries) == 1
+    assert WeatherRecord._meta.db_table not in queries[0]["sql"]
@@ -0,0 +1,106 @@
+import pytest
+import datetime
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from weather.models import Location, WeatherRecord
+from services.series import pick_resolution
+
+# ---------------------------
+# Fixtures
+# ---------------------------
+@pytest.fixture
+def api_client():
+    """Cliente API de DRF para tests"""
+    return APIClient()
+
+@pytest.fixture
+def records(db):
+    """Madrid del 2024-07-01 al 2024-08-31: temperatura = hora del día, lluvia a las 12"""
+    madrid = Location.objects.create(name="Madrid", latitude=40.4, longitude=-3.7)
+    start = timezone.make_aware(datetime.datetime(2024, 7, 1))
+    WeatherRecord.objects.bulk_create(
+        WeatherRecord(
+            location=madrid,
+            datetime=start + datetime.timedelta(hours=hour),
+            temperature=float(hour % 24),
+            precipitation=0.5 if hour % 24 == 12 else 0.0,
+        )
+        for hour in range(62 * 24)
+    )
+
+def get_series(api_client, **params):
+    return api_client.get(reverse("series"), {"city": "Madrid", **params})
+
+# ---------------------------
+# Tests
+# ---------------------------
+def test_daily_temperature_series(api_client, records):
+    body = get_series(api_client, resolution="day", start_date="2024-07-01", end_date="2024-07-03").json()
+
+    assert body["resolution"] == "day"
+    assert body["timestamps"] == [
+        "2024-07-01T00:00:00+00:00", "2024-07-02T00:00:00+00:00", "2024-07-03T00:00:00+00:00",
+    ]
+    assert body["values"] == [11.5] * 3
+    assert body["min"] == [0.0] * 3 and body["max"] == [23.0] * 3
+
+def test_monthly_precipitation_is_a_total(api_client, records):
+    body = get_series(api_client, variable="precipitation", resolution="month").json()
+
+    assert body["timestamps"] == ["2024-07-01T00:00:00+00:00", "2024-08-01T00:00:00+00:00"]
+    assert body["values"] == [15.5, 15.5]
+    assert body["max"] == [0.5, 0.5]
+
+def test_weekly_buckets_start_on_monday(api_client, records):
+    body = get_series(api_client, resolution="week", start_date="2024-07-03", end_date="2024-07-10").json()
+
+    # 2024-07-01 es lunes
+    assert body["timestamps"] == ["2024-07-01T00:00:00+00:00", "2024-07-08T00:00:00+00:00"]
+
+@pytest.mark.parametrize("params, resolution, points", [
+    ({"start_date": "2024-07-01", "end_date": "2024-07-10"}, "hour", 240),
+    ({}, "day", 62),
+    ({"start_date": "2024-07-01", "end_date": "2024-07-01"}, "hour", 24),
+])
+def test_auto_resolution_caps_points(api_client, records, settings, params, resolution, points):
+    settings.WEATHER_SERIES_MAX_POINTS = 300
+    body = get_series(api_client, **params).json()
+
+    assert body["resolution"] == resolution
+    assert len(body["timestamps"]) == len(body["values"]) == points
+
+def test_pick_resolution():
+    start = timezone.make_aware(datetime.datetime(2000, 1, 1))
+    assert pick_resolution(start, start + datetime.timedelta(days=30), 1000) == "hour"
+    assert pick_resolution(start, start + datetime.timedelta(days=365), 1000) == "day"
+    assert pick_resolution(start, start + datetime.timedelta(days=365 * 10), 1000) == "week"
+    assert pick_resolution(start, start + datetime.timedelta(days=365 * 80), 1000) == "month"
+    assert pick_resolution(start, start + datetime.timedelta(days=365 * 200), 1000) == "month"
+
+def test_explicit_resolution_over_limit(api_client, records, settings):
+    settings.WEATHER_SERIES_POINT_LIMIT = 100
+    response = get_series(api_client, resolution="hour")
+
+    assert response.status_code == 400
+
+@pytest.mark.parametrize("params", [
+    {"variable": "wind"},
+    {"resolution": "year"},
+    {"start_date": "2024-13-01"},
+    {"start_date": "2024-07-10", "end_date": "2024-07-01"},
+])
+def test_invalid_parameters(api_client, db, params):
+    assert get_series(api_client, **params).status_code == 400
+
+def test_no_data_returns_404(api_client, records):
+    assert get_series(api_client, city="Sevilla").status_code == 404
+    assert get_series(api_client, start_date="2030-01-01", end_date="2030-01-02").status_code == 404
+
+def test_cached_per_resolution(api_client, records):
+    daily = get_series(api_client, resolution="day")
+    monthly = get_series(api_client, resolution="month")
+
+    assert daily.json()["resolution"] == "day"
+    assert monthly.json()["resolution"] == "month"
+    assert daily["ETag"] != monthly["ETag"]
@@ -0,0 +1,100 @@
+import pytest
+import multiprocessing
+import runpy
+from pathlib import Path
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.db.utils import ConnectionHandler
+
+GUNICORN_CONF = Path(__file__).resolve().parents[2] / "gunicorn.conf.py"
+
+# ---------------------------
+# Fixtures
+# ---------------------------
+@pytest.fixture
+def production(monkeypatch):
+    """Carga config.settings_production con el entorno que se le pase"""
+    def load(**env):
+        monkeypatch.setenv("DJANGO_SECRET_KEY", "test-secret")
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        return runpy.run_module("config.settings_production")
+    return load
+
+@pytest.fixture
+def gunicorn_conf(monkeypatch):
+    def load(**env):
+        for name in ("GUNICORN_WORKER_CLASS", "WEB_CONCURRENCY", "GUNICORN_THREADS"):
+            monkeypatch.delenv(name, raising=False)
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        return runpy.run_path(str(GUNICORN_CONF))
+    return load
+
+# ---------------------------
+# Tests
+# ---------------------------
+def test_production_needs_secret_key(production, monkeypatch):
+    monkeypatch.delenv("DJANGO_SECRET_KEY", raising=False)
+    with pytest.raises(ImproperlyConfigured, match="DJANGO_SECRET_KEY"):
+        runpy.run_module("config.settings_production")
+
+def test_production_uses_connection_pool(production):
+    config = production(DJANGO_ALLOWED_HOSTS="api.example.com, localhost", WEATHER_DB_POOL_MAX_SIZE="4")
+    database = config["DATABASES"]["default"]
+
+    assert config["DEBUG"] is False
+    assert config["ALLOWED_HOSTS"] == ["api.example.com", "localhost"]
+    assert database["CONN_MAX_AGE"] == 0
+    assert database["CONN_HEALTH_CHECKS"] is True
+    assert database["OPTIONS"]["pool"]["max_size"] == 4
+    # Los settings de desarrollo no cambian
+    assert "pool" not in settings.DATABASES["default"].get("OPTIONS", {})
+
+def test_production_without_pool_keeps_connections(production):
+    database = production(WEATHER_DB_POOL="false")["DATABASES"]["default"]
+
+    assert database["CONN_MAX_AGE"] == 600
+    assert database["CONN_HEALTH_CHECKS"] is True
+    assert "pool" not in database.get("OPTIONS", {})
+
+@pytest.mark.django_db
+def test_pooled_connection_is_reused(production):
+    database = production()["DATABASES"]["default"]
+    database.update(NAME=connection.settings_dict["NAME"], TIME_ZONE=None)
+    pooled = ConnectionHandler({"default": database})["default"]
+
+    def query():
+        with pooled.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        pooled.close()  # Devuelve la conexión al pool
+
+    try:
+        query()
+        pooled.pool.wait()  # Hasta tener las min_size conexiones iniciales
+        opened = pooled.pool.get_stats()["connections_num"]
+        for _ in range(5):
+            query()
+
+        stats = pooled.pool.get_stats()
+        assert stats["requests_num"] == 6
+        assert stats["connections_num"] == opened  # Ninguna conexión nueva
+    finally:
+        pooled.close_pool()
+
+def test_gunicorn_defaults_to_uvicorn_workers(gunicorn_conf):
+    conf = gunicorn_conf()
+
+    assert conf["worker_class"] == "uvicorn_worker.UvicornWorker"
+    assert conf["wsgi_app"] == "config.asgi:application"
+    assert conf["workers"] == multiprocessing.cpu_count()
+    assert conf["preload_app"] is False
+
+def test_gunicorn_sync_workers(gunicorn_conf):
+    conf = gunicorn_conf(GUNICORN_WORKER_CLASS="gthread")
+
+    assert conf["wsgi_app"] == "config.wsgi:application"
+    assert conf["workers"] == 2 * multiprocessing.cpu_count() + 1
+    assert conf["threads"] == 4
+    assert gunicorn_conf(GUNICORN_WORKER_CLASS="gthread", WEB_CONCURRENCY="3")["workers"] == 3
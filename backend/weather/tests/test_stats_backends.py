@@ -0,0 +1,153 @@
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+from weather.models import DailyWeatherSummary, Location, WeatherRecord
+from services.open_meteo import OpenMeteoService
+from services.rollup import rebuild_daily_summaries
+from services.stats import global_stats
+from django.utils import timezone
+import datetime
+import pandas as pd
+
+# ---------------------------
+# Fixtures
+# ---------------------------
+@pytest.fixture
+def api_client():
+    """Cliente API de DRF para tests"""
+    return APIClient()
+
+@pytest.fixture
+def weather_days(db):
+    """Tres días de datos horarios para Madrid"""
+    start = timezone.make_aware(datetime.datetime(2024, 7, 1))
+    madrid = Location.objects.create(name="Madrid", latitude=40.4168, longitude=-3.7038)
+    records = []
+    for hour in range(72):
+        records.append(WeatherRecord(
+            location=madrid,
+            datetime=start + datetime.timedelta(hours=hour),
+            temperature=round(15 + (hour % 24) * 0.7 - (hour // 24) * 1.3, 1),
+            precipitation=0.4 if hour // 24 == 1 and hour % 5 == 0 else 0.0,
+        ))
+    WeatherRecord.objects.bulk_create(records)
+    rebuild_daily_summaries()
+    return records
+
+# ---------------------------
+# Tests
+# ---------------------------
+@pytest.mark.parametrize("endpoint", ["temperature_stats", "precipitation_stats"])
+@pytest.mark.parametrize("query", [
+    "?city=Madrid",
+    "?city=Madrid&start_date=2024-07-02&end_date=2024-07-03",
+    "?city=Madrid&start_date=2024-07-02&end_date=2024-07-02",
+])
+@pytest.mark.parametrize("backend", ["database", "rollup"])
+def test_backend_matches_pandas(api_client, weather_days, settings, backend, endpoint, query):
+    url = reverse(endpoint) + query
+
+    settings.WEATHER_STATS_BACKEND = "pandas"
+    expected = api_client.get(url)
+    settings.WEATHER_STATS_BACKEND = backend
+    response = api_client.get(url)
+
+    assert response.status_code == expected.status_code == 200
+    assert response.json() == expected.json()
+
+@pytest.mark.parametrize("backend", ["pandas", "database", "rollup"])
+@pytest.mark.parametrize("endpoint", ["temperature_stats", "precipitation_stats", "global_stats"])
+def test_no_data_returns_404(api_client, weather_days, settings, backend, endpoint):
+    settings.WEATHER_STATS_BACKEND = backend
+    response = api_client.get(reverse(endpoint) + "?city=Sevilla")
+    assert response.status_code == 404
+
+@pytest.mark.parametrize("query", ["", "?start_date=2024-07-02"])
+def test_global_stats_rollup_matches_pandas(api_client, weather_days, settings, query):
+    url = reverse("global_stats") + query
+
+    settings.WEATHER_STATS_BACKEND = "pandas"
+    expected = api_client.get(url)
+    settings.WEATHER_STATS_BACKEND = "rollup"
+    response = api_client.get(url)
+
+    assert response.status_code == expected.status_code == 200
+    assert response.json() == expected.json()
+
+@pytest.mark.parametrize("endpoint", ["temperature_stats", "global_stats"])
+def test_rollup_falls_back_for_hours_outside_summaries(api_client, weather_days, settings, endpoint):
+    # Horas de 2023 cargadas fuera del ingest (sin resumen) y después un día nuevo por el ingest
+    madrid = Location.objects.get(name="Madrid")
+    start = timezone.make_aware(datetime.datetime(2023, 7, 1))
+    WeatherRecord.objects.bulk_create(
+        WeatherRecord(location=madrid, datetime=start + datetime.timedelta(hours=h), temperature=40.0, precipitation=0.0)
+        for h in range(24)
+    )
+    OpenMeteoService.store_weather_data("Sevilla", 37.4, -6.0, {"hourly": {
+        "time": [f"2024-07-01T{h:02d}:00" for h in range(24)],
+        "temperature_2m": [25.0] * 24,
+        "precipitation": [0.0] * 24,
+    }})
+    url = reverse(endpoint)
+
+    settings.WEATHER_STATS_BACKEND = "pandas"
+    expected = api_client.get(url).json()
+    settings.WEATHER_STATS_BACKEND = "rollup"
+    response = api_client.get(url)
+
+    assert response.status_code == 200
+    assert response.json() == expected
+    assert "40.0" in response.content.decode()
+
+@pytest.mark.parametrize("endpoint", ["temperature_stats", "global_stats"])
+def test_database_backend_ignores_summaries(api_client, weather_days, settings, endpoint):
+    DailyWeatherSummary.objects.update(temperature_max=99.0)
+    url = reverse(endpoint) + "?city=Madrid"
+
+    settings.WEATHER_STATS_BACKEND = "pandas"
+    expected = api_client.get(url).json()
+    settings.WEATHER_STATS_BACKEND = "database"
+
+    assert api_client.get(url).json() == expected
+
+def test_database_backend_query_count(api_client, weather_days, settings, django_assert_max_num_queries):
+    settings.WEATHER_STATS_BACKEND = "database"
+    # Más la versión de la ciudad para la caché de respuestas
+    with django_assert_max_num_queries(3):
+        api_client.get(reverse("temperature_stats") + "?city=Madrid")
+    with django_assert_max_num_queries(3):
+        api_client.get(reverse("precipitation_stats") + "?city=Madrid")
+
+def test_pandas_global_stats_single_pass():
+    # Ciudades intercaladas y sin ordenar; empates en el máximo -> primera fila
+    df = pd.DataFrame({
+        "city": ["Sevilla", "Madrid", "Sevilla", "Madrid", "Madrid"],
+        "datetime": pd.to_datetime([
+            "2024-07-02T10:00Z", "2024-07-01T23:00Z", "2024-07-01T12:00Z", "2024-07-02T00:00Z", "2024-07-03T05:00Z",
+        ]),
+        "temperature": [30.0, 20.0, 30.0, 25.0, 25.0],
+        "precipitation": [0.0, 0.5, 0.0, 0.0, 1.25],
+    })
+
+    assert global_stats(df) == {
+        "Madrid": {
+            "start_date": "2024-07-01",
+            "end_date": "2024-07-03",
+            "temperature_average": 23.33,
+            "precipitation_total": 1.75,
+            "days_with_precipitation": 2,
+            "precipitation_max": {"date": "2024-07-03", "value": 1.25},
+            "temperature_max": {"date": "2024-07-02", "value": 25.0},
+            "temperature_min": {"date": "2024-07-01", "value": 20.0},
+        },
+        "Sevilla": {
+            "start_date": "2024-07-01",
+            "end_date": "2024-07-02",
+            "temperature_average": 30.0,
+            "precipitation_total": 0.0,
+            "days_with_precipitation": 0,
+            "precipitation_max": {"date": "2024-07-02", "value": 0.0},
+            "temperature_max": {"date": "2024-07-02", "value": 30.0},
+            "temperature_min": {"date": "2024-07-02", "value": 30.0},
+        },
+    }
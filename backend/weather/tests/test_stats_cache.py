@@ -0,0 +1,99 @@
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+from services.open_meteo import OpenMeteoService
+from fake_open_meteo import fake_hourly
+
+# ---------------------------
+# Fixtures
+# ---------------------------
+@pytest.fixture
+def api_client():
+    """Cliente API de DRF para tests"""
+    return APIClient()
+
+def store(city, start_date, end_date):
+    OpenMeteoService.store_weather_data(city, 40.4, -3.7, {"hourly": fake_hourly(40.4, start_date, end_date)})
+
+# ---------------------------
+# Tests
+# ---------------------------
+@pytest.mark.django_db
+def test_repeated_request_is_served_from_cache(api_client, django_assert_num_queries):
+    store("Madrid", "2024-07-01", "2024-07-03")
+    url = reverse('temperature_stats') + "?city=Madrid"
+    first = api_client.get(url)
+
+    with django_assert_num_queries(1):  # Solo la versión de la ciudad
+        second = api_client.get(url)
+
+    assert second.status_code == 200
+    assert second.json() == first.json()
+    assert second["ETag"] == first["ETag"]
+    assert "Last-Modified" in second
+
+@pytest.mark.django_db
+def test_conditional_request_returns_304(api_client, django_assert_num_queries):
+    store("Madrid", "2024-07-01", "2024-07-03")
+    url = reverse('precipitation_stats') + "?city=Madrid&start_date=2024-07-01&end_date=2024-07-02"
+    etag = api_client.get(url)["ETag"]
+
+    with django_assert_num_queries(1):
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == 304
+    assert response.content == b""
+
+@pytest.mark.django_db
+def test_ingest_invalidates_only_that_city(api_client):
+    store("Madrid", "2024-07-01", "2024-07-01")
+    store("Sevilla", "2024-07-01", "2024-07-01")
+    madrid_url = reverse('temperature_stats') + "?city=Madrid"
+    sevilla_url = reverse('temperature_stats') + "?city=Sevilla"
+    global_url = reverse('global_stats')
+    madrid, sevilla, overall = api_client.get(madrid_url), api_client.get(sevilla_url), api_client.get(global_url)
+
+    store("Madrid", "2024-07-02", "2024-07-02")
+
+    new_madrid = api_client.get(madrid_url, HTTP_IF_NONE_MATCH=madrid["ETag"])
+    assert new_madrid.status_code == 200
+    assert len(new_madrid.json()["temperature"]["average_by_day"]) == 2
+    # Sevilla no ha cambiado; las consultas sin ciudad sí
+    assert api_client.get(sevilla_url, HTTP_IF_NONE_MATCH=sevilla["ETag"]).status_code == 304
+    new_overall = api_client.get(global_url, HTTP_IF_NONE_MATCH=overall["ETag"])
+    assert new_overall.status_code == 200
+    assert new_overall.json()["Madrid"]["end_date"] == "2024-07-02"
+
+@pytest.mark.django_db
+def test_load_in_another_process_invalidates(api_client, settings):
+    store("Madrid", "2024-07-01", "2024-07-01")
+    url = reverse('temperature_stats') + "?city=Madrid"
+    etag = api_client.get(url)["ETag"]
+
+    # El worker de ingesta tiene su propia caché en memoria
+    settings.CACHES = {**settings.CACHES, "worker": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "worker",
+    }}
+    settings.WEATHER_STATS_CACHE = "worker"
+    store("Madrid", "2024-07-02", "2024-07-02")
+    settings.WEATHER_STATS_CACHE = "default"
+
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert len(response.json()["temperature"]["average_by_day"]) == 2
+
+@pytest.mark.django_db
+def test_unchanged_reload_keeps_cache(api_client):
+    store("Madrid", "2024-07-01", "2024-07-01")
+    url = reverse('temperature_stats') + "?city=Madrid"
+    etag = api_client.get(url)["ETag"]
+
+    store("Madrid", "2024-07-01", "2024-07-01")  # Mismos datos: nada insertado ni actualizado
+
+    assert api_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+@pytest.mark.django_db
+def test_browser_must_revalidate(api_client):
+    store("Madrid", "2024-07-01", "2024-07-01")
+    response = api_client.get(reverse('temperature_stats') + "?city=Madrid")
+    assert response["Cache-Control"] == "no-cache"
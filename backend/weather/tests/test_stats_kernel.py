@@ -0,0 +1,153 @@
+import pytest
+import numpy as np
+import pandas as pd
+from django.urls import reverse
+from rest_framework.test import APIClient
+from weather.models import Location, WeatherRecord
+from weather.tasks import calculate_precipitation_stats, calculate_temperature_stats
+from services.rollup import rebuild_daily_summaries
+from services.stats import precipitation_stats, temperature_stats
+
+# ---------------------------
+# Implementaciones anteriores (referencia de paridad)
+# ---------------------------
+def legacy_temperature_stats(df, start_date=None, end_date=None):
+    """services.stats.temperature_stats antes del motor común"""
+    df['datetime'] = pd.to_datetime(df['datetime'])
+    if start_date:
+        df = df[df['datetime'].dt.date >= pd.to_datetime(start_date).date()]
+    if end_date:
+        df = df[df['datetime'].dt.date <= pd.to_datetime(end_date).date()]
+    if df.empty:
+        return {}
+    df['date'] = df['datetime'].dt.date
+    max_row = df.loc[df['temperature'].idxmax()]
+    min_row = df.loc[df['temperature'].idxmin()]
+    return {
+        "average": round(df['temperature'].mean(), 2),
+        "average_by_day": {str(k): round(v, 2) for k, v in df.groupby('date')['temperature'].mean().to_dict().items()},
+        "max": {"value": round(max_row['temperature'], 2), "date_time": max_row['datetime'].isoformat()},
+        "min": {"value": round(min_row['temperature'], 2), "date_time": min_row['datetime'].isoformat()},
+    }
+
+def legacy_precipitation_stats(df, start_date=None, end_date=None):
+    """services.stats.precipitation_stats antes del motor común"""
+    df['datetime'] = pd.to_datetime(df['datetime'])
+    if start_date:
+        df = df[df['datetime'].dt.date >= pd.to_datetime(start_date).date()]
+    if end_date:
+        df = df[df['datetime'].dt.date <= pd.to_datetime(end_date).date()]
+    if df.empty:
+        return {}
+    df['date'] = df['datetime'].dt.date
+    max_row = df.loc[df['precipitation'].idxmax()]
+    return {
+        "total": round(df['precipitation'].sum(), 2),
+        "total_by_day": {str(k): round(v, 2) for k, v in df.groupby('date')['precipitation'].sum().to_dict().items()},
+        "days_with_precipitation": int((df.groupby('date')['precipitation'].sum() > 0).sum()),
+        "max": {"value": round(max_row['precipitation'], 2), "date": str(max_row['date'])},
+        "average": round(df['precipitation'].mean(), 2),
+    }
+
+def legacy_task_temperature(df, threshold_high=30, threshold_low=0):
+    """weather.tasks.calculate_temperature_stats antes del motor común"""
+    df["datetime"] = pd.to_datetime(df["datetime"])
+    avg_by_day = df.groupby(df["datetime"].dt.date)["temperature"].mean().to_dict()
+    max_row = df.loc[df["temperature"].idxmax()]
+    min_row = df.loc[df["temperature"].idxmin()]
+    return {
+        "temperature": {
+            "average": round(df["temperature"].mean(), 1),
+            "average_by_day": {str(k): round(v, 1) for k, v in avg_by_day.items()},
+            "max": {"value": max_row["temperature"], "date_time": max_row["datetime"].isoformat()},
+            "min": {"value": min_row["temperature"], "date_time": min_row["datetime"].isoformat()},
+            "hours_above_threshold": int((df["temperature"] > threshold_high).sum()),
+            "hours_below_threshold": int((df["temperature"] < threshold_low).sum()),
+        }
+    }
+
+def legacy_task_precipitation(df):
+    """weather.tasks.calculate_precipitation_stats antes del motor común"""
+    df["datetime"] = pd.to_datetime(df["datetime"])
+    total_by_day = df.groupby(df["datetime"].dt.date)["precipitation"].sum()
+    max_row = df.loc[df["precipitation"].idxmax()]
+    return {
+        "precipitation": {
+            "total": round(df["precipitation"].sum(), 1),
+            "total_by_day": {str(k): round(v, 1) for k, v in total_by_day.to_dict().items()},
+            "average": round(df["precipitation"].mean(), 2),
+            "days_with_precipitation": int((total_by_day > 0).sum()),
+            "max": {"value": max_row["precipitation"], "date": max_row["datetime"].date().isoformat()},
+        }
+    }
+
+# ---------------------------
+# Fixtures
+# ---------------------------
+@pytest.fixture
+def api_client():
+    """Cliente API de DRF para tests"""
+    return APIClient()
+
+@pytest.fixture(params=[0, 1, 2])
+def hourly(request):
+    """Diez días horarios con un decimal (como el archive API), heladas, calor y empates"""
+    rng = np.random.default_rng(request.param)
+    hours = 240
+    return pd.DataFrame({
+        "datetime": pd.date_range("2024-01-25", periods=hours, freq="h", tz="UTC"),
+        "temperature": (rng.normal(12, 12, hours) // 0.5 * 0.5).round(1),
+        "precipitation": np.where(rng.random(hours) < 0.8, 0.0, rng.gamma(1, 1.2, hours)).round(1),
+    })
+
+@pytest.fixture
+def stored(db, hourly):
+    """Las mismas horas guardadas para Madrid, con su resumen diario"""
+    madrid = Location.objects.create(name="Madrid", latitude=40.4, longitude=-3.7)
+    WeatherRecord.objects.bulk_create([
+        WeatherRecord(location=madrid, datetime=row.datetime.to_pydatetime(),
+                      temperature=row.temperature, precipitation=row.precipitation)
+        for row in hourly.itertuples()
+    ])
+    rebuild_daily_summaries()
+    return hourly
+
+# ---------------------------
+# Tests
+# ---------------------------
+@pytest.mark.parametrize("dates", [(None, None), ("2024-01-27", "2024-01-30"), ("2024-02-03", None)])
+def test_view_stats_match_legacy(hourly, dates):
+    assert temperature_stats(hourly.copy(), *dates) == legacy_temperature_stats(hourly.copy(), *dates)
+    assert precipitation_stats(hourly.copy(), *dates) == legacy_precipitation_stats(hourly.copy(), *dates)
+
+def test_out_of_range_is_empty(hourly):
+    assert temperature_stats(hourly.copy(), "2025-01-01") == {}
+    assert precipitation_stats(hourly.copy(), None, "2023-12-31") == {}
+
+def test_task_stats_match_legacy(stored):
+    assert calculate_temperature_stats("Madrid") == legacy_task_temperature(stored.copy())
+    assert calculate_temperature_stats("Madrid", 20, 5) == legacy_task_temperature(stored.copy(), 20, 5)
+    assert calculate_precipitation_stats("Madrid") == legacy_task_precipitation(stored.copy())
+
+def test_thresholds_are_optional(hourly):
+    assert "hours_above_threshold" not in temperature_stats(hourly.copy())
+    result = temperature_stats(hourly.copy(), threshold_high=20)
+    assert result["hours_above_threshold"] == int((hourly["temperature"] > 20).sum())
+    assert "hours_below_threshold" not in result
+
+@pytest.mark.parametrize("query", ["&threshold_high=30&threshold_low=0", "&threshold_high=18.5&threshold_low=-2"])
+def test_threshold_params_on_every_backend(api_client, stored, settings, query):
+    url = reverse("temperature_stats") + "?city=Madrid" + query
+    responses = {}
+    for backend in ("pandas", "database", "rollup"):
+        settings.WEATHER_STATS_BACKEND = backend
+        responses[backend] = api_client.get(url).json()["temperature"]
+
+    assert responses["pandas"] == responses["database"] == responses["rollup"]
+    high, low = (float(p.split("=")[1]) for p in query.strip("&").split("&"))
+    assert responses["pandas"]["hours_above_threshold"] == int((stored["temperature"] > high).sum())
+    assert responses["pandas"]["hours_below_threshold"] == int((stored["temperature"] < low).sum())
+
+def test_invalid_threshold(api_client, stored):
+    response = api_client.get(reverse("temperature_stats") + "?city=Madrid&threshold_high=hot")
+    assert response.status_code == 400
@@ -0,0 +1,48 @@
+import pytest
+import numpy as np
+from django.core.management import CommandError, call_command
+from weather.models import DailyWeatherSummary, Location, WeatherRecord
+from services.synthetic import synthetic_hourly
+
+# ---------------------------
+# Tests
+# ---------------------------
+def test_synthetic_hourly_shape_and_seasons():
+    north = synthetic_hourly(45.0, "2023-01-01", "2023-12-31", np.random.default_rng(1))
+    south = synthetic_hourly(-45.0, "2023-01-01", "2023-12-31", np.random.default_rng(1))
+
+    assert len(north["time"]) == len(north["temperature_2m"]) == len(north["precipitation"]) == 8760
+    assert north["time"][:2] == ["2023-01-01T00:00", "2023-01-01T01:00"]
+    assert north["time"][-1] == "2023-12-31T23:00"
+    january, july = slice(0, 31 * 24), slice(181 * 24, 212 * 24)
+    assert np.mean(north["temperature_2m"][july]) > np.mean(north["temperature_2m"][january]) + 10
+    assert np.mean(south["temperature_2m"][january]) > np.mean(south["temperature_2m"][july]) + 10
+    precipitation = np.array(north["precipitation"])
+    assert precipitation.min() == 0 and 0.02 < (precipitation > 0).mean() < 0.3
+
+def test_synthetic_hourly_is_deterministic():
+    first = synthetic_hourly(40.0, "2024-02-28", "2024-03-01", np.random.default_rng(7))
+    second = synthetic_hourly(40.0, "2024-02-28", "2024-03-01", np.random.default_rng(7))
+
+    assert first == second
+    assert len(first["time"]) == 72  # 2024 es bisiesto
+
+@pytest.mark.django_db
+def test_seed_synthetic_command(capsys):
+    call_command("seed_synthetic", cities=3, years=2, end_year=2023)
+
+    assert list(Location.objects.order_by("name").values_list("name", flat=True)) == [
+        "Synthetic 001", "Synthetic 002", "Synthetic 003",
+    ]
+    assert WeatherRecord.objects.count() == 3 * (8760 * 2)
+    assert DailyWeatherSummary.objects.filter(city="Synthetic 002").count() == 365 * 2
+    assert "3 cities: 52560 inserted" in capsys.readouterr().out
+
+    # Misma semilla: mismos datos, nada que escribir
+    call_command("seed_synthetic", cities=3, years=2, end_year=2023)
+    assert "0 inserted, 0 updated, 52560 skipped" in capsys.readouterr().out
+
+@pytest.mark.django_db
+def test_seed_synthetic_rejects_empty_sizes():
+    with pytest.raises(CommandError):
+        call_command("seed_synthetic", cities=0)
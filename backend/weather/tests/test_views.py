@@ -1,7 +1,7 @@
 import pytest
 from django.urls import reverse
 from rest_framework.test import APIClient
-from weather.models import WeatherRecord
+from weather.models import Location, WeatherRecord
 from django.utils import timezone
 import datetime
 
@@ -17,9 +17,7 @@ def api_client():
 def sample_weather(db):
     """Crea un registro de clima de prueba en la base de datos"""
     record = WeatherRecord.objects.create(
-        city="Madrid",
-        latitude=40.4168,
-        longitude=-3.7038,
+        location=Location.objects.create(name="Madrid", latitude=40.4168, longitude=-3.7038),
         datetime=timezone.make_aware(datetime.datetime(2024, 7, 1, 12, 0)),
         temperature=28.5,
         precipitation=0.0
@@ -40,7 +38,8 @@ def test_health_check(api_client, caplog):
     assert "ERROR" not in caplog.text
 
 @pytest.mark.django_db
-def test_load_weather_post(api_client, caplog):
+def test_load_weather_post(api_client, caplog, settings, open_meteo_server):
+    settings.WEATHER_LOAD_ASYNC = False
     url = reverse('load_weather')
     data = {
         "city": "Madrid",
@@ -83,4 +82,4 @@ def test_global_stats(api_client, sample_weather, caplog):
         response = api_client.get(url)
     assert response.status_code == 200
     json_data = response.json()
-    assert "Madrid" in json_data
\ No newline at end of file
+    assert "Madrid" in json_data
\ No newline at end of file
@@ -1,14 +1,26 @@
 from django.urls import path
 from .views.load import load_weather
+from .views.load_batch import load_weather_batch
 from .views.temperature import get_temperature_stats
 from .views.precipitation import get_precipitation_stats
 from .views.global_stats import get_global_stats
 from .views.health import health_check
+from .views.geocoding import geocoding_cache_stats
+from .views.jobs import load_job_status
+from .views.records import export_records
+from .views.series import get_series
+from .views.compare import compare_cities
 
 urlpatterns = [
     path("load/", load_weather, name="load_weather"),
+    path("load/batch/", load_weather_batch, name="load_weather_batch"),
+    path("jobs/<int:job_id>/", load_job_status, name="load_job_status"),
     path("temperature/", get_temperature_stats, name="temperature_stats"),
     path("precipitation/", get_precipitation_stats, name="precipitation_stats"),
     path("global-stats/", get_global_stats, name="global_stats"),
+    path("records/", export_records, name="export_records"),
+    path("series/", get_series, name="series"),
+    path("compare/", compare_cities, name="compare"),
     path("health/", health_check, name="health_check"),
+    path("geocoding-cache/", geocoding_cache_stats, name="geocoding_cache_stats"),
 ]
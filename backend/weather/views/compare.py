@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.http import JsonResponse
+from ..queries import as_date
+from services import compare, metrics
+from services.stats_cache import cached_stats
+
+
+@cached_stats("compare")
+def compare_cities(request):
+    """
+    /api/compare/?cities=Madrid,Sevilla&metrics=temperature,precipitation&start_date=&end_date=
+    Todas las ciudades en una consulta; las series diarias vienen alineadas con `dates`.
+    """
+    cities = list(dict.fromkeys(city.strip() for city in request.GET.get("cities", "").split(",") if city.strip()))
+    variables = [name.strip() for name in request.GET.get("metrics", ",".join(compare.VARIABLES)).split(",") if name.strip()]
+    start_date = request.GET.get("start_date")
+    end_date = request.GET.get("end_date")
+
+    if not cities:
+        return JsonResponse({"error": "cities is required (comma-separated city names)"}, status=400)
+    if len(cities) > settings.WEATHER_COMPARE_MAX_CITIES:
+        return JsonResponse({"error": f"At most {settings.WEATHER_COMPARE_MAX_CITIES} cities per request"}, status=400)
+    if not variables or any(name not in compare.VARIABLES for name in variables):
+        return JsonResponse({"error": f"metrics must be a list of {', '.join(compare.VARIABLES)}"}, status=400)
+    try:
+        for day in (start_date, end_date):
+            if day:
+                as_date(day)
+    except ValueError:
+        return JsonResponse({"error": "start_date and end_date must be YYYY-MM-DD dates"}, status=400)
+
+    result = compare.compare(cities, variables, start_date, end_date)
+    if not result["cities"]:
+        return JsonResponse({"error": "No data found", "missing": result["missing"]}, status=404)
+
+    with metrics.phase("encode"):
+        return JsonResponse(result)
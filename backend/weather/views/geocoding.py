@@ -0,0 +1,9 @@
+from django.http import JsonResponse
+from services import geocoding_cache
+
+def geocoding_cache_stats(request):
+    """
+    Contadores de la caché de geocoding de este proceso.
+    Con carga estable, misses debería tender a cero.
+    """
+    return JsonResponse(geocoding_cache.stats())
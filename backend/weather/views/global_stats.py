@@ -1,63 +1,47 @@
+from django.conf import settings
 from django.http import JsonResponse
-import pandas as pd
-from ..models import WeatherRecord
+from ..models import DailyWeatherSummary, Location, WeatherRecord
+from ..queries import filter_records, filter_summaries
 from services.stats import global_stats
+from services.stats_cache import cached_stats
+from services import cold_tier, metrics, rollup
 
 
+@cached_stats("global-stats")
 def get_global_stats(request):
     city = request.GET.get("city")
     start_date = request.GET.get("start_date")
     end_date = request.GET.get("end_date")
 
-    qs = WeatherRecord.objects.all()
-
-    if city:
-        qs = qs.filter(city=city)
-    if start_date:
-        qs = qs.filter(datetime__date__gte=start_date)
-    if end_date:
-        qs = qs.filter(datetime__date__lte=end_date)
-
-    df = pd.DataFrame(
-        list(
-            qs.values(
-                "city",
-                "datetime",
-                "temperature",
-                "precipitation",
-                "latitude",
-                "longitude",
-            )
-        )
+    qs = filter_records(WeatherRecord.objects.all(), city, start_date, end_date)
+    summaries = filter_summaries(DailyWeatherSummary.objects.all(), city, start_date, end_date)
+
+    if settings.WEATHER_STATS_BACKEND != "pandas":
+        if settings.WEATHER_STATS_BACKEND == "database":
+            # Los mismos agregados por ciudad y día, sobre los datos horarios
+            result = rollup.global_stats(summaries.none(), qs)
+        else:
+            # Las ciudades que el resumen diario no cubre entero se agregan desde los datos horarios
+            uncovered = rollup.uncovered_cities([city] if city else None)
+            records = qs.filter(location__name__in=uncovered) if uncovered else None
+            result = rollup.global_stats(summaries.exclude(city__in=uncovered), records)
+        if not result:
+            return JsonResponse({"error": "No data found"}, status=404)
+        with metrics.phase("encode"):
+            return JsonResponse(result)
+
+    # Se lee el id de la ciudad (entero) y los nombres se ponen después, una vez por ciudad
+    df = cold_tier.records_frame(
+        qs, "location", "datetime", "temperature", "precipitation",
+        city=city, start_date=start_date, end_date=end_date,
     )
 
     if df.empty:
         return JsonResponse({"error": "No data found"}, status=404)
 
-    raw_result = global_stats(df)
-
-    # 🔥 RECONSTRUIR FORMATO EXACTO
-    formatted_result = {}
-
-    for city_name, data in raw_result.items():
-        formatted_result[city_name] = {
-            "start_date": data["start_date"],
-            "end_date": data["end_date"],
-            "temperature_average": data["temperature_average"],
-            "precipitation_total": data["precipitation_total"],
-            "days_with_precipitation": data["days_with_precipitation"],
-            "precipitation_max": {
-                "date": data["precipitation_max"]["date"],
-                "value": data["precipitation_max"]["value"],
-            },
-            "temperature_max": {
-                "date": data["temperature_max"]["date"],
-                "value": data["temperature_max"]["value"],
-            },
-            "temperature_min": {
-                "date": data["temperature_min"]["date"],
-                "value": data["temperature_min"]["value"],
-            },
-        }
-
-    return JsonResponse(formatted_result)
+    names = dict(Location.objects.filter(pk__in=df["location"].unique().tolist()).values_list("location_id", "name"))
+    df["city"] = df.pop("location").map(names)
+
+    result = global_stats(df)
+    with metrics.phase("encode"):
+        return JsonResponse(result)
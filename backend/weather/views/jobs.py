@@ -0,0 +1,27 @@
+from django.http import JsonResponse
+from ..models import LoadJob
+
+def load_job_status(request, job_id):
+    """
+    Estado de una carga encolada por /api/load/.
+    result lleva los contadores (inserted / updated / skipped) al terminar.
+    """
+    try:
+        job = LoadJob.objects.get(pk=job_id)
+    except LoadJob.DoesNotExist:
+        return JsonResponse({"error": "Job not found"}, status=404)
+
+    return JsonResponse({
+        "job_id": job.job_id,
+        "city": job.city,
+        "start_date": job.start_date.isoformat(),
+        "end_date": job.end_date.isoformat(),
+        "status": job.state,
+        "progress": job.progress,
+        "attempts": job.attempts,
+        "error": job.error or None,
+        "result": job.result,
+        "created_at": job.created_at.isoformat(),
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    })
@@ -1,16 +1,24 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.views.decorators.csrf import csrf_exempt
 from django.http import JsonResponse
 from django.utils import timezone
 import json
 from ..models import WeatherRecord
 from datetime import datetime  
-from services.open_meteo import OpenMeteoService
+from django.urls import reverse
+from services.jobs import submit_load_job
+from services.open_meteo import OpenMeteoService, PartialLoadError
 import logging
 
 logger = logging.getLogger(__name__)
 
 @csrf_exempt
-def load_weather(request):
+async def load_weather(request):
+    """
+    Carga los días que faltan de una ciudad. Es async: bajo ASGI la espera a
+    Open-Meteo no ocupa un hilo, así que un proceso atiende muchas cargas a la vez.
+    """
     if request.method != "POST":
         return JsonResponse({"error": "Only POST allowed"}, status=405)
 
@@ -26,26 +34,42 @@ def load_weather(request):
         if start_dt > end_dt:
             return JsonResponse({"error": "start_date must be before end_date"}, status=400)
 
-        logger.info(f"Load request for city={city}, start={start_date}, end={end_date}")
+        logger.info("Load request for city=%s, start=%s, end=%s", city, start_date, end_date)
 
-        # Obtener coordenadas y datos de OpenMeteoService
-        coords = OpenMeteoService.get_city_coordinates(city)
-        weather_data = OpenMeteoService.fetch_weather_data(
-            coords['latitude'],
-            coords['longitude'],
+        if settings.WEATHER_LOAD_ASYNC:
+            if not isinstance(city, str) or not city.strip():
+                return JsonResponse({"error": "city is required"}, status=400)
+
+            # La descarga la hace un worker; el cliente consulta status_url
+            job, created = await sync_to_async(submit_load_job)(city, start_dt.date(), end_dt.date())
+            return JsonResponse({
+                "status": job.state,
+                "job_id": job.job_id,
+                "deduplicated": not created,
+                "status_url": reverse("load_job_status", args=[job.job_id]),
+            }, status=202)
+
+        counts = await OpenMeteoService.aload_weather(
+            city,
             start_date,
-            end_date
+            end_date,
+            window_days=settings.WEATHER_FETCH_WINDOW_DAYS,
+            chunk_size=settings.WEATHER_COPY_CHUNK_SIZE,
+            workers=settings.WEATHER_FETCH_WORKERS,
+            window_retries=settings.WEATHER_FETCH_WINDOW_RETRIES,
         )
 
-        records_added = OpenMeteoService.store_weather_data(
-            city_name=city,
-            latitude=coords['latitude'],
-            longitude=coords['longitude'],
-            weather_json=weather_data
-        )
+        return JsonResponse({"status": "success", "records_added": counts["inserted"], **counts})
 
-        return JsonResponse({"status": "success", "records_added": records_added})
+    except PartialLoadError as e:
+        # Lo descargado ya está guardado: repetir la carga solo pide lo que falta
+        logger.error("Partial load for %s: %s", city, e)
+        return JsonResponse({
+            "error": str(e),
+            "failed_windows": [list(window) for window in e.failed_windows],
+            **e.counts,
+        }, status=502)
 
     except Exception as e:
-        logger.error(f"Error loading weather for {city}: {e}")
+        logger.error("Error loading weather for %s: %s", city, e)
         return JsonResponse({"error": str(e)}, status=500)
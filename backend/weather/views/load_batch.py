@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.views.decorators.csrf import csrf_exempt
+from django.http import JsonResponse
+import json
+from services.batch_load import load_batch
+import logging
+
+logger = logging.getLogger(__name__)
+
+@csrf_exempt
+def load_weather_batch(request):
+    """
+    Carga varias ciudades en una sola petición.
+    Body: lista de {"city", "start_date", "end_date"} (o {"items": [...]}).
+    Devuelve el estado de cada ciudad en el mismo orden.
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "Only POST allowed"}, status=405)
+
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({"error": "Invalid JSON body"}, status=400)
+
+    items = data.get("items") if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        return JsonResponse({"error": "Expected a non-empty list of {city, start_date, end_date}"}, status=400)
+    if len(items) > settings.WEATHER_BATCH_MAX_ITEMS:
+        return JsonResponse({"error": f"At most {settings.WEATHER_BATCH_MAX_ITEMS} cities per batch"}, status=400)
+
+    logger.info("Batch load request for %d cities", len(items))
+
+    try:
+        results = load_batch(
+            items,
+            workers=settings.WEATHER_BATCH_WORKERS,
+            coords_per_request=settings.WEATHER_BATCH_COORDS_PER_REQUEST,
+            window_days=settings.WEATHER_FETCH_WINDOW_DAYS,
+            window_retries=settings.WEATHER_FETCH_WINDOW_RETRIES,
+            chunk_size=settings.WEATHER_COPY_CHUNK_SIZE,
+        )
+    except Exception as e:
+        logger.error("Error in batch load: %s", e)
+        return JsonResponse({"error": str(e)}, status=500)
+
+    status = "success" if all(r["status"] == "success" for r in results) else "partial"
+    return JsonResponse({"status": status, "results": results})
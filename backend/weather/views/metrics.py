@@ -0,0 +1,13 @@
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from services import metrics
+
+
+def prometheus_metrics(request):
+    """
+    Histogramas de este proceso en formato de texto de Prometheus.
+    Cada proceso (worker de gunicorn) tiene los suyos.
+    """
+    if not settings.WEATHER_METRICS_ENABLED:
+        raise Http404("Metrics are disabled")
+    return HttpResponse(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
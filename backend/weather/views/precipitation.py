@@ -1,27 +1,33 @@
+from django.conf import settings
 from django.http import JsonResponse
-import pandas as pd
-from ..models import WeatherRecord
+from ..models import DailyWeatherSummary, WeatherRecord
+from ..queries import filter_records, filter_summaries
 from services.stats import precipitation_stats
+from services.stats_cache import cached_stats
+from services import cold_tier, metrics, rollup, stats_db
 
+@cached_stats("precipitation")
 def get_precipitation_stats(request):
     city = request.GET.get("city")
     start_date = request.GET.get("start_date")
     end_date = request.GET.get("end_date")
 
-    qs = WeatherRecord.objects.all()
+    qs = filter_records(WeatherRecord.objects.all(), city, start_date, end_date)
+    summaries = filter_summaries(DailyWeatherSummary.objects.all(), city, start_date, end_date)
 
-    if city:
-        qs = qs.filter(city=city)
-    if start_date:
-        qs = qs.filter(datetime__date__gte=start_date)
-    if end_date:
-        qs = qs.filter(datetime__date__lte=end_date)
+    if settings.WEATHER_STATS_BACKEND == "pandas":
+        df = cold_tier.records_frame(qs, "datetime", "precipitation", city=city, start_date=start_date, end_date=end_date)
+        result = precipitation_stats(df, start_date, end_date)
+    else:
+        result = {}
+        # Si el resumen diario no tiene todas las horas (datos cargados fuera del ingest) se agrega sobre los datos horarios
+        if settings.WEATHER_STATS_BACKEND == "rollup" and not rollup.uncovered_cities([city] if city else None):
+            result = rollup.precipitation_stats(summaries)
+        if not result:
+            result = stats_db.precipitation_stats(qs)
 
-    df = pd.DataFrame(list(qs.values("datetime", "precipitation")))
-
-    if df.empty:
+    if not result:
         return JsonResponse({"error": "No data found"}, status=404)
 
-    result = precipitation_stats(df, start_date, end_date)
-
-    return JsonResponse({"precipitation": result})
+    with metrics.phase("encode"):
+        return JsonResponse({"precipitation": result})
@@ -0,0 +1,67 @@
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from ..models import WeatherRecord
+from ..queries import as_date, filter_records
+from services import export
+import logging
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ["json", *export.ENCODERS]
+
+
+def export_records(request):
+    """
+    Datos horarios de /api/records/?city=&start_date=&end_date=&format=
+    - format=json (por defecto): páginas de `limit` filas; `next` lleva a la siguiente
+    - format=ndjson / csv / arrow: todo el rango en una respuesta en streaming
+    """
+    city = request.GET.get("city")
+    start_date = request.GET.get("start_date")
+    end_date = request.GET.get("end_date")
+    output = request.GET.get("format", "json")
+
+    if output not in FORMATS:
+        return JsonResponse({"error": f"format must be one of {', '.join(FORMATS)}"}, status=400)
+    try:
+        for day in (start_date, end_date):
+            if day:
+                as_date(day)
+    except ValueError:
+        return JsonResponse({"error": "start_date and end_date must be YYYY-MM-DD dates"}, status=400)
+
+    qs = filter_records(WeatherRecord.objects.all(), city, start_date, end_date)
+
+    if output == "json":
+        try:
+            limit = int(request.GET.get("limit", settings.WEATHER_EXPORT_PAGE_SIZE))
+            if not 1 <= limit <= settings.WEATHER_EXPORT_MAX_PAGE_SIZE:
+                raise ValueError
+        except ValueError:
+            return JsonResponse(
+                {"error": f"limit must be between 1 and {settings.WEATHER_EXPORT_MAX_PAGE_SIZE}"}, status=400
+            )
+        try:
+            results, next_cursor = export.page(qs, request.GET.get("after"), limit)
+        except ValueError:
+            return JsonResponse({"error": "Invalid after cursor"}, status=400)
+
+        next_url = None
+        if next_cursor:
+            params = request.GET.copy()
+            params["after"] = next_cursor
+            next_url = f"{request.path}?{params.urlencode()}"
+        return JsonResponse({"results": results, "next": next_url})
+
+    if output == "arrow" and export.pa is None:
+        return JsonResponse({"error": "Arrow output requires pyarrow"}, status=501)
+
+    logger.info("Streaming %s export for city=%s, start=%s, end=%s", output, city, start_date, end_date)
+    chunks = export.ENCODERS[output](export.blocks(qs, settings.WEATHER_EXPORT_CHUNK_SIZE))
+    if isinstance(request, ASGIRequest):
+        # Bajo ASGI Django lee entero un iterador síncrono antes de enviar nada
+        chunks = export.aiter_chunks(chunks)
+    response = StreamingHttpResponse(chunks, content_type=export.CONTENT_TYPES[output])
+    response["Content-Disposition"] = f'attachment; filename="weather-records.{output}"'
+    return response
@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.db.models import Max, Min
+from django.http import JsonResponse
+from ..models import WeatherRecord
+from ..queries import as_date, day_start, filter_records
+from services import metrics, series
+from services.stats_cache import cached_stats
+from datetime import timedelta
+
+
+@cached_stats("series")
+def get_series(request):
+    """
+    Serie de /api/series/?city=&variable=temperature|precipitation&resolution=&start_date=&end_date=
+    resolution: hour, day, week, month o auto (por defecto), que elige la más fina
+    que no pasa de WEATHER_SERIES_MAX_POINTS puntos en el rango pedido.
+    """
+    city = request.GET.get("city")
+    start_date = request.GET.get("start_date")
+    end_date = request.GET.get("end_date")
+    variable = request.GET.get("variable", "temperature")
+    resolution = request.GET.get("resolution", "auto")
+
+    if variable not in series.VARIABLES:
+        return JsonResponse({"error": f"variable must be one of {', '.join(series.VARIABLES)}"}, status=400)
+    if resolution != "auto" and resolution not in series.RESOLUTIONS:
+        return JsonResponse({"error": f"resolution must be auto or one of {', '.join(series.RESOLUTIONS)}"}, status=400)
+    try:
+        start = day_start(start_date) if start_date else None
+        end = day_start(as_date(end_date) + timedelta(days=1)) if end_date else None
+    except ValueError:
+        return JsonResponse({"error": "start_date and end_date must be YYYY-MM-DD dates"}, status=400)
+    if start and end and start >= end:
+        return JsonResponse({"error": "start_date must be before end_date"}, status=400)
+
+    qs = filter_records(WeatherRecord.objects.all(), city, start_date, end_date)
+
+    # Sin fechas, el rango es el de los datos
+    if not (start and end):
+        bounds = qs.aggregate(first=Min("datetime"), last=Max("datetime"))
+        if bounds["first"] is None:
+            return JsonResponse({"error": "No data found"}, status=404)
+        start = start or bounds["first"]
+        end = end or bounds["last"] + timedelta(hours=1)
+
+    if resolution == "auto":
+        resolution = series.pick_resolution(start, end, settings.WEATHER_SERIES_MAX_POINTS)
+    elif series.point_count(resolution, start, end) > settings.WEATHER_SERIES_POINT_LIMIT:
+        return JsonResponse(
+            {"error": f"More than {settings.WEATHER_SERIES_POINT_LIMIT} points; use a coarser resolution"},
+            status=400,
+        )
+
+    result = series.bucketed(qs, variable, resolution)
+    if not result["timestamps"]:
+        return JsonResponse({"error": "No data found"}, status=404)
+
+    with metrics.phase("encode"):
+        return JsonResponse({"city": city, "variable": variable, "resolution": resolution, **result})
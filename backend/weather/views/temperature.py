@@ -1,27 +1,37 @@
+from django.conf import settings
 from django.http import JsonResponse
-import pandas as pd
-from ..models import WeatherRecord
+from ..models import DailyWeatherSummary, WeatherRecord
+from ..queries import filter_records, filter_summaries, thresholds
 from services.stats import temperature_stats
+from services.stats_cache import cached_stats
+from services import cold_tier, metrics, rollup, stats_db
 
+@cached_stats("temperature")
 def get_temperature_stats(request):
     city = request.GET.get("city")
     start_date = request.GET.get("start_date")
     end_date = request.GET.get("end_date")
+    try:
+        limits = thresholds(request.GET)
+    except ValueError:
+        return JsonResponse({"error": "threshold_high and threshold_low must be numbers"}, status=400)
 
-    qs = WeatherRecord.objects.all()
+    qs = filter_records(WeatherRecord.objects.all(), city, start_date, end_date)
+    summaries = filter_summaries(DailyWeatherSummary.objects.all(), city, start_date, end_date)
 
-    if city:
-        qs = qs.filter(city=city)
-    if start_date:
-        qs = qs.filter(datetime__date__gte=start_date)
-    if end_date:
-        qs = qs.filter(datetime__date__lte=end_date)
+    if settings.WEATHER_STATS_BACKEND == "pandas":
+        df = cold_tier.records_frame(qs, "datetime", "temperature", city=city, start_date=start_date, end_date=end_date)
+        result = temperature_stats(df, start_date, end_date, **limits)
+    else:
+        result = {}
+        # Si el resumen diario no tiene todas las horas (datos cargados fuera del ingest) se agrega sobre los datos horarios
+        if settings.WEATHER_STATS_BACKEND == "rollup" and not rollup.uncovered_cities([city] if city else None):
+            result = rollup.temperature_stats(summaries, **limits)
+        if not result:
+            result = stats_db.temperature_stats(qs, **limits)
 
-    df = pd.DataFrame(list(qs.values("datetime", "temperature")))
-
-    if df.empty:
+    if not result:
         return JsonResponse({"error": "No data found"}, status=404)
 
-    result = temperature_stats(df, start_date, end_date)
-
-    return JsonResponse({"temperature": result})
+    with metrics.phase("encode"):
+        return JsonResponse({"temperature": result})
@@ -37,6 +37,12 @@ export async function postLoadWeather(
   return handleResponse(res);
 }
 
+// Load job status (the backend queues /load/ requests and answers 202)
+export async function getLoadJob(jobId: number) {
+  const res = await fetch(`${API_BASE}/jobs/${jobId}/`);
+  return handleResponse(res);
+}
+
 // Temperature stats
 export async function getTemperatureStats(
   city: string,
@@ -72,3 +78,24 @@ export async function getGlobalStats() {
   const res = await fetch(`${API_BASE}/global-stats/`);
   return handleResponse(res);
 }
+
+// Bucketed series for charts: parallel arrays timestamps / values / min / max
+export type SeriesResolution = "auto" | "hour" | "day" | "week" | "month";
+
+export async function getSeries(
+  city: string,
+  variable: "temperature" | "precipitation",
+  start?: string,
+  end?: string,
+  resolution: SeriesResolution = "auto"
+) {
+  const url = new URL(`${API_BASE}/series/`);
+  url.searchParams.append("city", city);
+  url.searchParams.append("variable", variable);
+  url.searchParams.append("resolution", resolution);
+  if (start) url.searchParams.append("start_date", start);
+  if (end) url.searchParams.append("end_date", end);
+
+  const res = await fetch(url.toString());
+  return handleResponse(res);
+}
@@ -1,6 +1,10 @@
 import React, { useState } from "react";
 import { CityFilter, City } from "../context/CityFilter";
-import { postLoadWeather } from "../api";
+import { postLoadWeather, getLoadJob } from "../api";
+
+const POLL_INTERVAL_MS = 1000;
+
+const sleep = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms));
 
 export const LoadWeather: React.FC = () => {
   const [start, setStart] = useState("");
@@ -34,7 +38,21 @@ export const LoadWeather: React.FC = () => {
     setError(null);
 
     try {
-      const data = await postLoadWeather(city.name, start, end);
+      let data = await postLoadWeather(city.name, start, end);
+
+      // Carga encolada: consultar el trabajo hasta que termine
+      if (data.job_id !== undefined) {
+        while (data.status === "queued" || data.status === "running") {
+          setMessage(`Loading data... ${data.progress ?? 0}%`);
+          await sleep(POLL_INTERVAL_MS);
+          data = await getLoadJob(data.job_id);
+        }
+        if (data.status === "succeeded") {
+          setMessage(`Data loaded successfully: ${data.result.inserted} records added`);
+          setError(null);
+          return;
+        }
+      }
 
       if (data.status === "success" && data.records_added !== undefined) {
         setMessage(`Data loaded successfully: ${data.records_added} records added`);